@@ -8,6 +8,7 @@ import requests
 from robot.api.deco import library
 
 from qbrix.core.qbrix_robot_base import QbrixRobotTask
+from qbrix.tools.shared.qbrix_describe_cache import get_describe
 
 
 @library(scope='GLOBAL', auto_keywords=True, doc_format='reST')
@@ -338,6 +339,12 @@ class QbrixValidationKeywords(QbrixRobotTask):
         self.builtin.log_to_console("\n[VALIDATION] Returning Nothing")
         return None
 
+    def __describe(self, sobject: str = None):
+        """Returns the describe for an object (or the Global Describe) using the shared describe cache"""
+
+        org = self.cumulusci.org
+        return get_describe(org.instance_url, org.access_token, org.org_id, self.cumulusci.sf.sf_version, sobject)
+
     def __does_not_support_count(self, objectname: str):
         if objectname.lower() == "standardvalueset":
             return True
@@ -366,7 +373,7 @@ class QbrixValidationKeywords(QbrixRobotTask):
             self.__recordIgnoredResult(resulttype, resultname, f"IGNORED::targetruntime {targetruntime} does not apply to this org", datatag=datatag)
             return
 
-        sobjectset = self.cumulusci.sf.describe()["sobjects"]
+        sobjectset = self.__describe()["sobjects"]
         # self.shared.log_to_file(f"SOjectKeys::{sobjectset}")
         for x in sobjectset:
             foundlabel = x["label"]
@@ -375,7 +382,7 @@ class QbrixValidationKeywords(QbrixRobotTask):
             if foundlabel.lower() == targetobjectlabel.lower() or foundname.lower() == targetobjectlabel.lower():
                 # self.shared.log_to_file(f"Found SObject::{foundlabel}")
 
-                targetdescribe = self.cumulusci.sf.__getattr__(targetobjectlabel).describe()
+                targetdescribe = self.__describe(foundname)
 
                 # self.shared.log_to_file(f"DescKey::{targetdescribe.keys()}")
                 layerfound = False
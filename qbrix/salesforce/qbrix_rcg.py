@@ -1,7 +1,13 @@
 from abc import ABC
 import json
+from concurrent.futures import ThreadPoolExecutor
 from cumulusci.tasks.salesforce import BaseSalesforceApiTask
 
+from qbrix.tools.shared.qbrix_composite_tasks import chunk_list
+
+# Maximum number of inputs accepted in a single invocable action call
+MAX_ACTION_INPUTS = 200
+
 class RefreshCache(BaseSalesforceApiTask, ABC):
 
     """Refreshes B2B Cache"""
@@ -36,35 +42,93 @@ class RefreshDecisionTree(BaseSalesforceApiTask, ABC):
     """Refreshes B2B Decision Tree"""
 
     salesforce_task = True
-    task_docs = "Refreshes the B2B Decision Tree"
+    task_docs = "Refreshes the B2B Decision Tree. Active Decision Tables are refreshed in batches, with each batch sent as a single multi-input action call."
+
+    task_options = {
+        "org": {
+            "description": "Org Alias for the target org",
+            "required": False
+        },
+        "batch_size": {
+            "description": f"Number of Decision Tables to refresh in each action call. Defaults to 25, maximum {MAX_ACTION_INPUTS}",
+            "required": False
+        },
+        "max_workers": {
+            "description": "Number of action calls to send at the same time. Defaults to 4",
+            "required": False
+        }
+    }
+
+    def _init_options(self, kwargs):
+        super(RefreshDecisionTree, self)._init_options(kwargs)
+        self.batch_size = int(self.options["batch_size"]) if "batch_size" in self.options else 25
+        self.batch_size = max(1, min(self.batch_size, MAX_ACTION_INPUTS))
+        self.max_workers = int(self.options["max_workers"]) if "max_workers" in self.options else 4
+
+    def _parse_action_results(self, content, tree_names):
+        """Returns the result for each table from an action response body, or None when the body does not have one result per table"""
+
+        if isinstance(content, (str, bytes)):
+            try:
+                content = json.loads(content)
+            except ValueError:
+                return None
+
+        if not isinstance(content, list) or len(content) != len(tree_names):
+            return None
 
-    def _refresh_tree(self, tree_name):
+        if not all(isinstance(result, dict) and "isSuccess" in result for result in content):
+            return None
+
+        return content
+
+    def _refresh_trees(self, tree_names):
+        """Refreshes a batch of Decision Tables with one action call and returns a result for each table"""
 
         try:
-            self.sf.restful(
-            "actions/standard/refreshDecisionTable",
-            method="POST",
-            data=json.dumps({
-                'inputs': [
-                    {
-                        'decisionTableApiName': tree_name ,
-                    },
-                ],
-            })
-        )
+            response = self.sf.restful(
+                "actions/standard/refreshDecisionTable",
+                method="POST",
+                data=json.dumps({
+                    'inputs': [{'decisionTableApiName': tree_name} for tree_name in tree_names],
+                })
+            )
         except Exception as e:
+            # The action returns an error status when any input fails, with the result for each table in the response body
+            results = self._parse_action_results(getattr(e, "content", None), tree_names)
+            if results is not None:
+                return results
             self.logger.error(e)
-            return
+            return [{"isSuccess": False, "errors": [{"message": str(e)}]} for _ in tree_names]
+
+        if not response:
+            return [{"isSuccess": False, "errors": [{"message": "No response returned"}]} for _ in tree_names]
+
+        return response
 
     def _run_task(self):
         """Runs the refresh B2B Decision Tree task"""
 
         self.logger.info("Checking Decision Tree Cache for RCG")
-        decision_table_results = self.sf.query("SELECT DeveloperName FROM DecisionTable where status = 'Active'")
+        decision_table_results = self.sf.query_all("SELECT DeveloperName FROM DecisionTable where status = 'Active'")
         if decision_table_results and decision_table_results["totalSize"] > 0:
-            for table in decision_table_results["records"]:
-                self._refresh_tree(table["DeveloperName"])
-            self.logger.info("Complete!")
+            table_names = [table["DeveloperName"] for table in decision_table_results["records"]]
+            batches = chunk_list(table_names, self.batch_size)
+            self.logger.info(f"Refreshing {len(table_names)} Decision Tables in {len(batches)} batch(es)...")
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                batch_results = list(executor.map(self._refresh_trees, batches))
+
+            failed = 0
+            for batch, results in zip(batches, batch_results):
+                for table_name, result in zip(batch, results):
+                    if result.get("isSuccess"):
+                        self.logger.info(f" -> {table_name} | REFRESHED")
+                    else:
+                        failed += 1
+                        self.logger.error(f" -> {table_name} | FAILED | {result.get('errors')}")
+
+            self.logger.info(f"Complete! {len(table_names) - failed} of {len(table_names)} Decision Tables refreshed")
         else:
             self.logger.info("No Active Decision Tables in org. Skipping Task")
 
@@ -1,11 +1,14 @@
 import base64
+import hashlib
 import json
 import os
 import pathlib
 import re
 import tempfile
+import time
 from abc import ABC
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from time import sleep
 
 import requests
@@ -13,7 +16,7 @@ import yaml
 from cumulusci.core.tasks import BaseTask
 from cumulusci.core.utils import process_list_of_pairs_dict_arg
 from cumulusci.robotframework.CumulusCI import CumulusCI
-from cumulusci.tasks.salesforce import BaseSalesforceApiTask
+from cumulusci.tasks.salesforce import BaseSalesforceApiTask, Deploy, DeployBundles
 from cumulusci.tasks.salesforce.sourcetracking import RetrieveChanges
 from cumulusci.tasks.salesforce.update_dependencies import UpdateDependencies
 from cumulusci.tasks.sfdx import SFDXOrgTask
@@ -24,12 +27,49 @@ from qbrix.tools.health.qbrix_project_checks import (
     run_experience_cloud_checks,
 )
 from qbrix.tools.shared.qbrix_cci_tasks import run_cci_flow, run_cci_task
+from qbrix.tools.shared.qbrix_composite_tasks import (
+    query_all_in,
+    query_subrequest,
+    run_composite_batch,
+    run_sobject_collection,
+)
 from qbrix.tools.shared.qbrix_console_utils import init_logger
+from qbrix.tools.shared.qbrix_describe_cache import get_describe
+from qbrix.tools.shared.qbrix_http import new_http_session
+from qbrix.tools.shared.qbrix_predicate_cache import invalidate_org_config_predicates
 from qbrix.tools.utils.qbrix_orgconfig_hydrate import NGOrgConfig
 
 log = init_logger()
 now = datetime.now()
 
+# Settings for each type of permission which can be assigned to a User
+PERMISSION_MODES = {
+    "PERMISSIONSET": {
+        "object_name": "PermissionSet",
+        "message_name": "Permission Set",
+        "lookup_field": "Name",
+        "label_field": "Label",
+        "assignment_field": "PermissionSetId",
+        "assignment_object": "PermissionSetAssignment",
+    },
+    "PERMISSIONSETGROUP": {
+        "object_name": "PermissionSetGroup",
+        "message_name": "Permission Set Group",
+        "lookup_field": "DeveloperName",
+        "label_field": "MasterLabel",
+        "assignment_field": "PermissionSetGroupId",
+        "assignment_object": "PermissionSetAssignment",
+    },
+    "PERMISSIONSETLICENSE": {
+        "object_name": "PermissionSetLicense",
+        "message_name": "Permission Set License",
+        "lookup_field": "DeveloperName",
+        "label_field": "MasterLabel",
+        "assignment_field": "PermissionSetLicenseId",
+        "assignment_object": "PermissionSetLicenseAssign",
+    },
+}
+
 
 def salesforce_query(soql_select_statement, org_alias, raw_return=False):
     """
@@ -89,22 +129,6 @@ def QbrixInstallCheck(qbrix_name, org_alias):
     return bool(check_result and check_result.get("totalSize") > 0)
 
 
-def _time_since_modified(path):
-    """
-    Returns the time since the target file was last modified
-
-    Args:
-        path (str): Relative Path to the file
-
-    Returns:
-        timedelta: Time since the target file was last modified
-    """
-
-    timestamp = os.path.getmtime(str(path))
-    last_modified = datetime.fromtimestamp(timestamp)
-    return datetime.now() - last_modified
-
-
 def _remove_missing_field_schema(submitted_dict, field_names):
     """
     Removes keys and related values from a submitted dict containing User fields and values, which are not present in the target org.
@@ -140,7 +164,7 @@ class CreateUser(BaseSalesforceApiTask, NGOrgConfig, ABC):
 
     Single Record: Within the step, add a task with options set for 'data', 'role', 'profile' and optionally 'permission_set_api_names', 'permission_set_group_api_names' and 'user_profile_image'. The 'path' option must not be defined as this will enable bulk mode and ignore anything you have set for the options mentioned.
 
-    Bulk Mode: Create a .yml file within your project and provide the relative path to the file, within the 'path' option. If the path is left blank, single record mode will be used.
+    Bulk Mode: Create a .yml file within your project and provide the relative path to the file, within the 'path' option. If the path is left blank, single record mode will be used. Bulk Mode loads all users as a batch (lookups via IN queries, records via sObject Collections in chunks of 200, then profile images and permissions). Set 'batch_mode' to False to process one user at a time.
 
     Note: For both modes above, the option for 'upsert_field' must be set if you are not using External_ID__c
 
@@ -203,8 +227,15 @@ class CreateUser(BaseSalesforceApiTask, NGOrgConfig, ABC):
             "required": False,
         },
         "where": {"description": "Optional Where Clause", "required": False},
+        "batch_mode": {
+            "description": "When running in Bulk Mode, resolves lookups with IN queries and loads users with sObject Collections instead of one record at a time. Defaults to True",
+            "required": False,
+        },
     }
 
+    # Number of concurrent profile image uploads in Bulk Mode
+    bulk_image_workers = 4
+
     def _init_options(self, kwargs):
         super(CreateUser, self)._init_options(kwargs)
 
@@ -263,54 +294,42 @@ class CreateUser(BaseSalesforceApiTask, NGOrgConfig, ABC):
             else False
         )
         self.gender = self.options["gender"] if "gender" in self.options else None
+        self.batch_mode = (
+            str(self.options["batch_mode"]).lower() not in ("false", "0", "no")
+            if "batch_mode" in self.options
+            else True
+        )
+        self._permission_index = None
 
-    def _get_user_desc(self, tmp_file_location=None):
+    def _get_user_desc(self):
         """
-        Gets the Object Describe information for the User Object in the target org. This is also cached via a file in .qbrix directory.
-
-        Args:
-            tmp_file_location (str): (optional) Location of the file to cache the object describe information. Defaults to .qbrix/user_object_desc.json
+        Gets the Object Describe information for the User Object in the target org. This is cached using the shared describe cache, keyed by org and API version.
 
         Returns:
             dict: The Object Describe information for the User Object in the target org
         """
 
-        if not tmp_file_location:
-            tmp_file_location = ".qbrix/user_object_desc.json"
-
-        if os.path.exists(tmp_file_location) and _time_since_modified(
-            tmp_file_location
-        ) <= timedelta(minutes=10):
-            log.info("Loading cached File...")
-            with open(tmp_file_location, "r") as user_detail_file:
-                return json.load(user_detail_file)
-        else:
-            log.info("Loading info from org and creating cached File...")
-            api = self.sf
-            user_details = api.User.describe()
-            if not os.path.exists(".qbrix"):
-                os.mkdir(".qbrix")
-            with open(tmp_file_location, "w") as user_detail_file:
-                json.dump(user_details, user_detail_file)
-            return user_details
+        return get_describe(
+            self.org_config.instance_url,
+            self.org_config.access_token,
+            self.org_config.org_id,
+            self.sf.sf_version,
+            "User",
+        )
 
-    def _ensure_required_fields(
-        self, submitted_dict, field_names, role, profile, manager=None, contact=None
-    ):
+    def _apply_default_fields(self, submitted_dict, field_names):
         """
-        Checks that all required fields have a value, even if none were passed in, except for FirstName and LastName which are required.
+        Checks that FirstName and LastName have been provided and sets default values for any other required fields which have not been passed in.
 
         Args:
             submitted_dict (dict): The dictionary of submitted values
-            field_names (list): The list of field names to check
-            role (str): The role of the user
-            profile (str): The profile of the user
-            manager (str): The manager of the user
-            contact (str): The contact of the user
+            field_names (list): The list of field names for the User object in the target org
 
         Raises:
-            Exception: If a required field is missing in the submitted_dict or if a required field is missing in the field_names list.
+            Exception: If FirstName or LastName is missing in the submitted_dict.
 
+        Returns:
+            dict: The submitted values with defaults applied
         """
 
         if (
@@ -380,6 +399,29 @@ class CreateUser(BaseSalesforceApiTask, NGOrgConfig, ABC):
         if "UserPermissionsKnowledgeUser" not in submitted_dict.keys():
             submitted_dict.update({"UserPermissionsKnowledgeUser": False})
 
+        return submitted_dict
+
+    def _ensure_required_fields(
+        self, submitted_dict, field_names, role, profile, manager=None, contact=None
+    ):
+        """
+        Checks that all required fields have a value, even if none were passed in, except for FirstName and LastName which are required.
+
+        Args:
+            submitted_dict (dict): The dictionary of submitted values
+            field_names (list): The list of field names to check
+            role (str): The role of the user
+            profile (str): The profile of the user
+            manager (str): The manager of the user
+            contact (str): The contact of the user
+
+        Raises:
+            Exception: If a required field is missing in the submitted_dict or if a required field is missing in the field_names list.
+
+        """
+
+        submitted_dict = self._apply_default_fields(submitted_dict, field_names)
+
         api = self.sf
 
         # Lookup Role
@@ -592,49 +634,102 @@ class CreateUser(BaseSalesforceApiTask, NGOrgConfig, ABC):
         User Record ID and the api names (as a list) are also required.
         """
 
+        return self._assign_permissions_batch(
+            mode, [(user_id, api_names)], ignore_failures
+        )
+
+    def _get_permission_index(self, mode: str):
+        """
+        Returns a lookup of lower case API name (and label) to record Id for all Permission Sets, Permission Set Groups or Permission Set Licenses in the target org. Each index is loaded with a single query and reused for the rest of the run.
+        """
+
+        if self._permission_index is None:
+            self._permission_index = {}
+
+        if mode not in self._permission_index:
+            settings = PERMISSION_MODES[mode]
+            query = f"SELECT Id, {settings['lookup_field']}, {settings['label_field']} FROM {settings['object_name']}"
+            if mode == "PERMISSIONSET":
+                query += " WHERE IsOwnedByProfile = false"
+
+            index = {}
+            labels = {}
+            for record in self.sf.query_all(query).get("records", []):
+                index.setdefault(record[settings["lookup_field"]].lower(), record["Id"])
+                if record.get(settings["label_field"]):
+                    labels.setdefault(
+                        record[settings["label_field"]].lower(), record["Id"]
+                    )
+
+            # API names take priority over labels
+            for label, record_id in labels.items():
+                index.setdefault(label, record_id)
+
+            self._permission_index[mode] = index
+
+        return self._permission_index[mode]
+
+    def _get_existing_assignments(self, mode: str, user_ids):
+        """
+        Returns a set of (AssigneeId, Permission Id) for the given users and mode, loaded with IN queries.
+        """
+
+        settings = PERMISSION_MODES[mode]
+        assignment_field = settings["assignment_field"]
+        records = query_all_in(
+            self.sf,
+            f"SELECT AssigneeId, {assignment_field} FROM {settings['assignment_object']}",
+            "AssigneeId",
+            user_ids,
+            where=f"{assignment_field} != null",
+        )
+        return {(r["AssigneeId"], r[assignment_field]) for r in records}
+
+    def _assign_permissions_batch(
+        self, mode: str, user_permissions, ignore_failures: bool = False
+    ):
+        """
+        Assigns Permission Sets, Permission Set Groups or Permission Set Licenses to many users at once, based on the mode. Permissions are resolved from a prefetched index, existing assignments are checked with IN queries and missing assignments are created with sObject Collections.
+
+        When failures are not ignored, each user's assignments are sent in order, one per user in each request, and a user's remaining assignments are skipped after their first failure.
+
+        Args:
+            mode (str): PERMISSIONSET, PERMISSIONSETGROUP or PERMISSIONSETLICENSE
+            user_permissions (list): List of (user_id, api_names) tuples
+            ignore_failures (bool): When False, stops assigning to a user after their first failure and returns False
+
+        Returns:
+            bool: True if all requested assignments are in place (or failures are ignored)
+        """
+
         # Catch for Invalid Assignments
-        if not mode or mode.upper() not in (
-            "PERMISSIONSET",
-            "PERMISSIONSETGROUP",
-            "PERMISSIONSETLICENSE",
-        ):
+        if not mode or mode.upper() not in PERMISSION_MODES:
             self.logger.error(
                 "Invalid permission type requested. Permission assignment skipped."
             )
             return False
 
-        # Set Mode
         mode = mode.upper()
-        object_name = None
-        message_name = None
-        lookup_field = None
-        assignment_field = None
-        assignment_object = None
-
-        if mode == "PERMISSIONSET":
-            object_name = "PermissionSet"
-            message_name = "Permission Set"
-            lookup_field = "Name"
-            assignment_field = "PermissionSetId"
-            assignment_object = "PermissionSetAssignment"
-        elif mode == "PERMISSIONSETGROUP":
-            object_name = "PermissionSetGroup"
-            message_name = "Permission Set Group"
-            lookup_field = "DeveloperName"
-            assignment_field = "PermissionSetGroupId"
-            assignment_object = "PermissionSetAssignment"
-        elif mode == "PERMISSIONSETLICENSE":
-            object_name = "PermissionSetLicense"
-            message_name = "Permission Set License"
-            lookup_field = "DeveloperName"
-            assignment_field = "PermissionSetLicenseId"
-            assignment_object = "PermissionSetLicenseAssign"
-
-        # Loop Through Permission Set Names
-        for perm in list(api_names):
-            try:
-                api = self.sf
+        settings = PERMISSION_MODES[mode]
+        message_name = settings["message_name"]
+        assignment_field = settings["assignment_field"]
+
+        try:
+            permission_index = self._get_permission_index(mode)
+            existing_assignments = self._get_existing_assignments(
+                mode, [user_id for user_id, _ in user_permissions]
+            )
+        except Exception as permission_assingment_error:
+            self.logger.error(
+                "Permission Assignment to user failed. Error details: %s",
+                permission_assingment_error,
+            )
+            return False
 
+        new_assignments = []
+        requested = set()
+        for user_id, api_names in user_permissions:
+            for perm in list(api_names or []):
                 # Check for labels and non api names
                 if " " in perm:
                     self.logger.error(
@@ -643,78 +738,87 @@ class CreateUser(BaseSalesforceApiTask, NGOrgConfig, ABC):
                     )
                     continue
 
-                # Check Permission Set Exists
-                permission_set_query = api.query(
-                    f"SELECT Id FROM {object_name} WHERE {lookup_field} = '{perm}' LIMIT 1"
-                )
-                if permission_set_query["totalSize"] == 0:
+                permission_set_id = permission_index.get(perm.lower())
+                if not permission_set_id:
                     self.logger.info(
                         "The requested permission '%s' was not found in the target salesforce org. Skipping.",
                         perm,
                     )
-                    permission_set_id = None
                     continue
-                else:
-                    permission_set_id = permission_set_query["records"][0]["Id"]
 
-                # Check for existing Permission Set, Group or License has been already assigned
-                permission_set_assignment_query = api.query(
-                    f"SELECT Id FROM {assignment_object} WHERE AssigneeId = '{user_id}' AND {assignment_field} = '{permission_set_id}' LIMIT 1"
-                )
-                if permission_set_assignment_query["totalSize"] == 1:
+                if (user_id, permission_set_id) in existing_assignments:
                     self.logger.info(
                         "Permission '%s' already assigned to user. Skipping.", perm
                     )
                     continue
 
-                permset_creation_result = None
-                if mode == "PERMISSIONSETLICENSE":
-                    # Create Permission Set License Assignment
-                    permset_creation_result = api.PermissionSetLicenseAssign.create(
-                        {
-                            "AssigneeId": user_id,
-                            str(assignment_field): permission_set_id,
-                        }
-                    )
-                else:
-                    # Create Permission Set Assignment
-                    permset_creation_result = api.PermissionSetAssignment.create(
+                if (user_id, permission_set_id) in requested:
+                    continue
+                requested.add((user_id, permission_set_id))
+
+                new_assignments.append(
+                    (
+                        perm,
                         {
                             "AssigneeId": user_id,
                             str(assignment_field): permission_set_id,
-                        }
+                        },
                     )
+                )
 
-                if permset_creation_result and permset_creation_result.get("id"):
+        if not new_assignments:
+            return True
+
+        if ignore_failures:
+            assignment_rounds = [new_assignments]
+        else:
+            user_queues = {}
+            for perm, record in new_assignments:
+                user_queues.setdefault(record["AssigneeId"], []).append((perm, record))
+            assignment_rounds = [
+                [queue[i] for queue in user_queues.values() if len(queue) > i]
+                for i in range(max(len(queue) for queue in user_queues.values()))
+            ]
+
+        all_assigned = True
+        failed_users = set()
+        for assignment_round in assignment_rounds:
+            assignment_round = [
+                (perm, record)
+                for perm, record in assignment_round
+                if record["AssigneeId"] not in failed_users
+            ]
+            if not assignment_round:
+                continue
+
+            results = run_sobject_collection(
+                self.sf,
+                "POST",
+                [record for _, record in assignment_round],
+                sobject=settings["assignment_object"],
+            )
+
+            for (perm, record), result in zip(assignment_round, results):
+                if result.get("success"):
                     self.logger.info(
-                        "%s (With API Name: %s) has been assigned (ID: {permset_creation_result['id']})!",
+                        "%s (With API Name: %s) has been assigned to %s (ID: %s)!",
                         message_name,
                         perm,
+                        record["AssigneeId"],
+                        result.get("id"),
                     )
                 else:
                     self.logger.error(
-                        "%s (With API Name: %s) failed to assign. Moving onto next %s (if any). Details: %s",
+                        "%s (With API Name: %s) failed to assign to %s. Details: %s",
                         message_name,
                         perm,
-                        message_name,
-                        permset_creation_result,
+                        record["AssigneeId"],
+                        result.get("errors"),
                     )
+                    all_assigned = False
+                    failed_users.add(record["AssigneeId"])
 
-                    if ignore_failures:
-                        continue
-                    else:
-                        return False
-
-            except Exception as permission_assingment_error:
-                self.logger.error(
-                    "Permission Assignment to user failed. Error details: %s",
-                    permission_assingment_error,
-                )
-                if ignore_failures:
-                    continue
-                else:
-                    return False
-        return True
+        return all_assigned or bool(ignore_failures)
 
     def _process_user_record(self, user_record_data, field_names):
         data = user_record_data["data"]
@@ -833,6 +937,410 @@ class CreateUser(BaseSalesforceApiTask, NGOrgConfig, ABC):
         else:
             log.error("User Failed to insert...skipping")
 
+    def _run_bulk_pipeline(self, user_records, field_names):
+        """
+        Creates or updates all user records from Bulk Mode as a batch. Lookups are resolved with IN queries, users are loaded with sObject Collections and profile images and permissions are then handled as follow-up stages.
+
+        Args:
+            user_records (list): The user record entries from the bulk yml file which should be processed
+            field_names (list): The list of field names for the User object in the target org
+        """
+
+        if not user_records:
+            log.info("No User Records to process")
+            return
+
+        log.info("Preparing %s User Records", len(user_records))
+
+        entries = []
+        for user_record_data in user_records:
+            data = _remove_missing_field_schema(
+                dict(user_record_data["data"]), field_names
+            )
+            entries.append(
+                {
+                    "data": self._apply_default_fields(data, field_names),
+                    "role": user_record_data.get("role"),
+                    "profile": user_record_data.get("profile"),
+                    "manager": user_record_data.get("manager_external_id"),
+                    "contact": user_record_data.get("contact_external_id"),
+                    "link_contact_record": user_record_data.get(
+                        "link_contact_record"
+                    ),
+                    "user_profile_image": user_record_data.get("user_profile_image"),
+                    "gender": user_record_data.get("gender"),
+                    "permission_set_license_api_names": user_record_data.get(
+                        "permission_set_license_api_names"
+                    ),
+                    "permission_set_api_names": user_record_data.get(
+                        "permission_set_api_names"
+                    ),
+                    "permission_set_group_api_names": user_record_data.get(
+                        "permission_set_group_api_names"
+                    ),
+                    "ignore_failures": bool(user_record_data.get("ignore_failures")),
+                    "user_id": None,
+                    "error": None,
+                }
+            )
+
+        log.info("Resolving Roles, Profiles, Managers and Contacts...")
+        self._resolve_bulk_lookups(entries)
+
+        # Users after the first failed lookup (without ignore_failures) are not loaded, the same as one user at a time
+        failed_entry = next(
+            (e for e in entries if e["error"] and not e["ignore_failures"]), None
+        )
+        if failed_entry:
+            entries = entries[: entries.index(failed_entry)]
+
+        for entry in entries:
+            if entry["error"]:
+                log.error(f"{entry['error']}. Skipping user...")
+        entries = [entry for entry in entries if not entry["error"]]
+
+        log.info("Loading User Records...")
+        self._load_bulk_data(entries)
+        self._resolve_bulk_managers(entries)
+
+        loaded_entries = [entry for entry in entries if entry["user_id"]]
+        log.info("%s of %s User Records loaded", len(loaded_entries), len(entries))
+
+        self._upload_bulk_profile_images(loaded_entries)
+        self._assign_bulk_permissions(loaded_entries)
+
+        if failed_entry:
+            raise Exception(failed_entry["error"])
+
+    def _resolve_bulk_lookups(self, entries):
+        """
+        Resolves Role, Profile, Manager and Contact Ids for all entries using IN queries and updates the data for each entry. When a Role or Profile cannot be found in the target org, the error is stored against the entry.
+        """
+
+        api = self.sf
+
+        roles = {}
+        for record in query_all_in(
+            api, "SELECT Id, Name FROM UserRole", "Name", [e["role"] for e in entries]
+        ):
+            roles.setdefault(record["Name"].lower(), record["Id"])
+
+        profiles = {}
+        for record in query_all_in(
+            api,
+            "SELECT Id, Name FROM Profile",
+            "Name",
+            [e["profile"] for e in entries if "ProfileId" not in e["data"]],
+        ):
+            profiles.setdefault(record["Name"].lower(), record["Id"])
+
+        managers = {}
+        for record in query_all_in(
+            api,
+            "SELECT Id, External_ID__c FROM User",
+            "External_ID__c",
+            [e["manager"] for e in entries],
+        ):
+            managers.setdefault(record["External_ID__c"].lower(), record["Id"])
+
+        contacts = {}
+        for record in query_all_in(
+            api,
+            "SELECT Id, External_ID__c FROM Contact",
+            "External_ID__c",
+            [e["contact"] for e in entries],
+        ):
+            contacts.setdefault(record["External_ID__c"].lower(), record["Id"])
+
+        named_contacts = {}
+        for record in query_all_in(
+            api,
+            "SELECT Id, FirstName, LastName FROM Contact",
+            "LastName",
+            [e["data"]["LastName"] for e in entries if e["link_contact_record"]],
+        ):
+            named_contacts.setdefault(
+                (
+                    str(record["FirstName"]).lower(),
+                    str(record["LastName"]).lower(),
+                ),
+                record["Id"],
+            )
+
+        for entry in entries:
+            data = entry["data"]
+
+            if entry["role"]:
+                role_id = roles.get(str(entry["role"]).lower())
+                if not role_id:
+                    entry["error"] = (
+                        "User Creation Failed to get Role ID for provided Role: "
+                        + str(entry["role"])
+                    )
+                    continue
+                data.update({"UserRoleId": role_id})
+
+            # A ProfileId given in the user definition is kept as is
+            if "ProfileId" not in data:
+                profile_id = profiles.get(str(entry["profile"]).lower())
+                if not profile_id:
+                    entry["error"] = (
+                        "User Creation Failed to get Profile ID for provided Profile: "
+                        + str(entry["profile"])
+                    )
+                    continue
+                data.update({"ProfileId": profile_id})
+
+            if entry["manager"]:
+                manager_id = managers.get(str(entry["manager"]).lower())
+                if manager_id:
+                    data.update({"ManagerId": manager_id})
+                else:
+                    log.debug(
+                        f"No User Record found for the manger external id provided. {entry['manager']}. Will retry once all users are loaded."
+                    )
+
+            if entry["contact"]:
+                contact_id = contacts.get(str(entry["contact"]).lower())
+                if contact_id:
+                    data.update({"ContactId": contact_id})
+                else:
+                    log.debug(
+                        f"No Contact Record found for the contact external id provided. {entry['contact']}"
+                    )
+
+            if entry["link_contact_record"]:
+                contact_id = named_contacts.get(
+                    (str(data["FirstName"]).lower(), str(data["LastName"]).lower())
+                )
+                if contact_id:
+                    data.update({"ContactId": contact_id})
+                    log.info(f"Linked Contact Record ID: {contact_id}")
+                else:
+                    log.debug(
+                        f"No Contact was found with Firstname {data['FirstName']} and Lastname {data['LastName']}. Make sure you are inserting any required contact data into the org before running this task."
+                    )
+
+    def _load_bulk_data(self, entries):
+        """
+        Loads all entries using sObject Collections. Entries with an upsert field value (and no Contact) are upserted, other entries are matched against existing active users and then updated or created. The resulting User Id is stored against each entry.
+        """
+
+        api = self.sf
+
+        upsert_entries = []
+        lookup_entries = []
+        for entry in entries:
+            if (
+                self.upsert_field in entry["data"].keys()
+                and "ContactId" not in entry["data"].keys()
+            ):
+                upsert_entries.append(entry)
+            else:
+                lookup_entries.append(entry)
+
+        if upsert_entries:
+            log.info("Upserting %s User Records...", len(upsert_entries))
+            results = run_sobject_collection(
+                api,
+                "PATCH",
+                [entry["data"] for entry in upsert_entries],
+                sobject="User",
+                external_id_field=self.upsert_field,
+            )
+            self._record_bulk_results(upsert_entries, results, "Upsert")
+
+        if not lookup_entries:
+            return
+
+        # Match existing active users by external id or by first and last name
+        existing_by_external_id = {}
+        external_ids = [
+            e["data"].get(self.upsert_field)
+            for e in lookup_entries
+            if e["data"].get(self.upsert_field)
+        ]
+        if external_ids:
+            for record in query_all_in(
+                api,
+                f"SELECT Id, {self.upsert_field} FROM User",
+                self.upsert_field,
+                external_ids,
+                where="IsActive = True",
+            ):
+                existing_by_external_id.setdefault(
+                    str(record[self.upsert_field]).lower(), record["Id"]
+                )
+
+        existing_by_name = {}
+        for record in query_all_in(
+            api,
+            "SELECT Id, FirstName, LastName FROM User",
+            "LastName",
+            [e["data"]["LastName"] for e in lookup_entries],
+            where="IsActive = True",
+        ):
+            existing_by_name.setdefault(
+                (str(record["FirstName"]).lower(), str(record["LastName"]).lower()),
+                record["Id"],
+            )
+
+        create_entries = []
+        update_entries = []
+        for entry in lookup_entries:
+            data = entry["data"]
+            user_id = existing_by_name.get(
+                (str(data["FirstName"]).lower(), str(data["LastName"]).lower())
+            )
+            if data.get(self.upsert_field):
+                user_id = (
+                    existing_by_external_id.get(str(data[self.upsert_field]).lower())
+                    or user_id
+                )
+            if user_id:
+                entry["user_id"] = user_id
+                update_entries.append(entry)
+            else:
+                create_entries.append(entry)
+
+        if update_entries:
+            log.info("Updating %s existing User Records...", len(update_entries))
+            results = run_sobject_collection(
+                api,
+                "PATCH",
+                [dict(entry["data"], Id=entry["user_id"]) for entry in update_entries],
+                sobject="User",
+            )
+            self._record_bulk_results(update_entries, results, "Update")
+
+        if create_entries:
+            log.info("Creating %s new User Records...", len(create_entries))
+            results = run_sobject_collection(
+                api, "POST", [entry["data"] for entry in create_entries], sobject="User"
+            )
+            self._record_bulk_results(create_entries, results, "Create")
+
+    def _record_bulk_results(self, entries, results, action):
+        """
+        Stores the User Id from each sObject Collection result against the related entry and logs any failures.
+        """
+
+        for entry, result in zip(entries, results):
+            name = f"{entry['data'].get('FirstName')} {entry['data'].get('LastName')}"
+            if result.get("success"):
+                entry["user_id"] = result.get("id")
+                log.info(f"{action} Completed for {name} with ID: {entry['user_id']}")
+            else:
+                entry["user_id"] = None
+                log.error(
+                    f"{action} Failed for {name}. Skipping user... Details: {result.get('errors')}"
+                )
+
+    def _resolve_bulk_managers(self, entries):
+        """
+        Sets the Manager for any entries where the manager could not be found before loading, which happens when the manager is created within the same file.
+        """
+
+        pending = [
+            entry
+            for entry in entries
+            if entry["user_id"]
+            and entry["manager"]
+            and "ManagerId" not in entry["data"].keys()
+        ]
+        if not pending:
+            return
+
+        managers = {}
+        for record in query_all_in(
+            self.sf,
+            "SELECT Id, External_ID__c FROM User",
+            "External_ID__c",
+            [entry["manager"] for entry in pending],
+        ):
+            managers.setdefault(record["External_ID__c"].lower(), record["Id"])
+
+        updates = []
+        for entry in pending:
+            manager_id = managers.get(str(entry["manager"]).lower())
+            if manager_id:
+                updates.append({"Id": entry["user_id"], "ManagerId": manager_id})
+            else:
+                log.debug(
+                    f"No User Record found for the manger external id provided. {entry['manager']}"
+                )
+
+        if updates:
+            log.info("Assigning Managers for %s User Records...", len(updates))
+            results = run_sobject_collection(self.sf, "PATCH", updates, sobject="User")
+            for update, result in zip(updates, results):
+                if not result.get("success"):
+                    log.error(
+                        f"Failed to assign Manager for User ID: {update['Id']}. Details: {result.get('errors')}"
+                    )
+
+    def _upload_bulk_profile_images(self, entries):
+        """
+        Uploads profile images for all loaded entries which have one defined, using a small pool of workers.
+        """
+
+        image_entries = [entry for entry in entries if entry["user_profile_image"]]
+        if not image_entries:
+            return
+
+        log.info("Adding User Profile Images for %s Users...", len(image_entries))
+
+        def _upload(entry):
+            try:
+                self._upload_user_profile_image(
+                    entry["user_id"],
+                    entry["user_profile_image"],
+                    str(entry["gender"]).lower() if entry["gender"] else None,
+                )
+            except Exception as e:
+                log.error(
+                    f"Failed to upload profile image for User ID: {entry['user_id']}. Details: {e}"
+                )
+
+        with ThreadPoolExecutor(max_workers=self.bulk_image_workers) as executor:
+            list(executor.map(_upload, image_entries))
+
+    def _assign_bulk_permissions(self, entries):
+        """
+        Assigns Permission Set Licenses, Permission Sets and Permission Set Groups for all loaded entries, one batch per permission type. Licenses are assigned to all users first to make sure namespace access is ok.
+        """
+
+        for mode, key, message_name in (
+            (
+                "PERMISSIONSETLICENSE",
+                "permission_set_license_api_names",
+                "Permission Set Licenses",
+            ),
+            ("PERMISSIONSET", "permission_set_api_names", "Permission Sets"),
+            (
+                "PERMISSIONSETGROUP",
+                "permission_set_group_api_names",
+                "Permission Set Groups",
+            ),
+        ):
+            permission_entries = [entry for entry in entries if entry[key]]
+            if not permission_entries:
+                continue
+
+            log.info("Assigning %s...", message_name)
+            for ignore_failures in (False, True):
+                batch_entries = [
+                    entry
+                    for entry in permission_entries
+                    if entry["ignore_failures"] == ignore_failures
+                ]
+                if batch_entries:
+                    self._assign_permissions_batch(
+                        mode,
+                        [(entry["user_id"], entry[key]) for entry in batch_entries],
+                        ignore_failures,
+                    )
+
     def _link_contact_record(self, submitted_dict):
         """
         Links the related Contact Record using Firstname and Lastname.
@@ -879,6 +1387,7 @@ class CreateUser(BaseSalesforceApiTask, NGOrgConfig, ABC):
 
                 with open(self.path, "r") as file:
                     user_data = yaml.load(file, Loader=yaml.FullLoader)
+                batch_user_records = []
                 for user in user_data["users"]:
                     user_record_data = user_data["users"][user]
                     self.logger.info(user_record_data)
@@ -901,11 +1410,17 @@ class CreateUser(BaseSalesforceApiTask, NGOrgConfig, ABC):
                             whenclauseskip = True
 
                     if whenclauseskip == False:
-                        self._process_user_record(user_record_data, field_names)
+                        if self.batch_mode:
+                            batch_user_records.append(user_record_data)
+                        else:
+                            self._process_user_record(user_record_data, field_names)
                     else:
                         self.logger.info(
                             f"User create skipped for not meeting when clause::{exp}"
                         )
+
+                if self.batch_mode:
+                    self._run_bulk_pipeline(batch_user_records, field_names)
             else:
                 log.info("SINGLE RECORD MODE ENABLED")
 
@@ -1032,6 +1547,31 @@ class QUpdateDependencies(UpdateDependencies, ABC):
                     return
 
         super()._install_dependency(dependency)
+        invalidate_org_config_predicates(self.org_config)
+
+
+class QDeploy(Deploy):
+    """
+    Adds Q Brix custom logic to the Deploy Task. The org_config predicate cache and object index are cleared once the deploy has finished, so later steps see the deployed metadata.
+    """
+
+    def _run_task(self):
+        try:
+            return super()._run_task()
+        finally:
+            invalidate_org_config_predicates(self.org_config)
+
+
+class QDeployBundles(DeployBundles):
+    """
+    Adds Q Brix custom logic to the Deploy Bundles Task (deploy_pre and deploy_post). The org_config predicate cache and object index are cleared once the bundles have been deployed.
+    """
+
+    def _run_task(self):
+        try:
+            return super()._run_task()
+        finally:
+            invalidate_org_config_predicates(self.org_config)
 
 
 class QbrixDeployer(BaseSalesforceApiTask, ABC):
@@ -1064,6 +1604,7 @@ class QbrixDeployer(BaseSalesforceApiTask, ABC):
             if "github" in value and self.qbrix_name in value["github"]:
                 if not QbrixInstallCheck(self.qbrix_name, self.org_config.name):
                     run_cci_flow(f"{name}:deploy_qbrix", self.org_config.name)
+                    invalidate_org_config_predicates(self.org_config)
             else:
                 print("Source name not found in Q Brix")
 
@@ -1094,26 +1635,47 @@ class PopulateRecentlyViewed(BaseSalesforceApiTask, ABC):
         self.unsupported_objects = ["User", "KnowledgeArticle"]
 
     def _run_task(self):
-        for obj in self.objects:
-            if obj not in self.unsupported_objects:
-                if str(obj).endswith("__c"):
-                    custom_tab_result = self.sf.query_all(
-                        f"SELECT SObjectName FROM TabDefinition WHERE IsCustom = true AND SObjectName = '{obj}'"
+        objects = [obj for obj in self.objects if obj not in self.unsupported_objects]
+
+        # Custom Objects need a Tab for Recently Viewed to be set
+        custom_objects = [obj for obj in objects if str(obj).endswith("__c")]
+        if custom_objects:
+            custom_tabs = {
+                str(tab["SObjectName"]).lower()
+                for tab in query_all_in(
+                    self.sf,
+                    "SELECT SObjectName FROM TabDefinition",
+                    "SObjectName",
+                    custom_objects,
+                    where="IsCustom = true",
+                )
+            }
+            for obj in custom_objects:
+                if obj.lower() not in custom_tabs:
+                    self.logger.info(
+                        f"{obj} does not have a Tab, so Recently Viewed cannot be automatically set. Skipping."
                     )
-                    if custom_tab_result.get("totalSize") == 0:
-                        self.logger.info(
-                            f"{obj} does not have a Tab, so Recently Viewed cannot be automatically set. Skipping."
-                        )
-                        continue
+                    objects.remove(obj)
 
-                query = f"SELECT Id FROM {obj} ORDER BY CreatedDate DESC LIMIT {self.limit} FOR VIEW"
-                try:
-                    self.sf.query_all(query)
-                    self.logger.info(f"Updated Recently Viewed List for {obj}")
-                except Exception as e:
-                    self.logger.error(
-                        f"Error updating Recently Viewed List for {obj}: {e}"
-                    )
+        if not objects:
+            return
+
+        subrequests = [
+            query_subrequest(
+                self.sf,
+                f"SELECT Id FROM {obj} ORDER BY CreatedDate DESC LIMIT {self.limit} FOR VIEW",
+            )
+            for obj in objects
+        ]
+        results = run_composite_batch(self.sf, subrequests)
+
+        for obj, result in zip(objects, results):
+            if 200 <= result.get("statusCode", 500) < 300:
+                self.logger.info(f"Updated Recently Viewed List for {obj}")
+            else:
+                self.logger.error(
+                    f"Error updating Recently Viewed List for {obj}: {result.get('result')}"
+                )
 
 
 class DownloadFiles(BaseSalesforceApiTask, ABC):
@@ -1131,8 +1693,15 @@ class DownloadFiles(BaseSalesforceApiTask, ABC):
             "description": "Relative path of a directory you want to download files to. Defaults to datasets/files",
             "required": False,
         },
+        "max_workers": {
+            "description": "Maximum number of files to download at the same time. Defaults to 4",
+            "required": False,
+        },
     }
 
+    # Download settings
+    chunk_size = 1024 * 1024
+
     def _init_options(self, kwargs):
         super(DownloadFiles, self)._init_options(kwargs)
         self.filenames = (
@@ -1143,6 +1712,10 @@ class DownloadFiles(BaseSalesforceApiTask, ABC):
             if "path" in self.options
             else os.path.join("datasets", "files")
         )
+        self.max_workers = (
+            int(self.options["max_workers"]) if "max_workers" in self.options else 4
+        )
+        self.session = None
 
     def format_filenames_soql(self, names):
         """
@@ -1174,7 +1747,7 @@ class DownloadFiles(BaseSalesforceApiTask, ABC):
 
         formatted_content_version_ids = self.format_filenames_soql(version_ids)
         content_versions_lookup = self.sf.query(
-            f"SELECT Id, VersionData, FileExtension, PathOnClient FROM ContentVersion WHERE Id IN ({formatted_content_version_ids})"
+            f"SELECT Id, VersionData, FileExtension, PathOnClient, Checksum, ContentSize FROM ContentVersion WHERE Id IN ({formatted_content_version_ids})"
         )
 
         if content_versions_lookup["totalSize"] > 0:
@@ -1182,25 +1755,87 @@ class DownloadFiles(BaseSalesforceApiTask, ABC):
 
         return None
 
-    def download_file(self, version_data, headers, file_name):
+    def _get_session(self):
+        """
+        Returns a pooled HTTP session shared by all download workers
+        """
+
+        if self.session is None:
+            self.session = new_http_session(pool_size=self.max_workers)
+        return self.session
+
+    def is_file_current(self, file_path, checksum):
         """
-        Download a single file asset to the specified directory
+        Checks if a local file matches the checksum (MD5) of the ContentVersion in the org
         """
 
+        if not checksum or not os.path.isfile(file_path):
+            return False
+
+        file_hash = hashlib.md5()
+        with open(file_path, "rb") as file:
+            for chunk in iter(lambda: file.read(self.chunk_size), b""):
+                file_hash.update(chunk)
+        return file_hash.hexdigest().lower() == str(checksum).lower()
+
+    def download_file(self, version_data, headers, file_name, checksum=None):
+        """
+        Download a single file asset to the specified directory. The file is streamed to disk and a partially downloaded file from an earlier run is resumed. Failed requests are retried by the HTTP session.
+
+        Returns:
+            bool: True if the file was downloaded or is already up to date
+        """
+
+        file_path = os.path.join(self.path, file_name)
+
+        if self.is_file_current(file_path, checksum):
+            self.logger.info(f'Skipping "{file_name}" as it is already up to date')
+            return True
+
         endpoint = self.org_config.instance_url + version_data
+        part_path = f"{file_path}.part"
+        session = self._get_session()
 
-        response = requests.get(endpoint, headers=headers, timeout=30)
-        if response.ok:
-            file_path = os.path.join(self.path, file_name)
-            with open(file_path, "wb") as file:
-                file.write(response.content)
-                file.flush()
-                os.fsync(file.fileno())
-                self.logger.info(f'Downloading "{file_name}" to "{self.path}"')
-        else:
+        request_headers = dict(headers)
+        downloaded = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if downloaded:
+            request_headers["Range"] = f"bytes={downloaded}-"
+
+        try:
+            with session.get(
+                endpoint, headers=request_headers, stream=True, timeout=(10, 60)
+            ) as response:
+                if response.status_code == 416:
+                    # Range no longer valid, start again
+                    os.remove(part_path)
+                    return self.download_file(version_data, headers, file_name, checksum)
+
+                if not response.ok:
+                    self.logger.error(
+                        f'Download failed: "{file_name}" - status code {response.status_code}\n{response.text}'
+                    )
+                    return False
+
+                mode = "ab" if response.status_code == 206 else "wb"
+                with open(part_path, mode) as file:
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        if chunk:
+                            file.write(chunk)
+
+        except requests.exceptions.RequestException as e:
             self.logger.error(
-                f'Download failed: "{file_name}" - status code {response.status_code}\n{response.text}'
+                f'Download interrupted: "{file_name}" - {e}. Run the task again to resume the download.'
             )
+            return False
+
+        if checksum and not self.is_file_current(part_path, checksum):
+            self.logger.error(f'Download failed: Checksum mismatch for "{file_name}"')
+            os.remove(part_path)
+            return False
+
+        os.replace(part_path, file_path)
+        self.logger.info(f'Downloaded "{file_name}" to "{self.path}"')
+        return True
 
     def download_files(self):
         """
@@ -1237,9 +1872,18 @@ class DownloadFiles(BaseSalesforceApiTask, ABC):
             "Authorization": f"Bearer {self.org_config.access_token}",
         }
 
-        for cv in content_versions:
+        def _download(cv):
             file_name = file_map[cv["Id"]] + "." + cv["FileExtension"]
-            self.download_file(cv["VersionData"], headers, file_name)
+            return self.download_file(
+                cv["VersionData"], headers, file_name, cv.get("Checksum")
+            )
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(_download, content_versions))
+
+        self.logger.info(
+            f"{results.count(True)} of {len(results)} file(s) available in {self.path}"
+        )
 
     def _run_task(self):
         if not self.filenames:
@@ -1276,6 +1920,14 @@ class UploadFiles(BaseSalesforceApiTask, ABC):
             "description": "Exclued the file extension from the title",
             "required": False,
         },
+        "batch_mode": {
+            "description": "Set to True to check for existing files with IN queries, upload new files concurrently as binary and create links with sObject Collections. Defaults to False",
+            "required": False,
+        },
+        "max_workers": {
+            "description": "Maximum number of files to upload at the same time in Batch Mode. Defaults to 4",
+            "required": False,
+        },
     }
 
     def _init_options(self, kwargs):
@@ -1290,6 +1942,39 @@ class UploadFiles(BaseSalesforceApiTask, ABC):
         else:
             self.exclude_extension = False
 
+        self.batch_mode = (
+            str(self.options["batch_mode"]).lower() in ("true", "1", "yes")
+            if "batch_mode" in self.options
+            else False
+        )
+        self.max_workers = (
+            int(self.options["max_workers"]) if "max_workers" in self.options else 4
+        )
+
+    def _describe(self, sobject=None):
+        """
+        Returns the describe for a given object (or the Global Describe) using the shared describe cache
+        """
+
+        return get_describe(
+            self.org_config.instance_url,
+            self.org_config.access_token,
+            self.org_config.org_id,
+            self.sf.sf_version,
+            sobject,
+        )
+
+    def _get_content_version_fields(self):
+        """
+        Returns the names of ContentVersion fields which can be set on create in the target org
+        """
+
+        return [
+            field["name"]
+            for field in self._describe("ContentVersion")["fields"]
+            if field.get("createable")
+        ]
+
     def create_document_link(self, content_doc_id, entity_id):
         """
         Creates a document link between a ContentDocument and a given Entity
@@ -1344,6 +2029,8 @@ class UploadFiles(BaseSalesforceApiTask, ABC):
                 self.logger.info(" -> Multiple Record Association Enabled")
                 multi_record = True
 
+        content_version_fields = self._get_content_version_fields()
+
         # Loop through each file in the directory
         for filename in os.listdir(self.path):
             # Check File Was not Already Uploaded
@@ -1378,8 +2065,9 @@ class UploadFiles(BaseSalesforceApiTask, ABC):
                     "Title": title,
                     "VersionData": base64_file_contents,
                     "PathOnClient": filename,
-                    "IsAssetEnabled": True,
                 }
+                if "IsAssetEnabled" in content_version_fields:
+                    content_version_data["IsAssetEnabled"] = True
 
                 content_version = self.sf.ContentVersion.create(content_version_data)
                 content_document_id = self.sf.query(
@@ -1424,6 +2112,192 @@ class UploadFiles(BaseSalesforceApiTask, ABC):
 
             self.logger.info(f" -> Upload Complete!")
 
+    def _upload_content_version(self, session, filename, content_version_fields):
+        """
+        Uploads a single file as a new ContentVersion using the multipart binary endpoint, which avoids base64 encoding the file into a JSON body.
+
+        Returns:
+            str: The new ContentVersion Id, or None if the upload failed
+        """
+
+        title = filename
+        if self.exclude_extension:
+            title = os.path.splitext(os.path.basename(filename))[0]
+
+        content_version_data = {"Title": title, "PathOnClient": filename}
+        if "IsAssetEnabled" in content_version_fields:
+            content_version_data["IsAssetEnabled"] = True
+
+        endpoint = f"{self.org_config.instance_url}/services/data/v{self.sf.sf_version}/sobjects/ContentVersion"
+        headers = {"Authorization": f"Bearer {self.org_config.access_token}"}
+
+        try:
+            with open(os.path.join(self.path, filename), "rb") as file:
+                response = session.post(
+                    endpoint,
+                    headers=headers,
+                    files={
+                        "entity_content": (
+                            None,
+                            json.dumps(content_version_data),
+                            "application/json",
+                        ),
+                        "VersionData": (filename, file, "application/octet-stream"),
+                    },
+                    timeout=(10, 300),
+                )
+        except (OSError, requests.exceptions.RequestException) as e:
+            self.logger.error(f" -> Upload failed for {filename}: {e}")
+            return None
+
+        if not response.ok:
+            self.logger.error(
+                f" -> Upload failed for {filename} - status code {response.status_code}\n{response.text}"
+            )
+            return None
+
+        self.logger.info(f" -> Uploaded {filename}")
+        return response.json().get("id")
+
+    def _get_library_id(self):
+        """
+        Returns the Id of the library (ContentWorkspace), creating the library if it does not exist
+        """
+
+        workspace_record = self.sf.query(
+            f"SELECT Id, RootContentFolderId FROM ContentWorkspace WHERE Name = '{self.library}' LIMIT 1"
+        )
+        if workspace_record["totalSize"] > 0:
+            return workspace_record["records"][0]["Id"]
+
+        self.logger.info(f" -> {self.library} was not found. Creating new Library")
+        workspace_record = self.sf.ContentWorkspace.create({"name": self.library})
+        if workspace_record and workspace_record["id"]:
+            return workspace_record["id"]
+        return None
+
+    def upload_files_to_salesforce_batch(self):
+        """
+        Uploads all files from the specified directory as a batch. Existing files are found with IN queries, new files are uploaded concurrently as binary and Document Links are created with sObject Collections.
+        """
+        self.logger.info("\nStarting File Upload (Batch Mode):")
+
+        filenames = sorted(
+            f for f in os.listdir(self.path) if os.path.isfile(os.path.join(self.path, f))
+        )
+        if not filenames:
+            self.logger.info(" -> No files found to upload")
+            return
+
+        # Locate the records and library which files should be linked to
+        entity_ids = []
+        if self.where:
+            record = self.sf.query_all(f"SELECT Id FROM {self.object} WHERE {self.where}")
+            if record["totalSize"] == 0:
+                self.logger.error(
+                    f"No record(s) found for {self.object} with the specified where clause '{self.where}'. Files will not be linked to records."
+                )
+            entity_ids.extend(r["Id"] for r in record["records"] if r["Id"])
+            self.logger.info(f" -> {len(entity_ids)} Record(s) Located")
+
+        if self.library:
+            library_id = self._get_library_id()
+            if library_id:
+                self.logger.info(f" -> Saving to Library called: {self.library}")
+                entity_ids.append(library_id)
+
+        # Check for files which were already uploaded
+        self.logger.info(f"\nChecking for {len(filenames)} existing file(s):")
+        existing_versions = {}
+        for field in ("PathOnClient", "Title"):
+            for cv in query_all_in(
+                self.sf,
+                "SELECT Id, ContentDocumentId, PathOnClient, Title FROM ContentVersion",
+                field,
+                filenames,
+                where="IsLatest = true",
+            ):
+                existing_versions.setdefault(str(cv[field]).lower(), cv)
+
+        uploaded_files = {}
+        new_files = []
+        for filename in filenames:
+            existing = existing_versions.get(filename.lower())
+            if existing:
+                uploaded_files[filename] = existing
+                self.logger.info(
+                    f" -> {filename} already uploaded. Document Id: {existing['ContentDocumentId']}"
+                )
+            else:
+                new_files.append(filename)
+
+        # Upload new files
+        if new_files:
+            self.logger.info(f"\nUploading {len(new_files)} file(s):")
+            content_version_fields = self._get_content_version_fields()
+            with new_http_session() as session:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    new_version_ids = list(
+                        executor.map(
+                            lambda f: self._upload_content_version(
+                                session, f, content_version_fields
+                            ),
+                            new_files,
+                        )
+                    )
+
+            new_versions = {
+                cv["Id"]: cv
+                for cv in query_all_in(
+                    self.sf,
+                    "SELECT Id, ContentDocumentId FROM ContentVersion",
+                    "Id",
+                    [v for v in new_version_ids if v],
+                )
+            }
+            for filename, version_id in zip(new_files, new_version_ids):
+                if version_id in new_versions:
+                    uploaded_files[filename] = new_versions[version_id]
+
+        # Create Required Relationships
+        content_document_ids = [cv["ContentDocumentId"] for cv in uploaded_files.values()]
+
+        if entity_ids and content_document_ids:
+            self.logger.info("\nChecking for creating Document Links")
+            existing_links = {
+                (link["ContentDocumentId"], link["LinkedEntityId"])
+                for link in query_all_in(
+                    self.sf,
+                    "SELECT ContentDocumentId, LinkedEntityId FROM ContentDocumentLink",
+                    "ContentDocumentId",
+                    content_document_ids,
+                )
+            }
+            new_links = [
+                {
+                    "ContentDocumentId": doc_id,
+                    "LinkedEntityId": entity_id,
+                    "Visibility": "AllUsers",
+                }
+                for doc_id in dict.fromkeys(content_document_ids)
+                for entity_id in entity_ids
+                if (doc_id, entity_id) not in existing_links
+            ]
+            if new_links:
+                results = run_sobject_collection(
+                    self.sf, "POST", new_links, sobject="ContentDocumentLink"
+                )
+                for link, result in zip(new_links, results):
+                    if not result.get("success"):
+                        self.logger.error(
+                            f" -> Failed to link {link['ContentDocumentId']} to {link['LinkedEntityId']}: {result.get('errors')}"
+                        )
+                self.logger.info(f" -> {len(new_links)} Document Link(s) processed")
+
+        self.logger.info(
+            f"\n -> Upload Complete! {len(uploaded_files)} of {len(filenames)} file(s) available in the org"
+        )
+
     def _run_task(self):
         if (self.object and not self.where) or (not self.object and self.where):
             self.logger.error(
@@ -1431,7 +2305,10 @@ class UploadFiles(BaseSalesforceApiTask, ABC):
             )
             return
 
-        self.upload_files_to_salesforce()
+        if self.batch_mode:
+            self.upload_files_to_salesforce_batch()
+        else:
+            self.upload_files_to_salesforce()
 
 
 class QRetrieveChanges(RetrieveChanges):
@@ -1476,6 +2353,10 @@ class QRetrieveChanges(RetrieveChanges):
 class CommunityPublisher(BaseSalesforceApiTask, ABC):
     task_docs = """
     Publishes a given community (Experience Cloud Site) or if no names are given, publishes all live communities
+
+    Set 'concurrent' to True to publish all target sites at the same time. The task then polls until the publish of every site is confirmed (or has failed) and reports the time taken for each site.
+
+    A publish is confirmed once the Network record for the site is Live and has been updated since the publish request and, when the site has a URL, the site is responding. Sites where this cannot be confirmed before the timeout are reported as UNVERIFIED when they are still responding. In concurrent mode, the task fails when a publish request is rejected, or a site is not responding at the timeout.
     """
 
     task_options = {
@@ -1484,8 +2365,22 @@ class CommunityPublisher(BaseSalesforceApiTask, ABC):
             "description": "List of Community Names to publish",
             "required": False,
         },
+        "concurrent": {
+            "description": "Set to True to publish all sites at the same time and wait until each site is live. Defaults to False",
+            "required": False,
+        },
+        "publish_timeout": {
+            "description": "Maximum number of seconds to wait for all sites to publish when running concurrently. Defaults to 900",
+            "required": False,
+        },
     }
 
+    # Publish status polling settings
+    poll_initial_delay = 5
+    poll_max_delay = 60
+    publish_settle_seconds = 30
+    publish_max_workers = 8
+
     def _init_options(self, kwargs):
         super(CommunityPublisher, self)._init_options(kwargs)
         self.community_names = (
@@ -1493,9 +2388,20 @@ class CommunityPublisher(BaseSalesforceApiTask, ABC):
             if "community_names" in self.options
             else None
         )
+        self.concurrent = (
+            str(self.options["concurrent"]).lower() in ("true", "1", "yes")
+            if "concurrent" in self.options
+            else False
+        )
+        self.publish_timeout = (
+            int(self.options["publish_timeout"])
+            if "publish_timeout" in self.options
+            else 900
+        )
         self.live_community_list = []
+        self.community_details = {}
 
-    def _get_live_community_list(self):
+    def _load_community_details(self):
         api = self.sf
         community_response = api.restful("connect/communities/", method="GET")
 
@@ -1504,11 +2410,21 @@ class CommunityPublisher(BaseSalesforceApiTask, ABC):
             if total_communities and total_communities > 0:
                 community_response_records = community_response.get("communities")
                 for community in community_response_records:
-                    if community.get("status") == "Live":
-                        if community.get("name"):
-                            self.live_community_list.append(community.get("name"))
+                    if community.get("name"):
+                        self.community_details[community.get("name")] = community
+
+    def _get_live_community_list(self):
+        self._load_community_details()
+        for name, community in self.community_details.items():
+            if community.get("status") == "Live":
+                self.live_community_list.append(name)
 
     def _publish_community(self, community_name):
+        """
+        Returns:
+            bool: True if the publish request was accepted
+        """
+
         if community_name:
             try:
                 run_cci_task(
@@ -1516,11 +2432,181 @@ class CommunityPublisher(BaseSalesforceApiTask, ABC):
                     org_name=self.org_config.name,
                     name=community_name,
                 )
+                return True
             except Exception as e:
                 self.logger.info(
                     f" -> Failed to publish community with name: {community_name}"
                 )
                 self.logger.info(e)
+        return False
+
+    def _request_publish(self, community_name):
+        """
+        Sends the publish request for a single site
+
+        Returns:
+            bool: True if the publish request was accepted
+        """
+
+        community = self.community_details.get(community_name)
+        if not community or not community.get("id"):
+            self.logger.error(f" -> {community_name} | NOT FOUND")
+            return False
+
+        try:
+            self.sf.restful(
+                f"connect/communities/{community['id']}/publish", method="POST"
+            )
+            self.logger.info(f" -> {community_name} | PUBLISH REQUESTED")
+            return True
+        except Exception as e:
+            self.logger.error(f" -> {community_name} | PUBLISH FAILED | {e}")
+            return False
+
+    def _get_published_sites(self, community_names, since):
+        """
+        Finds the sites whose Network record is Live and has been updated since the given time
+
+        Args:
+            community_names (list): Names of the sites to check
+            since (float): Time (epoch seconds) the publish requests were sent
+
+        Returns:
+            set: Names of the published sites
+        """
+
+        since_date = datetime.fromtimestamp(since - 60, timezone.utc)
+        formatted_names = ",".join(
+            "'{}'".format(name.replace("'", "\\'")) for name in community_names
+        )
+        try:
+            records = self.sf.query_all(
+                f"SELECT Name, Status, LastModifiedDate FROM Network WHERE Name IN ({formatted_names})"
+            ).get("records", [])
+        except Exception as e:
+            self.logger.debug(f"Unable to read Network status::{e}")
+            return set()
+
+        published = set()
+        for record in records:
+            if record.get("Status") != "Live" or not record.get("LastModifiedDate"):
+                continue
+            modified = datetime.strptime(
+                record["LastModifiedDate"], "%Y-%m-%dT%H:%M:%S.%f%z"
+            )
+            if modified >= since_date:
+                published.add(record.get("Name"))
+        return published
+
+    def _is_site_live(self, session, community_name):
+        """
+        Checks whether a site is responding on its public URL
+
+        Returns:
+            bool: True if responding, False if not, or None when the site has no URL and cannot be checked
+        """
+
+        site_url = self.community_details.get(community_name, {}).get("siteUrl")
+        if not site_url:
+            return None
+
+        try:
+            response = session.get(site_url, timeout=(10, 30), allow_redirects=True)
+            return response.status_code < 400
+        except requests.exceptions.RequestException:
+            return False
+
+    def _publish_concurrently(self):
+        """
+        Publishes all target sites at the same time, then polls them together with backoff until every site is live, has failed or the timeout is reached.
+        """
+
+        if not self.community_details:
+            self._load_community_details()
+
+        start_time = time.time()
+        with ThreadPoolExecutor(
+            max_workers=min(len(self.live_community_list), self.publish_max_workers)
+        ) as executor:
+            accepted = list(executor.map(self._request_publish, self.live_community_list))
+
+        site_status = {}
+        for community, ok in zip(self.live_community_list, accepted):
+            site_status[community] = {
+                "status": "PUBLISHING" if ok else "FAILED",
+                "duration": time.time() - start_time,
+            }
+
+        delay = self.poll_initial_delay
+        with new_http_session() as session:
+            while True:
+                pending = [
+                    name
+                    for name, status in site_status.items()
+                    if status["status"] == "PUBLISHING"
+                ]
+                if not pending:
+                    break
+
+                elapsed = time.time() - start_time
+                if elapsed > self.publish_timeout:
+                    # The publish was not confirmed in time. Report sites which still respond as unverified, rather than live
+                    for name in pending:
+                        is_live = self._is_site_live(session, name)
+                        site_status[name]["status"] = (
+                            "UNVERIFIED" if is_live is not False else "TIMED OUT"
+                        )
+                        site_status[name]["duration"] = elapsed
+                    break
+
+                sleep(delay)
+                delay = min(delay * 2, self.poll_max_delay)
+
+                if time.time() - start_time < self.publish_settle_seconds:
+                    continue
+
+                published = self._get_published_sites(pending, start_time)
+                confirmed = [name for name in pending if name in published]
+                if not confirmed:
+                    continue
+
+                with ThreadPoolExecutor(
+                    max_workers=min(len(confirmed), self.publish_max_workers)
+                ) as executor:
+                    live_results = list(
+                        executor.map(
+                            lambda name: self._is_site_live(session, name), confirmed
+                        )
+                    )
+
+                for name, is_live in zip(confirmed, live_results):
+                    if is_live is None:
+                        # Published, but there is no URL to check the site is serving it
+                        site_status[name]["status"] = "UNVERIFIED"
+                        site_status[name]["duration"] = time.time() - start_time
+                    elif is_live:
+                        site_status[name]["status"] = "LIVE"
+                        site_status[name]["duration"] = time.time() - start_time
+
+        self.logger.info("\nPublish Summary:")
+        for name, status in site_status.items():
+            self.logger.info(
+                f" -> {name} | {status['status']} | {status['duration']:.0f}s"
+            )
+
+        unverified = [
+            name for name, status in site_status.items() if status["status"] == "UNVERIFIED"
+        ]
+        if unverified:
+            self.logger.warning(
+                f" -> Unable to confirm the publish completed for: {', '.join(unverified)}"
+            )
+
+        return [
+            name
+            for name, status in site_status.items()
+            if status["status"] in ("FAILED", "TIMED OUT")
+        ]
 
     def _run_task(self):
         self.logger.info("\nStarting Community Publisher")
@@ -1531,7 +2617,16 @@ class CommunityPublisher(BaseSalesforceApiTask, ABC):
             self.logger.info(" -> Reading Communities...")
             self.live_community_list = self.community_names
 
-        if len(self.live_community_list) > 0:
+        if len(self.live_community_list) > 0 and self.concurrent:
+            self.logger.info(
+                f" -> Publishing {len(self.live_community_list)} Communities concurrently..."
+            )
+            failed = self._publish_concurrently()
+            if failed:
+                raise Exception(
+                    f"Communities failed to publish: {', '.join(failed)}"
+                )
+        elif len(self.live_community_list) > 0:
             for community in self.live_community_list:
                 self.logger.info(f" -> Publishing {community}...")
                 self._publish_community(community)
@@ -1643,6 +2738,10 @@ class UserActionRunner(BaseSalesforceApiTask, ABC):
             "description": "A list of Profile names to use when selecting users",
             "required": False,
         },
+        "max_workers": {
+            "description": "Maximum number of concurrent requests used for user updates and password resets. Defaults to 4",
+            "required": False,
+        },
     }
 
     def _init_options(self, kwargs):
@@ -1663,6 +2762,9 @@ class UserActionRunner(BaseSalesforceApiTask, ABC):
             if "reset_user_passwords" in self.options
             else True
         )
+        self.max_workers = (
+            int(self.options["max_workers"]) if "max_workers" in self.options else 4
+        )
 
     def _set_user_password(self, user_id):
         headers = {"Content-Type": "application/json; charset=utf-8"}
@@ -1682,9 +2784,14 @@ class UserActionRunner(BaseSalesforceApiTask, ABC):
                 self.logger.info(f"Reset Password for User ID: {user_id}")
                 return
 
-            if e.content and e.content[0].get("errorCode"):
+            content = getattr(e, "content", None)
+            if not content or not isinstance(content, list):
+                self.logger.error(
+                    f" -> Unable to set password for User ID: {user_id} | {e}"
+                )
+            elif content[0].get("errorCode"):
                 self.logger.error(
-                    f" -> Unable to set password for User ID: {user_id} | {e.content[0].get('errorCode')} | {e.content[0].get('message')}"
+                    f" -> Unable to set password for User ID: {user_id} | {content[0].get('errorCode')} | {content[0].get('message')}"
                 )
 
             return
@@ -1735,18 +2842,31 @@ class UserActionRunner(BaseSalesforceApiTask, ABC):
         return updated_user_set
 
     def _run_composite_request(self, records):
-        self.logger.info(" -> Starting request to update User records")
-        res = self.sf.restful(
-            method="PATCH", path="composite/sobjects", json=dict(records=records)
-        )
-        if res:
-            for r in res:
-                if r.get("success") == True:
-                    self.logger.info(f"User ID: {r.get('id')} | UPDATED")
-                else:
-                    self.logger.info(f"User ID: {r.get('id')} | FAILED")
-                    for e in r.get("errors"):
-                        self.logger.info(e)
+        self.logger.info(
+            f" -> Starting request to update {len(records)} User records"
+        )
+        results = run_sobject_collection(
+            self.sf, "PATCH", records, max_workers=self.max_workers
+        )
+
+        updated_count = 0
+        for record, r in zip(records, results):
+            if r.get("success") == True:
+                updated_count += 1
+                self.logger.info(f"User ID: {r.get('id')} | UPDATED")
+            else:
+                self.logger.info(f"User ID: {record.get('id')} | FAILED")
+                for e in r.get("errors") or []:
+                    self.logger.info(e)
+
+        self.logger.info(
+            f" -> {updated_count} of {len(records)} User records updated"
+        )
+
+    def _set_user_passwords(self, user_ids):
+        self.logger.info(f" -> Resetting passwords for {len(user_ids)} Users")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(self._set_user_password, user_ids))
 
     def _run_task(self):
         self.logger.info("\nRunning User Action Runner")
@@ -1808,8 +2928,8 @@ class UserActionRunner(BaseSalesforceApiTask, ABC):
                 }
             )
 
-            if self.reset_user_passwords:
-                self._set_user_password(user_id)
+        if self.reset_user_passwords:
+            self._set_user_passwords([user.get("id") for user in upload_list])
 
         self._run_composite_request(upload_list)
 
@@ -9,6 +9,7 @@ from cumulusci.tasks.salesforce import BaseSalesforceApiTask
 from cumulusci.tasks.sfdx import SFDXOrgTask
 
 from qbrix.salesforce.qbrix_salesforce_tasks import salesforce_query
+from qbrix.tools.shared.qbrix_composite_tasks import query_all_in, run_composite
 from qbrix.tools.shared.qbrix_console_utils import init_logger
 
 log = init_logger()
@@ -44,6 +45,10 @@ class UpsertFavorite(BaseSalesforceApiTask, ABC):
         "objectType": {
             "description": "If Record or ObjectHome is used at Type, a ObjectType must also be defined",
             "required": False
+        },
+        "favorites": {
+            "description": "List of favorites to upsert in one run. Each entry supports the keys name, sortOrder, targetType and objectType. When set, the single favorite options are ignored.",
+            "required": False
         }
     }
 
@@ -53,6 +58,7 @@ class UpsertFavorite(BaseSalesforceApiTask, ABC):
         self.sortOrder = self.options["sortOrder"] if "sortOrder" in self.options else 1
         self.targetType = self.options["targetType"] if "targetType" in self.options else None
         self.objectType = self.options["objectType"] if "objectType" in self.options else None
+        self.favorites = list(self.options["favorites"]) if "favorites" in self.options else None
 
     def _get_favs(self):
         api = self.sf
@@ -63,103 +69,143 @@ class UpsertFavorite(BaseSalesforceApiTask, ABC):
                 return current_favs
         return None
 
-    def _get_id(self, name, targetType, objectType=None):
-        api = self.sf
-
-        table_name = targetType
-
+    def _get_table_name(self, targetType, objectType=None):
         if targetType.lower() == 'record' or targetType.lower() == 'objecthome':
-            table_name = objectType
+            return objectType
 
         if targetType.lower() == 'tab':
-            table_name = "TabDefinition"
+            return "TabDefinition"
 
-        response = api.query(f"SELECT Id FROM {table_name} WHERE Name = '{name}' LIMIT 1")
+        return targetType
 
-        if response["totalSize"] == 0:
-            log.error("No Record was found in the target org. Make sure it has been deployed.")
-            return None
-        else:
-            return response["records"][0]["Id"]
+    def _is_match(self, fav, favorite):
+        """Checks if an existing favorite matches the requested favorite"""
 
-    def _create_fav(self, name, sortOrder, targetType, objectType=None):
-        api = self.sf
-        try:
-            id = self._get_id(name, targetType, objectType)
-            if id:
-                api.restful(
-                    UI_FAV_PATH,
-                    data=json.dumps({
-                        "name": name,
-                        "sortOrder": sortOrder,
-                        "target": id,
-                        "targetType": targetType
-                    }),
-                    method="POST",
-                )
-                return True
-            else:
-                raise Exception("Unable to find target for Favorite within target org.")
-        except Exception as e:
-            log.error(f"Creation Failed: Message details: {e}")
+        if fav['name'] != favorite['name'] or fav['targetType'] != favorite['targetType']:
             return False
 
-    def _update_fav(self, name, sortOrder, fav_id):
-        api = self.sf
+        # Check for object based match
+        if favorite['targetType'].lower() == 'record' or favorite['targetType'].lower() == 'objecthome':
+            return fav.get('objectType') == favorite.get('objectType')
+
+        return favorite['targetType'].lower() == 'listview' or favorite['targetType'].lower() == 'tab'
+
+    def _resolve_targets(self, favorites):
+        """Resolves the target Ids for the given favorites, using one IN query per object. Names are matched case-insensitively, as they are in SOQL."""
+
+        names_by_table = {}
+        for favorite in favorites:
+            table_name = self._get_table_name(favorite['targetType'], favorite.get('objectType'))
+            names_by_table.setdefault(table_name, []).append(favorite['name'])
+
+        targets = {}
+        for table_name, names in names_by_table.items():
+            try:
+                for record in query_all_in(self.sf, f"SELECT Id, Name FROM {table_name}", "Name", names):
+                    targets.setdefault((table_name.lower(), record["Name"].lower()), record["Id"])
+            except Exception as e:
+                log.error(f"Unable to look up {table_name} records. Message details: {e}")
+
+        return {
+            id(favorite): targets.get((str(self._get_table_name(favorite['targetType'], favorite.get('objectType'))).lower(), str(favorite['name']).lower()))
+            for favorite in favorites
+        }
+
+    def _send_favorite(self, subrequest, path):
+        """Sends a single favorite subrequest with the REST API. Returns the error message, or None when successful."""
+
         try:
-            if fav_id:
-                api.restful(
-                    f"{UI_FAV_PATH}/{fav_id}",
-                    data=json.dumps({
-                        "name": name,
-                        "sortOrder": sortOrder
-                    }),
-                    method="PATCH",
-                )
-                return True
-            else:
-                raise Exception("Unable to find target for Favorite within target org.")
+            self.sf.restful(path, data=json.dumps(subrequest["body"]), method=subrequest["method"])
+            return None
         except Exception as e:
-            log.error(f"Update Failed: Message details: {e}")
-            return False
+            return str(e)
 
     def _run_task(self):
-        log.info(f"Checking {self.name}")
-        current_favorites_list = self._get_favs()
-        if current_favorites_list:
-            if current_favorites_list:
-                result = "INSERT"
-                fav_id = None
-
-                for fav in list(current_favorites_list):
-                    # Check for object based match
-                    if self.targetType.lower() == 'record' or self.targetType.lower() == 'objecthome':
-                        if fav['name'] == self.name and fav['targetType'] == self.targetType and fav['objectType'] == self.objectType:
-                            if fav['sortOrder'] == self.sortOrder:
-                                log.info(f"{self.name} is already in the favorite list. Skipping.")
-                                result = None
-                                break
-                            else:
-                                result = "UPDATE"
-                                fav_id = fav['id']
-                                break
-
-                    # Check for non-sObject based Match
-                    if self.targetType.lower() == 'listview' or self.targetType.lower() == 'tab':
-                        if fav['name'] == self.name and fav['targetType'] == self.targetType:
-                            if fav['sortOrder'] == self.sortOrder:
-                                log.info(f"{self.name} is already in the favorite list. Skipping.")
-                                result = None
-                                break
-                            else:
-                                result = "UPDATE"
-                                fav_id = fav['id']
-                                break
-
-                if result == "UPDATE":
-                    if self._update_fav(self.name, self.sortOrder, fav_id):
-                        log.info(f"{self.name} has been updated in the favorite list")
-
-                if result == "INSERT":
-                    if self._create_fav(self.name, self.sortOrder, self.targetType, self.objectType):
-                        log.info(f"{self.name} has been created in the favorite list")
+        if self.favorites:
+            favorites = [
+                {
+                    "name": f.get("name"),
+                    "sortOrder": f.get("sortOrder", 1),
+                    "targetType": f.get("targetType"),
+                    "objectType": f.get("objectType"),
+                }
+                for f in self.favorites
+            ]
+        else:
+            favorites = [{
+                "name": self.name,
+                "sortOrder": self.sortOrder,
+                "targetType": self.targetType,
+                "objectType": self.objectType,
+            }]
+
+        current_favorites_list = self._get_favs() or []
+
+        inserts = []
+        updates = []
+        for favorite in favorites:
+            log.info(f"Checking {favorite['name']}")
+            match = next((fav for fav in current_favorites_list if self._is_match(fav, favorite)), None)
+
+            if match is None:
+                inserts.append(favorite)
+            elif match['sortOrder'] == favorite['sortOrder']:
+                log.info(f"{favorite['name']} is already in the favorite list. Skipping.")
+            else:
+                updates.append((favorite, match['id']))
+
+        if not inserts and not updates:
+            return
+
+        fav_url = f"/services/data/v{self.sf.sf_version}/{UI_FAV_PATH}"
+        subrequests = []
+        names = []
+
+        for favorite, fav_id in updates:
+            names.append((favorite['name'], "updated", f"{UI_FAV_PATH}/{fav_id}"))
+            subrequests.append({
+                "method": "PATCH",
+                "url": f"{fav_url}/{fav_id}",
+                "referenceId": f"update{len(subrequests)}",
+                "body": {"name": favorite['name'], "sortOrder": favorite['sortOrder']},
+            })
+
+        targets = self._resolve_targets(inserts) if inserts else {}
+        for favorite in inserts:
+            target_id = targets.get(id(favorite))
+            if not target_id:
+                log.error(f"Creation Failed: Unable to find target for Favorite {favorite['name']} within target org. Make sure it has been deployed.")
+                continue
+            names.append((favorite['name'], "created", UI_FAV_PATH))
+            subrequests.append({
+                "method": "POST",
+                "url": fav_url,
+                "referenceId": f"create{len(subrequests)}",
+                "body": {
+                    "name": favorite['name'],
+                    "sortOrder": favorite['sortOrder'],
+                    "target": target_id,
+                    "targetType": favorite['targetType'],
+                },
+            })
+
+        if not subrequests:
+            return
+
+        results = run_composite(self.sf, subrequests)
+        for (name, action, path), subrequest, result in zip(names, subrequests, results):
+            status_code = result.get("httpStatusCode", 500)
+            if 200 <= status_code < 300:
+                log.info(f"{name} has been {action} in the favorite list")
+                continue
+
+            error = result.get('body')
+            if 400 <= status_code < 500:
+                # Retry on its own, in case the org does not accept the UI API within a composite request
+                error = self._send_favorite(subrequest, path)
+                if error is None:
+                    log.info(f"{name} has been {action} in the favorite list")
+                    continue
+
+            log.error(f"Favorite {name} could not be {action}. Message details: {error}")
+
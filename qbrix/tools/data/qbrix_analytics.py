@@ -15,13 +15,13 @@ from datetime import date, datetime, timedelta
 from pathlib import Path
 from time import sleep
 
-import requests
 from cumulusci.tasks.salesforce.BaseSalesforceApiTask import \
     BaseSalesforceApiTask
 from cumulusci.core.tasks import BaseTask
 from dateutil.parser import parse
 
 from qbrix.tools.shared.qbrix_console_utils import init_logger
+from qbrix.tools.shared.qbrix_http import http_request
 from qbrix.tools.shared.qbrix_project_tasks import replace_file_text
 
 log = init_logger()
@@ -1202,7 +1202,7 @@ class AnalyticsManager(BaseSalesforceApiTask, ABC):
                 query_params = {"query": paged_query}
 
                 # Make a POST request to the Wave query endpoint with the modified query
-                response = requests.post(query_url, headers=headers, data=json.dumps(query_params), timeout=90)
+                response = http_request("POST", query_url, headers=headers, data=json.dumps(query_params), timeout=90)
                 data = json.loads(response.content.decode('utf-8'))
 
                 if 'results' in data:
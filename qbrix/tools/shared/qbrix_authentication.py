@@ -6,6 +6,8 @@ import time
 import json
 import requests
 
+from qbrix.tools.shared.qbrix_http import http_request
+
 def qbrix_services_endpoint():
     return "https://qbrix-runtime-service-8c3413c48d7f.herokuapp.com"
 
@@ -54,7 +56,7 @@ def get_secure_setting(secure_setting: str = None):
     url = f"{endpoint}/QBrixQLabs?settingId={secure_setting}"
 
     try:
-        response = requests.get(url)
+        response = http_request("GET", url)
         response.raise_for_status()  # Raise an exception for bad responses (4xx, 5xx)
         json_data = response.json()
 
@@ -1,23 +1,113 @@
+import glob
 import os
 import shutil
+import threading
 
 from cumulusci.cli.runtime import CliRuntime
-from cumulusci.core.exceptions import TaskOptionsError
+from cumulusci.core.exceptions import OrgNotFound, TaskOptionsError
 from cumulusci.core.tasks import CURRENT_TASK
 from cumulusci.core.utils import import_global
 
 from qbrix.tools.shared.qbrix_console_utils import init_logger
 
+_runtime_cache = {"runtime": None, "fingerprint": None}
+_runtime_lock = threading.Lock()
+
+
+def _runtime_fingerprint() -> tuple:
+    """
+    Returns the path, modified time and size of each YAML file which makes up the CCI project config: the project's cumulusci.yml, the global cumulusci.yml and the cumulusci.yml of each cached source project.
+    """
+
+    paths = [
+        os.path.abspath("cumulusci.yml"),
+        os.path.join(os.path.expanduser("~"), ".cumulusci", "cumulusci.yml"),
+    ]
+    paths.extend(
+        sorted(
+            glob.glob(os.path.abspath(os.path.join(".cci", "projects", "*", "*", "cumulusci.yml")))
+        )
+    )
+
+    fingerprint = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            fingerprint.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            fingerprint.append((path, None, None))
+
+    return tuple(fingerprint)
+
+
+def get_cli_runtime(refresh: bool = False) -> CliRuntime:
+    """
+    Returns a CliRuntime which is shared across the process. The runtime is only loaded again when one of the project's cumulusci.yml files has changed.
+
+    Args:
+        refresh (bool): (Optional) Load the runtime again even if nothing has changed. Defaults to False
+
+    Returns:
+        CliRuntime: The shared runtime
+    """
+
+    fingerprint = _runtime_fingerprint()
+
+    with _runtime_lock:
+        if (
+            refresh
+            or _runtime_cache["runtime"] is None
+            or _runtime_cache["fingerprint"] != fingerprint
+        ):
+            _runtime_cache["runtime"] = CliRuntime()
+            # Loading the runtime may fetch sources, so take the fingerprint again
+            _runtime_cache["fingerprint"] = _runtime_fingerprint()
+
+        return _runtime_cache["runtime"]
+
+
+def _get_org(org_name: str):
+    """
+    Returns the org config for an alias from the shared runtime. The runtime is reloaded once when the org is not found, in case it was imported after the runtime was loaded.
+    """
+
+    try:
+        return get_cli_runtime().project_config.keychain.get_org(org_name)
+    except OrgNotFound:
+        return get_cli_runtime(refresh=True).project_config.keychain.get_org(org_name)
+
+
+def _list_cached_sources(cci_project_cache_directory: str) -> set:
+    """
+    Returns the absolute paths of the cached source checkouts. CCI stores each source as <repo name>/<commit sha>, so an entry is only ever reused for the exact commit it holds.
+    """
+
+    entries = set()
+    if not os.path.isdir(cci_project_cache_directory):
+        return entries
+
+    for repo in os.listdir(cci_project_cache_directory):
+        repo_path = os.path.join(cci_project_cache_directory, repo)
+        if not os.path.isdir(repo_path):
+            continue
+        for commit in os.listdir(repo_path):
+            commit_path = os.path.join(repo_path, commit)
+            if os.path.isdir(commit_path):
+                entries.add(os.path.abspath(commit_path))
+
+    return entries
+
 
 def rebuild_cci_cache(
-    cci_project_cache_directory: str = None, rebuild_flow: str = None
+    cci_project_cache_directory: str = None, rebuild_flow: str = None, full: bool = False
 ) -> bool:
     """
-    Rebuilds the CCI projects Cache folder using the dev_org flow from CCI
+    Brings the CCI projects Cache folder up to date using the given flow from CCI. Sources are resolved to their commit SHA and only sources whose commit has changed are downloaded. Cached commits which are no longer used are removed.
 
     Args:
         cci_project_cache_directory (str): Relative File Path to the CCI Projects Directory
         rebuild_flow (str): (Optional) Name of the flow from the Q Brix to use to get all relevant sources. Defaults to deploy_qbrix
+        full (bool): (Optional) Remove the whole cache and download every source again. Defaults to False
 
     Returns:
         bool: True when complete
@@ -27,17 +117,48 @@ def rebuild_cci_cache(
     if not cci_project_cache_directory:
         cci_project_cache_directory = os.path.normpath(".cci/projects")
 
-    # Cleanup Current Directory
-    if os.path.exists(cci_project_cache_directory):
+    if full and os.path.exists(cci_project_cache_directory):
         shutil.rmtree(cci_project_cache_directory)
 
+    # Remove incomplete downloads so that CCI fetches them again
+    for entry in _list_cached_sources(cci_project_cache_directory):
+        if not os.path.isfile(os.path.join(entry, "cumulusci.yml")):
+            shutil.rmtree(entry, ignore_errors=True)
+
+    cached_before = _list_cached_sources(cci_project_cache_directory)
+
     # Get deploy_qbrix flow to rebuild cache
     if not rebuild_flow:
         rebuild_flow = "deploy_qbrix"
 
     logger.info("Rebuilding Cache using flow called [%s]...", rebuild_flow)
-    CliRuntime().get_flow(rebuild_flow)
-    logger.info("Cache Rebuilt!")
+    runtime = get_cli_runtime(refresh=True)
+    runtime.get_flow(rebuild_flow)
+
+    in_use = {
+        os.path.abspath(source_config.repo_root)
+        for source_config in runtime.project_config.included_sources.values()
+        if getattr(source_config, "repo_root", None)
+    }
+    cached_after = _list_cached_sources(cci_project_cache_directory)
+
+    # Remove commits which are no longer referenced by any source
+    removed = 0
+    if in_use:
+        for entry in cached_after - in_use:
+            shutil.rmtree(entry, ignore_errors=True)
+            removed += 1
+        for repo in os.listdir(cci_project_cache_directory):
+            repo_path = os.path.join(cci_project_cache_directory, repo)
+            if os.path.isdir(repo_path) and not os.listdir(repo_path):
+                os.rmdir(repo_path)
+
+    logger.info(
+        "Cache Rebuilt! %i source(s) reused, %i downloaded, %i removed",
+        len(in_use & cached_before),
+        len(in_use - cached_before),
+        removed,
+    )
     # Return True to confirm completion
     return True
 
@@ -60,8 +181,8 @@ def _parse_task_options(options, task_class, task_config):
     Task Option Parser
     """
 
-    if "options" not in task_config.config:
-        task_config.config["options"] = {}
+    # TaskConfig only makes a shallow copy of the project config, so copy the options before overriding them
+    task_config.config["options"] = dict(task_config.config.get("options") or {})
     # Parse options and add to task config
     if options:
         for name, value in options.items():
@@ -116,14 +237,14 @@ def run_cci_task(task_name: str, org_name: str = None, **options) -> bool:
         ):
             _project_config = CURRENT_TASK.stack[0].project_config
         else:
-            _project_config = CliRuntime().project_config
+            _project_config = get_cli_runtime().project_config
 
         if getattr(CURRENT_TASK, "stack", None) and CURRENT_TASK.stack[0].org_config:
             _org = CURRENT_TASK.stack[0].org_config
         else:
-            _org = CliRuntime().project_config.keychain.get_org(org_name)
+            _org = _get_org(org_name)
 
-        task_config = CliRuntime().project_config.get_task(task_name)
+        task_config = get_cli_runtime().project_config.get_task(task_name)
         task_class = import_global(task_config.class_path)
         task_config = _parse_task_options(options, task_class, task_config)
         task = task_class(
@@ -165,14 +286,14 @@ def run_cci_flow(flow_name: str, org_name: str = None, **options) -> bool:
 
     logger.info("Starting flow [%s] against target org [%s]", flow_name, org_name)
 
-    org_config = CliRuntime().project_config.keychain.get_org(org_name)
+    org_config = _get_org(org_name)
 
     if not org_config:
         raise ValueError(
             f"Unable to get target Salesforce org configuration for provided alias [{org_name}]"
         )
 
-    flow_coordinator = CliRuntime().get_flow(flow_name, options=options)
+    flow_coordinator = get_cli_runtime().get_flow(flow_name, options=options)
 
     if not flow_coordinator:
         raise ValueError(
@@ -0,0 +1,249 @@
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote_plus
+
+from qbrix.tools.shared.qbrix_console_utils import init_logger
+
+# Salesforce API Limits
+SOBJECT_COLLECTION_LIMIT = 200
+COMPOSITE_BATCH_LIMIT = 25
+COMPOSITE_REQUEST_LIMIT = 25
+SOQL_IN_CHUNK_SIZE = 200
+
+
+def chunk_list(items, chunk_size: int):
+    """
+    Splits a list into smaller lists of a given size
+
+    Args:
+        items (list): The list to split
+        chunk_size (int): The maximum number of items in each chunk
+
+    Returns:
+        list: A list of lists, each containing no more than chunk_size items
+    """
+
+    items = list(items)
+    return [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+
+def format_soql_in(values) -> str:
+    """
+    Formats a list of values for use within a SOQL IN clause. Single quotes and backslashes are escaped.
+
+    Args:
+        values (list): The values to format
+
+    Returns:
+        str: Comma separated list of quoted values, for example 'a','b','c'
+    """
+
+    escaped = []
+    for value in values:
+        value = str(value).replace("\\", "\\\\").replace("'", "\\'")
+        escaped.append(f"'{value}'")
+    return ",".join(escaped)
+
+
+def query_all_in(sf, select_statement: str, field: str, values, where: str = None):
+    """
+    Runs a SELECT statement with an IN clause for the given field and values, splitting the values into multiple queries where needed so that the statement stays within SOQL limits.
+
+    Args:
+        sf (Salesforce): simple_salesforce connection for the target org
+        select_statement (str): The SELECT and FROM part of the statement, for example "SELECT Id, Name FROM Profile"
+        field (str): The field to filter on with the IN clause
+        values (list): The values to filter on. Duplicates and empty values are ignored.
+        where (str): (Optional) Additional filter which is combined with the IN clause using AND
+
+    Returns:
+        list: All records returned across the queries
+    """
+
+    unique_values = [v for v in dict.fromkeys(values) if v is not None and v != ""]
+    records = []
+
+    for chunk in chunk_list(unique_values, SOQL_IN_CHUNK_SIZE):
+        soql = f"{select_statement} WHERE {field} IN ({format_soql_in(chunk)})"
+        if where:
+            soql += f" AND ({where})"
+        result = sf.query_all(soql)
+        if result and result.get("records"):
+            records.extend(result["records"])
+
+    return records
+
+
+def run_sobject_collection(
+    sf,
+    method: str,
+    records,
+    sobject: str = None,
+    external_id_field: str = None,
+    all_or_none: bool = False,
+    max_workers: int = 1,
+):
+    """
+    Sends records to the sObject Collections API (composite/sobjects) in chunks of 200. Chunks are sent concurrently when max_workers is greater than 1.
+
+    Args:
+        sf (Salesforce): simple_salesforce connection for the target org
+        method (str): POST to create, PATCH to update (or upsert when external_id_field is set)
+        records (list): List of record dicts. An attributes type is added where missing and sobject is given.
+        sobject (str): (Optional) The API name of the object. Required when using external_id_field.
+        external_id_field (str): (Optional) API name of the external id field to upsert against
+        all_or_none (bool): Roll back each chunk when any record in it fails. Defaults to False
+        max_workers (int): (Optional) Number of chunks to send at the same time. Defaults to 1
+
+    Returns:
+        list: One result dict per record (with id, success and errors keys), in the same order as the records provided
+    """
+
+    logger = init_logger()
+    method = method.upper()
+
+    path = "composite/sobjects"
+    if external_id_field:
+        if not sobject:
+            raise ValueError("An sObject name is required when upserting with an external id field.")
+        path = f"composite/sobjects/{sobject}/{external_id_field}"
+
+    prepared = []
+    for record in records:
+        record = dict(record)
+        if sobject and "attributes" not in record:
+            record["attributes"] = {"type": sobject}
+        prepared.append(record)
+
+    def _send_chunk(chunk):
+        error_message = "No response returned for record"
+        try:
+            response = sf.restful(
+                path,
+                method=method,
+                json={"allOrNone": all_or_none, "records": chunk},
+            )
+        except Exception as e:
+            logger.error("sObject Collection request failed. Error details: %s", e)
+            error_message = str(e)
+            response = None
+
+        if not response:
+            response = [
+                {"id": None, "success": False, "errors": [{"message": error_message}]}
+                for _ in chunk
+            ]
+
+        return response
+
+    chunks = chunk_list(prepared, SOBJECT_COLLECTION_LIMIT)
+
+    if max_workers and max_workers > 1 and len(chunks) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            responses = list(executor.map(_send_chunk, chunks))
+    else:
+        responses = [_send_chunk(chunk) for chunk in chunks]
+
+    results = []
+    for response in responses:
+        results.extend(response)
+
+    return results
+
+
+def run_composite_batch(sf, subrequests, halt_on_error: bool = False):
+    """
+    Sends independent subrequests to the Composite Batch API (composite/batch) in batches of 25.
+
+    Args:
+        sf (Salesforce): simple_salesforce connection for the target org
+        subrequests (list): List of subrequest dicts with method and url keys. The url is relative to /services/data, for example v58.0/query/?q=SELECT+Id+FROM+Account
+        halt_on_error (bool): Stop processing the remaining subrequests in a batch when one fails. Defaults to False
+
+    Returns:
+        list: One result dict per subrequest (with statusCode and result keys), in the same order as the subrequests provided
+    """
+
+    logger = init_logger()
+
+    results = []
+    for chunk in chunk_list(subrequests, COMPOSITE_BATCH_LIMIT):
+        error_message = "No response returned for subrequest"
+        try:
+            response = sf.restful(
+                "composite/batch",
+                method="POST",
+                json={"haltOnError": halt_on_error, "batchRequests": chunk},
+            )
+        except Exception as e:
+            logger.error("Composite Batch request failed. Error details: %s", e)
+            error_message = str(e)
+            response = None
+
+        if response and response.get("results"):
+            results.extend(response["results"])
+        else:
+            results.extend(
+                {"statusCode": 500, "result": [{"message": error_message}]}
+                for _ in chunk
+            )
+
+    return results
+
+
+def query_subrequest(sf, soql: str) -> dict:
+    """
+    Builds a Composite Batch subrequest for a SOQL query
+
+    Args:
+        sf (Salesforce): simple_salesforce connection for the target org
+        soql (str): The SOQL statement to run
+
+    Returns:
+        dict: The subrequest, ready for run_composite_batch
+    """
+
+    return {"method": "GET", "url": f"v{sf.sf_version}/query/?q={quote_plus(soql)}"}
+
+
+def run_composite(sf, subrequests, all_or_none: bool = False):
+    """
+    Sends subrequests to the Composite API (composite) in groups of 25.
+
+    Args:
+        sf (Salesforce): simple_salesforce connection for the target org
+        subrequests (list): List of subrequest dicts with method, url, referenceId and optional body keys. Use the full path for the url, for example /services/data/v58.0/ui-api/favorites
+        all_or_none (bool): Roll back each group when any subrequest in it fails. Defaults to False
+
+    Returns:
+        list: One result dict per subrequest (with httpStatusCode, body and referenceId keys), in the same order as the subrequests provided
+    """
+
+    logger = init_logger()
+
+    results = []
+    for chunk in chunk_list(subrequests, COMPOSITE_REQUEST_LIMIT):
+        error_message = "No response returned for subrequest"
+        try:
+            response = sf.restful(
+                "composite",
+                method="POST",
+                json={"allOrNone": all_or_none, "compositeRequest": chunk},
+            )
+        except Exception as e:
+            logger.error("Composite request failed. Error details: %s", e)
+            error_message = str(e)
+            response = None
+
+        if response and response.get("compositeResponse"):
+            results.extend(response["compositeResponse"])
+        else:
+            results.extend(
+                {
+                    "httpStatusCode": 500,
+                    "referenceId": subrequest.get("referenceId"),
+                    "body": [{"message": error_message}],
+                }
+                for subrequest in chunk
+            )
+
+    return results
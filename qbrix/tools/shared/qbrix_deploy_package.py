@@ -0,0 +1,185 @@
+import base64
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from zipfile import ZIP_DEFLATED, ZipFile
+
+from cumulusci.salesforce_api.metadata import ApiDeploy
+
+from qbrix.tools.shared.qbrix_console_utils import init_logger
+from qbrix.tools.shared.qbrix_metadata_retrieve import MetadataApiContext, build_package_xml
+
+# Deploy Package Defaults
+DEPLOY_PACKAGE_MAX_WORKERS = 8
+DEPLOY_PACKAGE_COMPRESS_LEVEL = 6
+
+# Metadata folders which have the same layout in source format and Metadata API format, apart from the -meta.xml suffix.
+# Folder -> (Metadata Type, File Suffix, Has Content File)
+DEPLOY_METADATA_FOLDERS = {
+    "applications": ("CustomApplication", "app", False),
+    "classes": ("ApexClass", "cls", True),
+    "components": ("ApexComponent", "component", True),
+    "contentassets": ("ContentAsset", "asset", True),
+    "cspTrustedSites": ("CspTrustedSite", "cspTrustedSite", False),
+    "customMetadata": ("CustomMetadata", "md", False),
+    "customPermissions": ("CustomPermission", "customPermission", False),
+    "flexipages": ("FlexiPage", "flexipage", False),
+    "flows": ("Flow", "flow", False),
+    "globalValueSets": ("GlobalValueSet", "globalValueSet", False),
+    "layouts": ("Layout", "layout", False),
+    "namedCredentials": ("NamedCredential", "namedCredential", False),
+    "pages": ("ApexPage", "page", True),
+    "pathAssistants": ("PathAssistant", "pathAssistant", False),
+    "permissionsetgroups": ("PermissionSetGroup", "permissionsetgroup", False),
+    "permissionsets": ("PermissionSet", "permissionset", False),
+    "quickActions": ("QuickAction", "quickAction", False),
+    "remoteSiteSettings": ("RemoteSiteSetting", "remoteSite", False),
+    "standardValueSets": ("StandardValueSet", "standardValueSet", False),
+    "tabs": ("CustomTab", "tab", False),
+    "triggers": ("ApexTrigger", "trigger", True),
+}
+
+# Bundle folders which are deployed as a whole folder, with the same layout in both formats
+# Folder -> Metadata Type
+DEPLOY_BUNDLE_FOLDERS = {
+    "aura": "AuraDefinitionBundle",
+    "lwc": "LightningComponentBundle",
+}
+
+# Local tooling files which are never deployed
+DEPLOY_IGNORED_NAMES = {"__tests__", ".eslintrc.json", "jsconfig.json", ".DS_Store"}
+
+
+def _list_files(paths):
+    """Expands any directories in the list to the files they contain"""
+
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in names)
+        else:
+            files.append(path)
+    files = [f.replace(os.sep, "/") for f in files]
+    return [f for f in files if not DEPLOY_IGNORED_NAMES.intersection(f.split("/"))]
+
+
+def _package_entry(file_path):
+    """
+    Works out where a source file goes in a Metadata API package
+
+    Returns:
+        tuple: (metadata type, member name, path in the package, bundle folder or None), or None when the file cannot be converted without the CLI
+    """
+
+    parts = file_path.split("/")
+
+    for i, part in enumerate(parts):
+        if part in DEPLOY_BUNDLE_FOLDERS and len(parts) > i + 2:
+            bundle = "/".join(parts[: i + 2])
+            return DEPLOY_BUNDLE_FOLDERS[part], parts[i + 1], "/".join(parts[i:]), bundle
+
+        if part in DEPLOY_METADATA_FOLDERS and len(parts) == i + 2:
+            metadata_type, suffix, has_content = DEPLOY_METADATA_FOLDERS[part]
+            file_name = parts[i + 1]
+
+            if file_name.endswith(f".{suffix}-meta.xml"):
+                member = file_name[: -len(f".{suffix}-meta.xml")]
+                package_name = file_name if has_content else f"{member}.{suffix}"
+            elif file_name.endswith(f".{suffix}"):
+                member = file_name[: -len(f".{suffix}")]
+                package_name = file_name
+            else:
+                return None
+
+            return metadata_type, member, f"{part}/{package_name}", None
+
+    return None
+
+
+def _read_file(file_path):
+    with open(file_path, "rb") as f:
+        return file_path, f.read()
+
+
+def build_deploy_package(file_paths, api_version: str, max_workers: int = DEPLOY_PACKAGE_MAX_WORKERS):
+    """
+    Builds a Metadata API deploy package in memory from source format (or Metadata API format) files, without staging them on disk or calling the CLI.
+
+    Files are read in parallel. Bundles (aura and lwc) are deployed in full, and files listed more than once are only added once.
+
+    Args:
+        file_paths (list): Files (or bundle folders) to deploy, for example the changes returned by compare_metadata
+        api_version (str): API Version for the package.xml, for example 58.0
+        max_workers (int): (Optional) Number of files to read at the same time. Defaults to 8
+
+    Returns:
+        bytes: The zip file contents (empty when there are no files), or None when a file has a metadata type which needs the CLI to convert it (for example decomposed objects or static resources)
+    """
+
+    logger = init_logger()
+    files = list(dict.fromkeys(_list_files(file_paths)))
+
+    entries = {}
+    for file_path in files:
+        entry = _package_entry(file_path)
+        if entry is None:
+            logger.info(f"{file_path} cannot be packaged in memory. The CLI will be used for this deploy.")
+            return None
+        entries[file_path] = entry
+
+    # Content files (for example Apex classes) are deployed with their -meta.xml file
+    for file_path in list(entries):
+        pair_path = file_path[: -len("-meta.xml")] if file_path.endswith("-meta.xml") else f"{file_path}-meta.xml"
+        if pair_path not in entries and entries[file_path][3] is None and os.path.isfile(pair_path):
+            pair_entry = _package_entry(pair_path)
+            if pair_entry:
+                entries[pair_path] = pair_entry
+
+    # Read each bundle in full, since bundles are deployed as a whole
+    bundles = {entry[3] for entry in entries.values() if entry[3]}
+    for file_path in _list_files(sorted(bundles)):
+        if file_path not in entries:
+            entries[file_path] = _package_entry(file_path)
+
+    with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as executor:
+        contents = dict(executor.map(_read_file, sorted(entries)))
+
+    if not entries:
+        return b""
+
+    types = {}
+    written = set()
+    package_buffer = BytesIO()
+    with ZipFile(package_buffer, "w", ZIP_DEFLATED, compresslevel=DEPLOY_PACKAGE_COMPRESS_LEVEL) as package_zip:
+        for file_path in sorted(entries):
+            metadata_type, member, package_path, _ = entries[file_path]
+            if package_path in written:
+                continue
+            package_zip.writestr(package_path, contents[file_path])
+            written.add(package_path)
+            types.setdefault(metadata_type, set()).add(member)
+
+        package_zip.writestr("package.xml", build_package_xml({t: list(m) for t, m in types.items()}, api_version))
+
+    logger.info(f"Built deploy package with {len(written)} file(s) across {len(types)} metadata type(s)")
+    return package_buffer.getvalue()
+
+
+def deploy_package(org_config, project_config, package_zip: bytes, purge_on_delete: bool = False):
+    """
+    Deploys a package built by build_deploy_package using the Metadata API
+
+    Args:
+        org_config (OrgConfig): The org to deploy to
+        project_config (BaseProjectConfig): The CCI project config
+        package_zip (bytes): The zip file contents
+        purge_on_delete (bool): (Optional) Purge deleted components. Defaults to False
+
+    Returns:
+        str: The deploy status
+    """
+
+    context = MetadataApiContext(org_config, project_config, init_logger())
+    package_zip_b64 = base64.b64encode(package_zip).decode("utf-8")
+    return ApiDeploy(context, package_zip_b64, purge_on_delete=purge_on_delete)()
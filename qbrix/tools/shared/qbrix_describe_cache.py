@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from email.utils import formatdate
+
+from qbrix.tools.shared.qbrix_console_utils import init_logger
+from qbrix.tools.shared.qbrix_http import http_request
+
+# Describe Cache Defaults
+DESCRIBE_CACHE_DIRECTORY = os.path.join(".qbrix", "describe_cache")
+DESCRIBE_CACHE_FRESH_SECONDS = 600
+DESCRIBE_CACHE_MAX_ENTRIES = 250
+
+
+class DescribeCache:
+
+    """
+    Caches Object Describe (and Global Describe) results on disk, keyed by Org ID, sObject and API version.
+
+    Entries younger than fresh_seconds are returned without calling the org. Older entries are revalidated using the If-Modified-Since header, so the describe is only downloaded again when the schema has changed. The number of cached entries is capped and the least recently used entries are removed first.
+    """
+
+    def __init__(
+        self,
+        cache_directory: str = DESCRIBE_CACHE_DIRECTORY,
+        fresh_seconds: int = DESCRIBE_CACHE_FRESH_SECONDS,
+        max_entries: int = DESCRIBE_CACHE_MAX_ENTRIES,
+    ):
+        self.logger = init_logger()
+        self.cache_directory = cache_directory
+        self.fresh_seconds = fresh_seconds
+        self.max_entries = max_entries
+        self._memory = {}
+        self._lock = threading.Lock()
+
+    def _entry_path(self, org_id: str, sobject: str, api_version: str) -> str:
+        key = f"{org_id}|{sobject or '__global__'}|{api_version}"
+        file_name = hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json"
+        return os.path.join(self.cache_directory, file_name)
+
+    def _read_entry(self, entry_path: str):
+        if entry_path in self._memory:
+            return self._memory[entry_path]
+
+        if not os.path.exists(entry_path):
+            return None
+
+        try:
+            with open(entry_path, "r", encoding="utf-8") as entry_file:
+                entry = json.load(entry_file)
+        except (OSError, ValueError):
+            return None
+
+        self._memory[entry_path] = entry
+        return entry
+
+    def _write_entry(self, entry_path: str, entry: dict):
+        self._memory[entry_path] = entry
+        os.makedirs(self.cache_directory, exist_ok=True)
+
+        tmp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as entry_file:
+            json.dump(entry, entry_file)
+        os.replace(tmp_path, entry_path)
+
+        self._evict()
+
+    def _touch(self, entry_path: str):
+        try:
+            os.utime(entry_path, None)
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Removes the least recently used entries once the cache is over the maximum size"""
+
+        try:
+            entries = [
+                os.path.join(self.cache_directory, f)
+                for f in os.listdir(self.cache_directory)
+                if f.endswith(".json")
+            ]
+        except OSError:
+            return
+
+        if len(entries) <= self.max_entries:
+            return
+
+        entries.sort(key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+        for entry_path in entries[: len(entries) - self.max_entries]:
+            self._memory.pop(entry_path, None)
+            try:
+                os.remove(entry_path)
+            except OSError:
+                pass
+
+    def describe(
+        self,
+        instance_url: str,
+        access_token: str,
+        org_id: str,
+        api_version: str,
+        sobject: str = None,
+        revalidate: bool = False,
+    ) -> dict:
+        """
+        Returns the describe for an sObject, or the Global Describe when no sObject is given
+
+        Args:
+            instance_url (str): Instance URL for the target org
+            access_token (str): Access Token for the target org
+            org_id (str): Org ID for the target org. The instance URL is used when this is not known.
+            api_version (str): API Version to describe against, for example 58.0
+            sobject (str): (Optional) API Name of the sObject to describe
+            revalidate (bool): (Optional) Check a cached entry with the org even when it is still fresh, for example after a deployment. Defaults to False
+
+        Returns:
+            dict: The describe result
+        """
+
+        api_version = str(api_version).lstrip("v")
+        instance_url = str(instance_url).rstrip("/")
+        entry_path = self._entry_path(org_id or instance_url, sobject, api_version)
+
+        with self._lock:
+            entry = self._read_entry(entry_path)
+
+        if (
+            entry
+            and not revalidate
+            and time.time() - entry.get("fetched", 0) <= self.fresh_seconds
+        ):
+            self._touch(entry_path)
+            return entry["describe"]
+
+        if sobject:
+            url = f"{instance_url}/services/data/v{api_version}/sobjects/{sobject}/describe/"
+        else:
+            url = f"{instance_url}/services/data/v{api_version}/sobjects/"
+
+        headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json",
+        }
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = http_request("GET", url, headers=headers, timeout=60)
+
+        if response.status_code == 304 and entry:
+            self.logger.debug("Describe unchanged for %s", sobject or "Global Describe")
+            entry["fetched"] = time.time()
+            with self._lock:
+                self._write_entry(entry_path, entry)
+            return entry["describe"]
+
+        response.raise_for_status()
+
+        entry = {
+            "fetched": time.time(),
+            "last_modified": response.headers.get("Last-Modified")
+            or formatdate(usegmt=True),
+            "describe": response.json(),
+        }
+        with self._lock:
+            self._write_entry(entry_path, entry)
+
+        return entry["describe"]
+
+    def clear(self):
+        """Clears the in-memory cache and removes all cached describe files"""
+
+        with self._lock:
+            self._memory = {}
+            if os.path.isdir(self.cache_directory):
+                for f in os.listdir(self.cache_directory):
+                    try:
+                        os.remove(os.path.join(self.cache_directory, f))
+                    except OSError:
+                        pass
+
+
+describe_cache = DescribeCache()
+
+
+def get_describe(
+    instance_url: str,
+    access_token: str,
+    org_id: str,
+    api_version: str,
+    sobject: str = None,
+    revalidate: bool = False,
+) -> dict:
+    """
+    Returns the describe for an sObject (or the Global Describe) for the target org using the shared describe cache
+
+    Args:
+        instance_url (str): Instance URL for the target org
+        access_token (str): Access Token for the target org
+        org_id (str): Org ID for the target org
+        api_version (str): API Version to describe against, for example 58.0
+        sobject (str): (Optional) API Name of the sObject to describe. Leave blank for the Global Describe.
+        revalidate (bool): (Optional) Check a cached entry with the org even when it is still fresh. Defaults to False
+
+    Returns:
+        dict: The describe result
+    """
+
+    return describe_cache.describe(
+        instance_url, access_token, org_id, api_version, sobject, revalidate
+    )
@@ -0,0 +1,205 @@
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from qbrix.tools.shared.qbrix_console_utils import init_logger
+
+# HTTP Session Defaults. Timeouts can be overridden with the QBRIX_HTTP_CONNECT_TIMEOUT and QBRIX_HTTP_READ_TIMEOUT environment variables.
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("QBRIX_HTTP_CONNECT_TIMEOUT", 10))
+HTTP_READ_TIMEOUT = float(os.environ.get("QBRIX_HTTP_READ_TIMEOUT", 120))
+HTTP_MAX_RETRIES = int(os.environ.get("QBRIX_HTTP_MAX_RETRIES", 4))
+HTTP_BACKOFF_SECONDS = 1
+HTTP_MAX_BACKOFF_SECONDS = 30
+HTTP_POOL_SIZE = 20
+
+# Statuses retried for idempotent methods
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+# Statuses retried for every method, since they mean the request was rejected before it was processed
+REJECTED_STATUS_CODES = (429, 503)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+
+def _is_request_limit_exceeded(response) -> bool:
+    """Checks for the Salesforce REQUEST_LIMIT_EXCEEDED error, which is returned with a 403 status code"""
+
+    if response.status_code != 403:
+        return False
+    try:
+        return "REQUEST_LIMIT_EXCEEDED" in response.text
+    except Exception:
+        return False
+
+
+def _file_objects(kwargs) -> list:
+    """Returns the file objects in the files and data arguments of a request"""
+
+    values = []
+    files = kwargs.get("files")
+    if isinstance(files, dict):
+        values.extend(files.values())
+    elif files:
+        values.extend(value for _, value in files)
+    values.append(kwargs.get("data"))
+
+    file_objects = []
+    for value in values:
+        if isinstance(value, (tuple, list)) and len(value) > 1:
+            value = value[1]
+        if hasattr(value, "read"):
+            file_objects.append(value)
+    return file_objects
+
+
+def _rewind_positions(file_objects):
+    """
+    Records the position of each file object, so the body can be sent again on a retry
+
+    Returns:
+        list: (file object, position) tuples, or None when a file object cannot be rewound
+    """
+
+    positions = []
+    for file_object in file_objects:
+        try:
+            positions.append((file_object, file_object.tell()))
+        except (AttributeError, OSError, ValueError):
+            return None
+    return positions
+
+
+class RetryingSession(requests.Session):
+
+    """
+    A requests Session which keeps connections open between calls, asks for gzip responses, applies default timeouts and retries throttled or unavailable responses with jittered exponential backoff.
+
+    Requests which upload file objects are rewound to the original position before each retry, or not retried when the file cannot be rewound.
+
+    Idempotent methods are retried on status 429, 502, 503 or 504, a REQUEST_LIMIT_EXCEEDED error or a connection error. Other methods (such as POST and PATCH) are only retried on status 429 or 503 or a REQUEST_LIMIT_EXCEEDED error, where the request was rejected. A 502 or 504 from a gateway does not mean the request was not processed, so retrying could create duplicate records or jobs.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        read_timeout: float = HTTP_READ_TIMEOUT,
+        max_retries: int = HTTP_MAX_RETRIES,
+        backoff_seconds: float = HTTP_BACKOFF_SECONDS,
+        pool_size: int = HTTP_POOL_SIZE,
+    ):
+        super().__init__()
+        self.logger = init_logger()
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.headers["Accept-Encoding"] = "gzip, deflate"
+
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def _wait(self, attempt: int, response=None):
+        delay = None
+        if response is not None and response.headers.get("Retry-After"):
+            try:
+                delay = float(response.headers["Retry-After"])
+            except ValueError:
+                delay = None
+
+        if delay is None:
+            delay = self.backoff_seconds * (2**attempt)
+            delay = random.uniform(delay / 2, delay)
+
+        time.sleep(min(delay, HTTP_MAX_BACKOFF_SECONDS))
+
+    def request(self, method, url, *args, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        method = str(method).upper()
+
+        # File objects are read while the request is sent, so they must be rewound before a retry
+        max_retries = self.max_retries
+        positions = _rewind_positions(_file_objects(kwargs))
+        if positions is None:
+            max_retries = 0
+
+        attempt = 0
+        while True:
+            if attempt > 0:
+                for file_object, position in positions:
+                    file_object.seek(position)
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if method not in IDEMPOTENT_METHODS or attempt >= max_retries:
+                    raise
+                self.logger.debug("Retrying %s %s after error: %s", method, url, e)
+                self._wait(attempt)
+                attempt += 1
+                continue
+
+            retry_status_codes = RETRY_STATUS_CODES if method in IDEMPOTENT_METHODS else REJECTED_STATUS_CODES
+            retry = response.status_code in retry_status_codes or _is_request_limit_exceeded(response)
+            if not retry or attempt >= max_retries:
+                return response
+
+            self.logger.debug(
+                "Retrying %s %s after status %s", method, url, response.status_code
+            )
+            response.close()
+            self._wait(attempt, response)
+            attempt += 1
+
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+def new_http_session(**kwargs) -> RetryingSession:
+    """
+    Creates a new retrying HTTP session. Use this when a task needs its own session settings, otherwise use get_http_session.
+
+    Args:
+        connect_timeout (float): (Optional) Seconds to wait for a connection. Defaults to 10
+        read_timeout (float): (Optional) Seconds to wait for a response. Defaults to 120
+        max_retries (int): (Optional) Number of times to retry a request. Defaults to 4
+        backoff_seconds (float): (Optional) Base delay between retries, doubled on each attempt. Defaults to 1
+        pool_size (int): (Optional) Number of connections kept open per host. Defaults to 20
+
+    Returns:
+        RetryingSession: The new session
+    """
+
+    return RetryingSession(**kwargs)
+
+
+def get_http_session() -> RetryingSession:
+    """
+    Returns the HTTP session shared across the package, so that connections (and TLS handshakes) are reused between calls
+
+    Returns:
+        RetryingSession: The shared session
+    """
+
+    global _shared_session
+
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = RetryingSession()
+        return _shared_session
+
+
+def http_request(method: str, url: str, **kwargs):
+    """
+    Sends a request using the shared HTTP session. Accepts the same arguments as requests.request.
+
+    Args:
+        method (str): HTTP method, for example GET
+        url (str): The URL to call
+
+    Returns:
+        Response: The response
+    """
+
+    return get_http_session().request(method, url, **kwargs)
@@ -0,0 +1,270 @@
+import os
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO
+from zipfile import ZIP_DEFLATED, ZipFile
+
+from cumulusci.salesforce_api.metadata import ApiRetrieveUnpackaged
+
+from qbrix.tools.shared.qbrix_console_utils import init_logger
+
+# Retrieve Defaults. A single retrieve is limited to 10,000 files, so chunks are kept well below this.
+RETRIEVE_MAX_MEMBERS = 2000
+RETRIEVE_MAX_WORKERS = 4
+
+METADATA_NAMESPACE = "http://soap.sforce.com/2006/04/metadata"
+
+# Child Metadata Types which are retrieved inside the file of their parent, for example CustomField inside objects/Account.object.
+# Child Type -> Parent Type
+CHILD_METADATA_TYPES = {
+    "BusinessProcess": "CustomObject",
+    "CompactLayout": "CustomObject",
+    "CustomField": "CustomObject",
+    "FieldSet": "CustomObject",
+    "Index": "CustomObject",
+    "ListView": "CustomObject",
+    "RecordType": "CustomObject",
+    "SharingReason": "CustomObject",
+    "ValidationRule": "CustomObject",
+    "WebLink": "CustomObject",
+    "WorkflowAlert": "Workflow",
+    "WorkflowFieldUpdate": "Workflow",
+    "WorkflowKnowledgePublish": "Workflow",
+    "WorkflowOutboundMessage": "Workflow",
+    "WorkflowRule": "Workflow",
+    "WorkflowTask": "Workflow",
+    "SharingCriteriaRule": "SharingRules",
+    "SharingGuestRule": "SharingRules",
+    "SharingOwnerRule": "SharingRules",
+    "SharingTerritoryRule": "SharingRules",
+    "AssignmentRule": "AssignmentRules",
+    "AutoResponseRule": "AutoResponseRules",
+    "EscalationRule": "EscalationRules",
+    "MatchingRule": "MatchingRules",
+    "CustomLabel": "CustomLabels",
+}
+
+# Parent Types where every member is retrieved into a single file
+SINGLE_FILE_PARENT_TYPES = {"CustomLabels"}
+
+
+class MetadataApiContext:
+
+    """Provides the org, project and logger which the Metadata API calls from CumulusCI expect from a task"""
+
+    def __init__(self, org_config, project_config, logger):
+        self.org_config = org_config
+        self.project_config = project_config
+        self.logger = logger
+
+
+def parse_package_xml(package_xml: str):
+    """
+    Reads the metadata types and members from a package.xml
+
+    Args:
+        package_xml (str): Contents of the package.xml
+
+    Returns:
+        tuple: (dict of metadata type -> list of members, api version or None)
+    """
+
+    root = ET.fromstring(package_xml)
+    ns = {"md": METADATA_NAMESPACE}
+
+    types = {}
+    for type_element in root.findall("md:types", ns):
+        name = type_element.findtext("md:name", namespaces=ns)
+        members = [m.text for m in type_element.findall("md:members", ns) if m.text]
+        types.setdefault(name, []).extend(members)
+
+    return types, root.findtext("md:version", namespaces=ns)
+
+
+def build_package_xml(types: dict, api_version: str) -> str:
+    """
+    Builds a package.xml for the given metadata types and members
+
+    Args:
+        types (dict): Metadata type -> list of members
+        api_version (str): API Version, for example 58.0
+
+    Returns:
+        str: The package.xml
+    """
+
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', f'<Package xmlns="{METADATA_NAMESPACE}">']
+    for name in sorted(types):
+        lines.append("    <types>")
+        for member in sorted(types[name]):
+            lines.append(f"        <members>{member}</members>")
+        lines.append(f"        <name>{name}</name>")
+        lines.append("    </types>")
+    lines.append(f"    <version>{api_version}</version>")
+    lines.append("</Package>")
+    return "\n".join(lines) + "\n"
+
+
+def _family_unit_key(type_name: str, member: str, family_wildcards: set):
+    """Returns the chunk unit for a member of a parent or child type, so that everything retrieved into the same file is kept together"""
+
+    parent = CHILD_METADATA_TYPES.get(type_name, type_name)
+    if parent in family_wildcards or parent in SINGLE_FILE_PARENT_TYPES:
+        return (parent, "*")
+    return (parent, member.split(".")[0])
+
+
+def chunk_manifest(types: dict, max_members: int = RETRIEVE_MAX_MEMBERS):
+    """
+    Splits metadata types and members into chunks for separate retrieve jobs. Large types are split across chunks and smaller types are grouped together. Wildcard types get a chunk of their own, since their size is not known.
+
+    Parent types and their child types (for example CustomObject and CustomField) are retrieved into the same file, so the members for each parent are always kept in the same chunk. When any type in the family uses a wildcard, the whole family is kept in one chunk.
+
+    Args:
+        types (dict): Metadata type -> list of members
+        max_members (int): (Optional) Maximum number of members in each chunk. Defaults to 2000. A single parent and its children are never split, even when they are larger than this.
+
+    Returns:
+        list: A list of dicts, each mapping metadata type -> list of members
+    """
+
+    parent_types = set(CHILD_METADATA_TYPES.values())
+    family_wildcards = {
+        CHILD_METADATA_TYPES.get(name, name)
+        for name, members in types.items()
+        if "*" in members and (name in CHILD_METADATA_TYPES or name in parent_types)
+    }
+
+    # Build the units which cannot be split: a family member group, a wildcard type, or a slice of a large type
+    units = {}
+    for name in sorted(types):
+        members = list(dict.fromkeys(types[name]))
+
+        if name in CHILD_METADATA_TYPES or name in parent_types:
+            for member in members:
+                key = _family_unit_key(name, member, family_wildcards)
+                units.setdefault(key, {}).setdefault(name, []).append(member)
+        elif "*" in members:
+            units[(name, "*")] = {name: members}
+        else:
+            for i in range(0, len(members), max_members):
+                units[(name, i)] = {name: members[i : i + max_members]}
+
+    chunks = []
+    current = {}
+    current_size = 0
+
+    for key in sorted(units, key=lambda k: sum(len(m) for m in units[k].values()), reverse=True):
+        unit = units[key]
+        unit_size = sum(len(m) for m in unit.values())
+
+        if any("*" in m for m in unit.values()):
+            chunks.append(unit)
+            continue
+
+        if current_size + unit_size > max_members and current:
+            chunks.append(current)
+            current = {}
+            current_size = 0
+        for name, members in unit.items():
+            current.setdefault(name, []).extend(members)
+        current_size += unit_size
+
+    if current:
+        chunks.append(current)
+
+    return chunks
+
+
+def _strip_unpackaged_prefix(name: str) -> str:
+    return name[len("unpackaged/") :] if name.startswith("unpackaged/") else name
+
+
+def retrieve_metadata(
+    org_config,
+    project_config,
+    package_xml: str,
+    api_version: str = None,
+    max_members: int = RETRIEVE_MAX_MEMBERS,
+    max_workers: int = RETRIEVE_MAX_WORKERS,
+) -> ZipFile:
+    """
+    Retrieves the metadata in a package.xml using several Metadata API retrieve jobs which run at the same time, then merges the results into a single zip in memory.
+
+    Args:
+        org_config (OrgConfig): The org to retrieve from
+        project_config (BaseProjectConfig): The CCI project config
+        package_xml (str): Contents of the package.xml to retrieve
+        api_version (str): (Optional) API Version to use. Defaults to the version in the package.xml
+        max_members (int): (Optional) Maximum number of members in each retrieve job. Defaults to 2000
+        max_workers (int): (Optional) Number of retrieve jobs to run at the same time. Defaults to 4
+
+    Returns:
+        ZipFile: The merged retrieve result (in Metadata API format) with a combined package.xml
+    """
+
+    logger = init_logger()
+    types, package_version = parse_package_xml(package_xml)
+    api_version = str(api_version or package_version or project_config.project__package__api_version)
+    chunks = chunk_manifest(types, max_members)
+
+    logger.info("Retrieving %i metadata type(s) using %i retrieve job(s)", len(types), len(chunks))
+    context = MetadataApiContext(org_config, project_config, logger)
+
+    def _retrieve(chunk):
+        return ApiRetrieveUnpackaged(context, build_package_xml(chunk, api_version), api_version)()
+
+    merged_buffer = BytesIO()
+    with ZipFile(merged_buffer, "w", ZIP_DEFLATED) as merged:
+        written = set()
+        with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as executor:
+            futures = {executor.submit(_retrieve, chunk): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                result_zip = future.result()
+                logger.info(" -> Retrieved %s", ", ".join(sorted(futures[future])))
+                for name in result_zip.namelist():
+                    target_name = _strip_unpackaged_prefix(name)
+                    if target_name == "package.xml" or name.endswith("/"):
+                        continue
+                    if target_name in written:
+                        logger.warning("%s was returned by more than one retrieve job. Keeping the first copy.", target_name)
+                        continue
+                    merged.writestr(target_name, result_zip.read(name))
+                    written.add(target_name)
+
+        merged.writestr("package.xml", build_package_xml(types, api_version))
+
+    merged_buffer.seek(0)
+    return ZipFile(merged_buffer)
+
+
+def retrieve_metadata_to_directory(
+    org_config,
+    project_config,
+    package_xml_path: str,
+    target_directory: str,
+    max_members: int = RETRIEVE_MAX_MEMBERS,
+    max_workers: int = RETRIEVE_MAX_WORKERS,
+) -> int:
+    """
+    Retrieves the metadata in a package.xml file with retrieve_metadata and writes the merged result to a directory in Metadata API format
+
+    Args:
+        org_config (OrgConfig): The org to retrieve from
+        project_config (BaseProjectConfig): The CCI project config
+        package_xml_path (str): Path to the package.xml file
+        target_directory (str): Directory to write the retrieved metadata to
+        max_members (int): (Optional) Maximum number of members in each retrieve job. Defaults to 2000
+        max_workers (int): (Optional) Number of retrieve jobs to run at the same time. Defaults to 4
+
+    Returns:
+        int: The number of files written
+    """
+
+    with open(package_xml_path, "r", encoding="utf-8") as f:
+        package_xml = f.read()
+
+    merged = retrieve_metadata(org_config, project_config, package_xml, max_members=max_members, max_workers=max_workers)
+    os.makedirs(target_directory, exist_ok=True)
+    merged.extractall(target_directory)
+    return len(merged.namelist())
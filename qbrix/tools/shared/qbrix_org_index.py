@@ -0,0 +1,186 @@
+import threading
+import time
+from urllib.parse import quote_plus
+
+from qbrix.tools.shared.qbrix_console_utils import init_logger
+from qbrix.tools.shared.qbrix_describe_cache import get_describe
+from qbrix.tools.shared.qbrix_http import http_request
+
+# An index older than this is revalidated when an object is not found in it
+INDEX_REVALIDATE_MIN_AGE_SECONDS = 30
+
+_max_api_versions = {}
+_max_api_versions_lock = threading.Lock()
+
+
+def get_org_max_api_version(instance_url: str, access_token: str) -> str:
+    """
+    Returns the highest API version supported by the org. The version is only requested once per instance URL.
+
+    Args:
+        instance_url (str): Instance URL for the target org
+        access_token (str): Access Token for the target org
+
+    Returns:
+        str: The API version, for example 58.0
+    """
+
+    instance_url = str(instance_url).rstrip("/")
+
+    with _max_api_versions_lock:
+        if instance_url in _max_api_versions:
+            return _max_api_versions[instance_url]
+
+    response = http_request(
+        "GET",
+        f"{instance_url}/services/data/",
+        headers={"Authorization": f"Bearer {access_token}"},
+        timeout=60,
+    )
+    response.raise_for_status()
+    version = str(response.json()[-1]["version"])
+
+    with _max_api_versions_lock:
+        _max_api_versions[instance_url] = version
+
+    return version
+
+
+class OrgIndex:
+
+    """
+    In-memory index of the sObjects, package namespaces and package names in an org, built from one Global Describe, one InstalledSubscriberPackage query and one PackageLicense query. Existence checks are answered from the index without calling the org.
+
+    The index for an org is rebuilt on next use after invalidate is called. The Q Brix deploy tasks (deploy, deploy_pre, deploy_post, QbrixDeployer and the dependency installs) do this after every deployment. Other tasks which deploy metadata do not, so a lookup which misses should call revalidate, which rebuilds an index older than INDEX_REVALIDATE_MIN_AGE_SECONDS from a fresh Global Describe.
+    """
+
+    def __init__(self):
+        self.logger = init_logger()
+        self._indexes = {}
+        self._stale = set()
+        self._lock = threading.Lock()
+
+    def _build(self, instance_url, access_token, org_id, revalidate):
+        api_version = get_org_max_api_version(instance_url, access_token)
+
+        describe = get_describe(
+            instance_url, access_token, org_id, api_version, revalidate=revalidate
+        )
+        objects = {sobject["name"].lower() for sobject in describe["sobjects"]}
+
+        soql = "SELECT SubscriberPackage.Name, SubscriberPackage.NamespacePrefix FROM InstalledSubscriberPackage"
+        response = http_request(
+            "GET",
+            f"{instance_url}/services/data/v{api_version}/tooling/query/?q={quote_plus(soql)}",
+            headers={"Authorization": f"Bearer {access_token}"},
+            timeout=60,
+        )
+        response.raise_for_status()
+
+        packages = set()
+        for record in response.json().get("records", []):
+            package = record.get("SubscriberPackage") or {}
+            if package.get("Name"):
+                packages.add(package["Name"])
+
+        # Namespaces come from the package licenses, as the namespace check always has
+        soql = "SELECT NamespacePrefix FROM PackageLicense"
+        response = http_request(
+            "GET",
+            f"{instance_url}/services/data/v{api_version}/query/?q={quote_plus(soql)}",
+            headers={"Authorization": f"Bearer {access_token}"},
+            timeout=60,
+        )
+        response.raise_for_status()
+
+        namespaces = {
+            record["NamespacePrefix"].lower()
+            for record in response.json().get("records", [])
+            if record.get("NamespacePrefix")
+        }
+
+        self.logger.debug(
+            "Built org index with %s objects and %s packages", len(objects), len(packages)
+        )
+
+        return {
+            "api_version": api_version,
+            "objects": objects,
+            "namespaces": namespaces,
+            "packages": packages,
+            "built": time.time(),
+        }
+
+    def get(self, instance_url: str, access_token: str, org_id: str) -> dict:
+        """
+        Returns the index for the org, building it when it does not exist or has been invalidated
+
+        Args:
+            instance_url (str): Instance URL for the target org
+            access_token (str): Access Token for the target org
+            org_id (str): Org ID for the target org. The instance URL is used when this is not known.
+
+        Returns:
+            dict: api_version, plus sets of objects (lower case), namespaces (lower case) and packages
+        """
+
+        instance_url = str(instance_url).rstrip("/")
+        key = org_id or instance_url
+
+        with self._lock:
+            index = self._indexes.get(key)
+            stale = key in self._stale
+            if index and not stale:
+                return index
+
+            index = self._build(instance_url, access_token, org_id, revalidate=stale)
+            self._indexes[key] = index
+            self._stale.discard(key)
+            return index
+
+    def revalidate(self, instance_url: str, access_token: str, org_id: str, min_age_seconds: int = INDEX_REVALIDATE_MIN_AGE_SECONDS) -> dict:
+        """
+        Rebuilds the index for the org from a fresh Global Describe when it is older than min_age_seconds. Use this when a lookup misses, since the org may have changed since the index was built.
+
+        Returns:
+            dict: api_version, plus sets of objects (lower case), namespaces (lower case) and packages
+        """
+
+        instance_url = str(instance_url).rstrip("/")
+        key = org_id or instance_url
+
+        with self._lock:
+            index = self._indexes.get(key)
+            if index and time.time() - index.get("built", 0) < min_age_seconds:
+                return index
+
+            index = self._build(instance_url, access_token, org_id, revalidate=True)
+            self._indexes[key] = index
+            self._stale.discard(key)
+            return index
+
+    def invalidate(self, org_id: str):
+        """Marks the index for the org as out of date so that it is rebuilt on next use"""
+
+        with self._lock:
+            self._indexes.pop(org_id, None)
+            self._stale.add(org_id)
+
+
+org_index = OrgIndex()
+
+
+def get_org_index(instance_url: str, access_token: str, org_id: str) -> dict:
+    """
+    Returns the shared object and package index for the target org
+
+    Args:
+        instance_url (str): Instance URL for the target org
+        access_token (str): Access Token for the target org
+        org_id (str): Org ID for the target org
+
+    Returns:
+        dict: api_version, plus sets of objects (lower case), namespaces (lower case) and packages
+    """
+
+    return org_index.get(instance_url, access_token, org_id)
@@ -0,0 +1,118 @@
+import json
+import os
+import sqlite3
+import time
+
+# Persistent Cache Defaults
+PERSISTENT_CACHE_FILE = os.path.join(".qbrix", "qbrix_cache.db")
+PERSISTENT_CACHE_TTL_SECONDS = 3600
+PERSISTENT_CACHE_MAX_ENTRIES = 1000
+
+
+class PersistentCache:
+
+    """
+    Stores qbrix_cache values in a local SQLite database, keyed by Org ID and key, so that values survive between cci invocations.
+
+    Each entry has its own expiry time. Once the cache holds more than max_entries, the least recently used entries are removed. Every change is made in a single SQLite transaction, so parallel cci processes can share the same file safely.
+    """
+
+    def __init__(
+        self,
+        cache_file: str = PERSISTENT_CACHE_FILE,
+        max_entries: int = PERSISTENT_CACHE_MAX_ENTRIES,
+    ):
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+        connection = sqlite3.connect(self.cache_file, timeout=30)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS qbrix_cache ("
+            "org_id TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+            "expires REAL NOT NULL, last_used REAL NOT NULL, "
+            "PRIMARY KEY (org_id, key))"
+        )
+        return connection
+
+    def get(self, org_id: str, key: str):
+        """
+        Returns a cached value for the org
+
+        Returns:
+            tuple: (True, value) when a current entry exists, otherwise (False, None)
+        """
+
+        now = time.time()
+        connection = self._connect()
+        try:
+            with connection:
+                row = connection.execute(
+                    "SELECT value FROM qbrix_cache WHERE org_id = ? AND key = ? AND expires > ?",
+                    (org_id, key, now),
+                ).fetchone()
+                if row is None:
+                    return False, None
+                connection.execute(
+                    "UPDATE qbrix_cache SET last_used = ? WHERE org_id = ? AND key = ?",
+                    (now, org_id, key),
+                )
+        finally:
+            connection.close()
+
+        return True, json.loads(row[0])
+
+    def set(self, org_id: str, key: str, value, ttl_seconds: int = PERSISTENT_CACHE_TTL_SECONDS):
+        """
+        Stores a value for the org
+
+        Args:
+            org_id (str): The Org ID the value belongs to
+            key (str): The cache key
+            value: The value to store. Must be JSON serializable.
+            ttl_seconds (int): (Optional) Number of seconds the value is kept for. Defaults to 3600
+        """
+
+        now = time.time()
+        serialized = json.dumps(value)
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO qbrix_cache (org_id, key, value, expires, last_used) VALUES (?, ?, ?, ?, ?)",
+                    (org_id, key, serialized, now + int(ttl_seconds), now),
+                )
+                connection.execute("DELETE FROM qbrix_cache WHERE expires <= ?", (now,))
+                connection.execute(
+                    "DELETE FROM qbrix_cache WHERE rowid NOT IN "
+                    "(SELECT rowid FROM qbrix_cache ORDER BY last_used DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+        finally:
+            connection.close()
+
+    def invalidate(self, org_id: str, keys=None):
+        """
+        Removes cached values for the org
+
+        Args:
+            org_id (str): The Org ID to clear values for
+            keys (list): (Optional) Keys to clear. Defaults to all keys.
+        """
+
+        connection = self._connect()
+        try:
+            with connection:
+                if keys:
+                    connection.executemany(
+                        "DELETE FROM qbrix_cache WHERE org_id = ? AND key = ?",
+                        [(org_id, key) for key in keys],
+                    )
+                else:
+                    connection.execute("DELETE FROM qbrix_cache WHERE org_id = ?", (org_id,))
+        finally:
+            connection.close()
+
+
+persistent_cache = PersistentCache()
@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+import time
+
+from qbrix.tools.shared.qbrix_org_index import org_index
+
+# Predicate Cache Defaults
+PREDICATE_CACHE_FILE = os.path.join(".qbrix", "predicate_cache.json")
+PREDICATE_CACHE_TTL_SECONDS = 900
+
+
+class PredicateCache:
+
+    """
+    Stores the results of org_config predicates (for example is_object_in_org) on disk, keyed by Org ID, predicate name and arguments, so that results survive between cci invocations.
+
+    Entries expire after ttl_seconds. Tasks which change the answer to a predicate (package installs, metadata deploys) should call invalidate for the target org.
+    """
+
+    def __init__(
+        self,
+        cache_file: str = PREDICATE_CACHE_FILE,
+        ttl_seconds: int = PREDICATE_CACHE_TTL_SECONDS,
+    ):
+        self.cache_file = cache_file
+        self.ttl_seconds = ttl_seconds
+        self._entries = None
+        self._loaded_mtime = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(org_id: str, predicate: str, args) -> str:
+        return f"{org_id}|{predicate}|{json.dumps(args, sort_keys=True, default=str)}"
+
+    def _load(self):
+        """Loads entries from disk when the file has been changed by another process"""
+
+        try:
+            mtime = os.path.getmtime(self.cache_file)
+        except OSError:
+            mtime = None
+
+        if self._entries is not None and mtime == self._loaded_mtime:
+            return
+
+        self._entries = {}
+        self._loaded_mtime = mtime
+        if mtime is None:
+            return
+
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as cache_file:
+                self._entries = json.load(cache_file)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def _save(self):
+        now = time.time()
+        self._entries = {
+            key: entry
+            for key, entry in self._entries.items()
+            if entry.get("expires", 0) > now
+        }
+
+        os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+        tmp_path = f"{self.cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as cache_file:
+            json.dump(self._entries, cache_file)
+        os.replace(tmp_path, self.cache_file)
+        self._loaded_mtime = os.path.getmtime(self.cache_file)
+
+    def get(self, org_id: str, predicate: str, args):
+        """
+        Returns a cached predicate result
+
+        Returns:
+            tuple: (True, value) when a current entry exists, otherwise (False, None)
+        """
+
+        with self._lock:
+            self._load()
+            entry = self._entries.get(self._key(org_id, predicate, args))
+
+        if entry and entry.get("expires", 0) > time.time():
+            return True, entry.get("value")
+
+        return False, None
+
+    def set(self, org_id: str, predicate: str, args, value):
+        """Stores a predicate result for the org"""
+
+        with self._lock:
+            self._load()
+            self._entries[self._key(org_id, predicate, args)] = {
+                "org_id": org_id,
+                "predicate": predicate,
+                "value": value,
+                "expires": time.time() + self.ttl_seconds,
+            }
+            self._save()
+
+    def invalidate(self, org_id: str, predicates=None):
+        """
+        Removes cached predicate results for the org
+
+        Args:
+            org_id (str): The Org ID to clear results for
+            predicates (list): (Optional) Names of the predicates to clear. Defaults to all predicates.
+        """
+
+        with self._lock:
+            self._load()
+            self._entries = {
+                key: entry
+                for key, entry in self._entries.items()
+                if entry.get("org_id") != org_id
+                or (predicates and entry.get("predicate") not in predicates)
+            }
+            self._save()
+
+
+predicate_cache = PredicateCache()
+
+
+def invalidate_org_predicates(org_id: str, predicates=None):
+    """
+    Clears cached org_config predicate results and the object and package index for the given org. Call this after changing the org in a way which changes the answer to a predicate, for example installing a package or deploying permission sets.
+
+    Args:
+        org_id (str): The Org ID to clear results for
+        predicates (list): (Optional) Names of the predicates to clear, for example ["is_package_installed"]. Defaults to all predicates.
+    """
+
+    if org_id:
+        predicate_cache.invalidate(org_id, predicates)
+        org_index.invalidate(org_id)
+
+
+def invalidate_org_config_predicates(org_config, predicates=None):
+    """
+    Clears cached org_config predicate results and the object and package index for a CCI org config, keyed by its Org ID (or instance URL when the Org ID is not known)
+
+    Args:
+        org_config (OrgConfig): The org which has changed
+        predicates (list): (Optional) Names of the predicates to clear. Defaults to all predicates.
+    """
+
+    invalidate_org_predicates(org_config.org_id or org_config.instance_url, predicates)
@@ -1,6 +1,8 @@
 import datetime
 import filecmp
 import glob
+import hashlib
+import json
 import logging
 import os
 import re
@@ -17,14 +19,19 @@ from zipfile import ZipFile
 
 import yaml
 
-from qbrix.tools.shared.qbrix_cci_tasks import rebuild_cci_cache
+from qbrix.tools.shared.qbrix_cci_tasks import get_cli_runtime, rebuild_cci_cache
 from qbrix.tools.shared.qbrix_console_utils import init_logger
+from qbrix.tools.shared.qbrix_deploy_package import build_deploy_package, deploy_package
 from qbrix.tools.shared.qbrix_io_tasks import QBrixDirectoryTask, QbrixFileTask
 from qbrix.tools.shared.qbrix_json_tasks import JsonFileTask, OrgConfigFileTask
+from qbrix.tools.shared.qbrix_metadata_retrieve import retrieve_metadata_to_directory
 from qbrix.tools.shared.qbrix_shared_checks import is_github_url
 from qbrix.tools.utils.qbrix_fart import FART
 
 DEFAULT_UPDATE_LOCATION = "https://qbrix-core.herokuapp.com/qbrix/q_update_package.zip"
+DEPLOY_LEDGER_DIRECTORY = os.path.join(".qbrix", "deploy_ledger")
+HIGH_RISK_METADATA_FOLDERS = {'settings', 'labels'}
+BUNDLE_METADATA_FOLDERS = {'lwc', 'aura', 'experiences', 'staticresources', 'waveTemplates'}
 
 log = init_logger()
 
@@ -718,7 +725,151 @@ def compare_directories(dcmp):
     return new_or_changed
 
 
-def compare_metadata(target_org_alias):
+def hash_source_tree(source_dir="force-app"):
+    """
+    Returns the SHA-256 hash of every file in a source directory
+
+    Args:
+        source_dir (str): The directory to hash. Defaults to force-app
+
+    Returns:
+        dict: File path (relative to the current directory) -> hash
+    """
+
+    hashes = {}
+    for root, _, files in os.walk(source_dir):
+        for file_name in files:
+            file_path = os.path.join(root, file_name)
+            with open(file_path, 'rb') as f:
+                hashes[file_path.replace(os.sep, '/')] = hashlib.sha256(f.read()).hexdigest()
+    return hashes
+
+
+def _deploy_ledger_path(target_org_alias, pending=False):
+    file_name = f"{target_org_alias}.pending.json" if pending else f"{target_org_alias}.json"
+    return os.path.join(DEPLOY_LEDGER_DIRECTORY, file_name)
+
+
+def _get_org_id(target_org_alias):
+    """Returns the Org ID for the alias from the CCI keychain, or None when the org cannot be found"""
+
+    try:
+        return get_cli_runtime().project_config.keychain.get_org(target_org_alias).org_id
+    except Exception:
+        return None
+
+
+def load_deploy_ledger(target_org_alias, pending=False):
+    """
+    Returns the file hashes recorded for the org at its last successful deploy, or None when there is no ledger.
+
+    The ledger also records the Org ID it was written for. When the alias now points to a different org (for example a scratch org recreated under the same alias), or the Org ID cannot be found, the ledger is ignored.
+
+    Args:
+        target_org_alias (str): Alias of the org
+        pending (bool): (Optional) Load the ledger waiting for the next successful push instead. Defaults to False
+
+    Returns:
+        dict: File path -> hash
+    """
+
+    ledger_path = _deploy_ledger_path(target_org_alias, pending)
+    if not os.path.exists(ledger_path):
+        return None
+
+    try:
+        with open(ledger_path, 'r') as f:
+            ledger = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    org_id = _get_org_id(target_org_alias)
+    if not org_id or ledger.get("org_id") != org_id:
+        log.info(f"Deploy ledger for {target_org_alias} was recorded for a different org. Ignoring it.")
+        return None
+
+    return ledger.get("files")
+
+
+def save_deploy_ledger(target_org_alias, hashes, pending=False):
+    """
+    Records the file hashes which have been deployed to the org
+
+    Args:
+        target_org_alias (str): Alias of the org
+        hashes (dict): File path -> hash
+        pending (bool): (Optional) Save as the ledger to apply after the next successful push. Defaults to False
+    """
+
+    os.makedirs(DEPLOY_LEDGER_DIRECTORY, exist_ok=True)
+    ledger_path = _deploy_ledger_path(target_org_alias, pending)
+    tmp_path = f"{ledger_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({"updated": datetime.datetime.now().isoformat(), "org_id": _get_org_id(target_org_alias), "files": hashes}, f)
+    os.replace(tmp_path, ledger_path)
+
+
+def _expand_to_components(file_paths):
+    """Adds the other files which must be deployed with each changed file (bundle folders and -meta.xml pairs)"""
+
+    expanded = set()
+    for file_path in file_paths:
+        parts = file_path.split('/')
+        bundle_index = next((i for i, part in enumerate(parts) if part in BUNDLE_METADATA_FOLDERS), None)
+
+        if bundle_index is not None and len(parts) > bundle_index + 2:
+            bundle_dir = '/'.join(parts[:bundle_index + 2])
+            for root, _, files in os.walk(bundle_dir):
+                for file_name in files:
+                    expanded.add(os.path.join(root, file_name).replace(os.sep, '/'))
+            continue
+
+        expanded.add(file_path)
+        if file_path.endswith('-meta.xml'):
+            source_file = file_path[:-len('-meta.xml')]
+            if os.path.exists(source_file):
+                expanded.add(source_file)
+        elif os.path.exists(f"{file_path}-meta.xml"):
+            expanded.add(f"{file_path}-meta.xml")
+
+    return sorted(expanded)
+
+
+def _compare_metadata_with_ledger(target_org_alias, ledger, stage_files=True):
+    # Compare local file hashes with the hashes recorded at the last deploy
+    log.info(f"Comparing Metadata with the deploy ledger for {target_org_alias}")
+    current = hash_source_tree("force-app")
+
+    changed = [path for path, file_hash in current.items() if ledger.get(path) != file_hash]
+    removed = [path for path in ledger if path not in current]
+    if removed:
+        log.info(f"{len(removed)} file(s) removed locally since the last deploy. These are not deleted from the org: {removed}")
+
+    changes = []
+    skipped = set()
+    for file_path in _expand_to_components(changed):
+        if os.path.basename(os.path.dirname(file_path)) in HIGH_RISK_METADATA_FOLDERS:
+            log.info(f"Skipping {file_path} as it contains a high risk metadata type. Review the contents individually.")
+            skipped.add(file_path)
+            continue
+        changes.append(file_path)
+
+    if changes:
+        log.info(f"{len(changes)} changes found")
+        if stage_files:
+            stage_changes(changes)
+
+    # Files which will match the org once the changes are pushed
+    pending = {path: file_hash for path, file_hash in current.items() if path not in skipped}
+    for path in skipped:
+        if path in ledger:
+            pending[path] = ledger[path]
+    save_deploy_ledger(target_org_alias, pending, pending=bool(changes))
+
+    return changes
+
+
+def _compare_metadata_with_org(target_org_alias, stage_files=True):
     # Default Org Command
     if os.path.exists('src'):
         shutil.rmtree('src')
@@ -726,20 +877,13 @@ def compare_metadata(target_org_alias):
     if os.path.exists('mdapipkg'):
         shutil.rmtree('mdapipkg')
 
-    if os.path.exists('upgrade_src'):
-        shutil.rmtree('upgrade_src')
-
     run_command("cci task run dx_convert_from")
 
-    # Retrieve metadata from the target org
+    # Retrieve metadata from the target org, split by type into parallel retrieve jobs
     log.info(f"Retrieving metadata from the target org with alias {target_org_alias} (This can take a few minutes..)")
-    retrieve_command = f"cci task run dx --command \"force:mdapi:retrieve -r mdapipkg -k src/package.xml\" --org {target_org_alias}"
-    run_command(retrieve_command)
-
-    # Unzip the retrieved metadata
-    log.info("Unpacking Metadata")
-    unzip_command = f"unzip -o mdapipkg/unpackaged.zip -d mdapipkg/unpackaged"
-    run_command(unzip_command)
+    runtime = get_cli_runtime()
+    org_config = runtime.project_config.keychain.get_org(target_org_alias)
+    retrieve_metadata_to_directory(org_config, runtime.project_config, 'src/package.xml', 'mdapipkg/unpackaged/unpackaged')
 
     # Compare the local and target org's metadata
     log.info("Comparing Metadata")
@@ -747,38 +891,133 @@ def compare_metadata(target_org_alias):
     new_or_changed = compare_directories(dcmp)
 
     changes = []
+    skipped = False
 
     if len(new_or_changed) > 0:
         log.info(f"{len(new_or_changed)} changes found")
-        log.info("Generating new update package in directory: upgrade_src")
 
         for file_path in new_or_changed:
-            if os.path.basename(os.path.dirname(file_path)) in {'settings', 'labels'}:
+            if os.path.basename(os.path.dirname(file_path)) in HIGH_RISK_METADATA_FOLDERS:
                 log.info(f"Skipping {file_path} as it contains a high risk metadata type. Review the contents individually.")
+                skipped = True
                 continue
 
             changes.append(file_path)
 
-            # Determine the destination path of the metadata file to copy
-            dst_file_path = os.path.join('upgrade_src', file_path.replace('src/', ''))
+        if changes and stage_files:
+            stage_changes(changes)
+
+    # Once pushed the org matches the project, apart from any high risk files which were skipped
+    current = hash_source_tree("force-app")
+    if skipped:
+        current = {path: file_hash for path, file_hash in current.items() if os.path.basename(os.path.dirname(path)) not in HIGH_RISK_METADATA_FOLDERS}
+    save_deploy_ledger(target_org_alias, current, pending=bool(changes))
+
+    return changes
+
+
+def compare_metadata(target_org_alias, verify_drift=False, stage_files=True):
+    """
+    Finds the metadata in force-app which is new or has changed compared to the target org, and copies it to upgrade_src ready for push_changes.
+
+    When a deploy ledger exists for the org, local file hashes are compared with the hashes recorded at the last successful push, without calling the org. The full retrieve and compare is used when there is no ledger or verify_drift is True.
+
+    Args:
+        target_org_alias (str): Alias of the target org
+        verify_drift (bool): (Optional) Retrieve the metadata from the org to detect changes made directly in the org. Defaults to False
+        stage_files (bool): (Optional) Copy the changes to upgrade_src. Set to False when passing the changes to push_changes, which packages them in memory. Defaults to True
+
+    Returns:
+        list: The paths of the new or changed files
+    """
 
-            # Create the destination directory if it does not exist
-            dst_directory = os.path.dirname(dst_file_path)
-            if not os.path.exists(dst_directory):
-                os.makedirs(dst_directory)
+    if os.path.exists('upgrade_src'):
+        shutil.rmtree('upgrade_src')
 
-            # Copy the metadata file to the destination directory
+    # A pending ledger from an earlier compare which was never pushed no longer matches the changes found now
+    pending_ledger_path = _deploy_ledger_path(target_org_alias, pending=True)
+    if os.path.exists(pending_ledger_path):
+        os.remove(pending_ledger_path)
+
+    ledger = None if verify_drift else load_deploy_ledger(target_org_alias)
+    if ledger is not None:
+        return _compare_metadata_with_ledger(target_org_alias, ledger, stage_files)
+
+    if not verify_drift:
+        log.info(f"No deploy ledger found for {target_org_alias}. Running full compare against the org.")
+
+    return _compare_metadata_with_org(target_org_alias, stage_files)
+
+
+def stage_changes(changes):
+    """
+    Copies the changes found by compare_metadata to upgrade_src, so that they can be deployed with the CLI
+
+    Args:
+        changes (list): The paths of the new or changed files
+    """
+
+    log.info("Generating new update package in directory: upgrade_src")
+    mdapi_format = False
+
+    for file_path in changes:
+        # Metadata API format files from the full compare are copied without the src folder
+        if file_path.startswith('src/'):
+            mdapi_format = True
+            dst_file_path = os.path.join('upgrade_src', file_path[len('src/'):])
+        else:
+            dst_file_path = os.path.join('upgrade_src', file_path)
+
+        if os.path.isdir(file_path):
+            shutil.copytree(file_path, dst_file_path, dirs_exist_ok=True)
+        else:
+            os.makedirs(os.path.dirname(dst_file_path), exist_ok=True)
             shutil.copy2(file_path, dst_file_path)
 
+    if mdapi_format:
         run_command("sfdx force:source:manifest:create --sourcepath upgrade_src --manifestname upgrade_src/package")
 
-    return changes
 
+def push_changes(target_org_alias, changes=None):
+    """
+    Deploys the changes found by compare_metadata to the target org and records them in the deploy ledger
+
+    When the changes are passed in, they are packaged in memory and deployed with the Metadata API. The CLI deploy of upgrade_src is used when no changes are passed in, or the changes include metadata which must be converted by the CLI.
 
-def push_changes(target_org_alias):
-    # Push Changes
-    push_command = f"cci task run deploy --path upgrade_src --org {target_org_alias}"
-    push_output, push_error = run_command(push_command)
+    Args:
+        target_org_alias (str): Alias of the target org
+        changes (list): (Optional) The paths returned by compare_metadata with stage_files set to False
+
+    Returns:
+        str: The deploy output
+    """
+
+    package_zip = None
+    if changes:
+        runtime = get_cli_runtime()
+        package_zip = build_deploy_package(changes, runtime.project_config.project__package__api_version)
+        if package_zip is None and not os.path.exists('upgrade_src'):
+            stage_changes(changes)
+
+    if package_zip == b"":
+        push_output = "No changes to deploy"
+    elif package_zip:
+        org_config = runtime.project_config.keychain.get_org(target_org_alias)
+        push_output = deploy_package(org_config, runtime.project_config, package_zip)
+        if push_output != "Success":
+            raise Exception(f"Deploy did not succeed: {push_output}")
+    else:
+        push_command = f"cci task run deploy --path upgrade_src --org {target_org_alias}"
+        process = subprocess.run(push_command, capture_output=True, shell=True, text=True)
+        if process.returncode != 0:
+            raise Exception(f"Deploy failed: {process.stderr or process.stdout}")
+        push_output = process.stdout
+
+    # Only reached once the deploy has succeeded. Record what is now deployed so the next compare can use the ledger
+    pending = load_deploy_ledger(target_org_alias, pending=True)
+    if pending is not None:
+        save_deploy_ledger(target_org_alias, pending)
+        os.remove(_deploy_ledger_path(target_org_alias, pending=True))
 
     log.info("Upgrade Pushed!")
     return push_output
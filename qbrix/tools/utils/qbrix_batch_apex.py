@@ -4,13 +4,14 @@ import subprocess
 import time
 from abc import abstractmethod
 
-import requests
 from cumulusci.core.config import ScratchOrgConfig
 from cumulusci.core.exceptions import CommandException
 from cumulusci.core.keychain import BaseProjectKeychain
 from cumulusci.tasks.sfdx import SFDXBaseTask
 from genericpath import isfile
 
+from qbrix.tools.shared.qbrix_http import http_request
+
 LOAD_COMMAND = "sfdx apex run "
 
 
@@ -307,7 +308,7 @@ class RunAnonymousApexAndWait(SFDXBaseTask):
             'Authorization': f'Bearer {self.accesstoken}',
             'Content-Type': 'application/json'
         }
-        response = requests.request("GET", url, headers=headers)
+        response = http_request("GET", url, headers=headers)
         data = json.loads(response.text)
         self.logger.info(data)
         return data["records"][0]["expr0"] == 0
@@ -10,12 +10,16 @@ from abc import abstractmethod
 from time import sleep
 
 import yaml
-from cumulusci.core.config import ScratchOrgConfig
+from cumulusci.core.config import ScratchOrgConfig, SfdxOrgConfig
 from cumulusci.core.exceptions import CommandException, TaskOptionsError
+from cumulusci.core.flowrunner import FlowCoordinator
 from cumulusci.core.keychain import BaseProjectKeychain
+from cumulusci.core.utils import import_global
 from cumulusci.tasks.sfdx import SFDXBaseTask
 from genericpath import isfile
 
+from qbrix.tools.shared.qbrix_predicate_cache import invalidate_org_config_predicates
+
 LOAD_COMMAND = "sfdx force:apex:execute "
 
 #This extension is really for running a CCI style flow in a single shell. This is to get around
@@ -35,6 +39,10 @@ class Deploy(SFDXBaseTask):
         "entrypointtype": {
             "description": "Entry point type of task or flow. Default is flow",
             "required": False
+        },
+        "in_process": {
+            "description": "Set to True to run the entry point in the current cci process, reusing the loaded project config and keychain, instead of the cci and sfdx subprocess chain. Default is False",
+            "required": False
         }
     }
 
@@ -114,6 +122,8 @@ class Deploy(SFDXBaseTask):
         if self.instanceurl[-1] == '/':
             self.instanceurl = self.instanceurl.rstrip(self.instanceurl[-1])
 
+        self.in_process = str(self.options.get("in_process")).lower() in ("true", "1", "yes")
+
 
     def _deployqbrix(self):
 
@@ -152,10 +162,62 @@ class Deploy(SFDXBaseTask):
                 self.logger.error(line)  # process line here
                 #self.logger.error(line[20:])  # process line here
 
+        # The deployed Q Brix may have changed the answers to org_config predicates
+        invalidate_org_config_predicates(self.org_config)
+
         if p.returncode != 0:
             raise subprocess.CalledProcessError(p.returncode, f"Failure running QBrix {self.entrypointtype} {self.entrypoint} ")
 
 
+    def _log_phase(self, phase, start_time):
+        self.logger.info(f'PHASE::{phase}::{time.time() - start_time:.2f}s')
+        return time.time()
+
+    def _deployqbrix_in_process(self):
+
+        phase_start = time.time()
+
+        # Reuse the project config and keychain already loaded for this run
+        project_config = self.project_config
+        if project_config.keychain is None:
+            self._load_keychain()
+        keychain = project_config.keychain
+        phase_start = self._log_phase("load_project", phase_start)
+
+        # Use the org named by the accesstoken and instanceurl options when they are given, the same as the subprocess path.
+        # Otherwise reuse the org config this task is running against
+        credentials_supplied = bool(self.options.get("accesstoken") or self.options.get("instanceurl"))
+        org_config = self.org_config
+        if credentials_supplied:
+            hashedalias = "cciorg"+str(hash(self.accesstoken))
+            sfdximport = subprocess.run([f"export SFDX_ACCESS_TOKEN='{self.accesstoken}' && sfdx force:auth:accesstoken:store --instanceurl {self.instanceurl} -a {hashedalias} --noprompt --json"], shell=True, capture_output=True)
+            if sfdximport.returncode != 0:
+                raise CommandException(f"Unable to store the access token for {self.instanceurl}: {sfdximport.stderr}")
+
+            # Backed by sfdx, the same as cci org import, so tokens are refreshed from sfdx. The org is not saved to the keychain.
+            org_config = SfdxOrgConfig({"username": hashedalias, "sfdx": True}, hashedalias, keychain=keychain, global_org=False)
+            self.logger.info(f'Using org {hashedalias}')
+        phase_start = self._log_phase("import_org", phase_start)
+
+        try:
+            if self.entrypointtype == "task":
+                task_config = project_config.get_task(self.entrypoint)
+                task_class = import_global(task_config.class_path)
+                task = task_class(project_config, task_config, org_config=org_config)
+                task()
+            else:
+                flow_config = project_config.get_flow(self.entrypoint)
+                coordinator = FlowCoordinator(project_config, flow_config, name=self.entrypoint)
+                coordinator.run(org_config)
+        finally:
+            self._log_phase(f"run_{self.entrypointtype}", phase_start)
+
+            # The deployed Q Brix may have changed the answers to org_config predicates
+            invalidate_org_config_predicates(org_config)
+
     def _run_task(self):
         self._prepruntime()
-        self._deployqbrix()
+        if self.in_process:
+            self._deployqbrix_in_process()
+        else:
+            self._deployqbrix()
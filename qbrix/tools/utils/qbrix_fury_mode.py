@@ -1,58 +1,220 @@
 import datetime
-import multiprocessing
 import time
 from abc import ABC
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
+from cumulusci.core.exceptions import TaskOptionsError
 from cumulusci.core.tasks import BaseTask
 
 from qbrix.tools.shared.qbrix_cci_tasks import run_cci_flow, run_cci_task
 
+# Fury Mode Defaults
+FURY_MODE_MAX_WORKERS = 4
 
-def execute_tasks_and_flows(tasks_and_flows, org_name, **options):
 
+def _resolve_item(reference, items):
     """
-    Runner for Tasks and Flows using multiprocessing
+    Finds the (name, type) item for a name used in the dependencies option. A task and a flow can share a name, in which case the reference must be prefixed with task: or flow:
     """
 
-    processes = []
-    for item in tasks_and_flows:
-        if item[1] == "task":
-            process = multiprocessing.Process(target=run_cci_task_wrapper, args=(item[0], org_name,))
-        elif item[1] == "flow":
-            process = multiprocessing.Process(target=run_cci_flow_wrapper, args=(item[0], org_name, options,))
-        else:
-            print("Invalid item type:", item)
-            continue
+    item_type, _, name = str(reference).rpartition(":")
+    if item_type in ("task", "flow"):
+        matches = [item for item in items if item == (name, item_type)]
+    else:
+        matches = [item for item in items if item[0] == reference]
+
+    if len(matches) > 1:
+        raise TaskOptionsError(f"[{reference}] is both a task and a flow in Fury Mode. Use task:{reference} or flow:{reference} in the dependencies.")
+    return matches[0] if matches else None
+
+
+def build_execution_graph(tasks_and_flows, dependencies=None):
+    """
+    Builds and validates the dependency graph for Fury Mode
+
+    Args:
+        tasks_and_flows (list): List of (name, "task" or "flow") tuples
+        dependencies (dict): (Optional) Item name -> list of item names which must complete first. When a task and a flow share a name, prefix it with task: or flow:
+
+    Returns:
+        dict: (name, type) -> list of (name, type) items it depends on
+    """
+
+    items = [tuple(item) for item in tasks_and_flows]
+    for item in items:
+        if item[1] not in ("task", "flow"):
+            raise TaskOptionsError(f"Invalid item type [{item[1]}] for [{item[0]}] in Fury Mode. Use task or flow.")
+    if len(items) != len(set(items)):
+        raise TaskOptionsError("Each task and flow can only be listed once in Fury Mode.")
+
+    graph = {item: [] for item in items}
+    for name, depends_on in (dependencies or {}).items():
+        item = _resolve_item(name, items)
+        if item is None:
+            raise TaskOptionsError(f"Dependency defined for [{name}] which is not in the list of tasks and flows.")
+        if isinstance(depends_on, str):
+            depends_on = [depends_on]
+        for dependency in depends_on or []:
+            dependency_item = _resolve_item(dependency, items)
+            if dependency_item is None:
+                raise TaskOptionsError(f"[{name}] depends on [{dependency}] which is not in the list of tasks and flows.")
+            graph[item].append(dependency_item)
+
+    # Check for cycles
+    visited = {}
+
+    def _visit(item, path):
+        if visited.get(item) == "done":
+            return
+        if visited.get(item) == "visiting":
+            raise TaskOptionsError(f"Circular dependency found in Fury Mode: {' -> '.join(name for name, _ in path + [item])}")
+        visited[item] = "visiting"
+        for dependency in graph[item]:
+            _visit(dependency, path + [item])
+        visited[item] = "done"
+
+    for item in graph:
+        _visit(item, [])
+
+    return graph
+
+
+def execute_tasks_and_flows(tasks_and_flows, org_name, dependencies=None, max_workers=FURY_MODE_MAX_WORKERS, **options):
+
+    """
+    Runner for Tasks and Flows using a pool of worker processes. Items are started as soon as everything they depend on has completed, with no more than max_workers running at once. When an item fails, everything which depends on it is cancelled.
+
+    Args:
+        tasks_and_flows (list): List of (name, "task" or "flow") tuples
+        org_name (str): Alias of the target org
+        dependencies (dict): (Optional) Item name -> list of item names which must complete first
+        max_workers (int): (Optional) Maximum number of items to run at the same time. Defaults to 4
+
+    Returns:
+        dict: (name, type) -> {"type", "status", "duration", "error"}. Status is COMPLETE, ERROR or CANCELLED.
+    """
+
+    graph = build_execution_graph(tasks_and_flows, dependencies)
+    results = {}
+    for item in graph:
+        results[item] = {"type": item[1], "status": "PENDING", "duration": 0.0, "error": None}
+
+    def _cancel_dependents(failed_item):
+        for item, depends_on in graph.items():
+            if failed_item in depends_on and results[item]["status"] == "PENDING":
+                results[item]["status"] = "CANCELLED"
+                results[item]["error"] = f"Dependency [{failed_item[0]}] did not complete"
+                print(f"{item[0]} | CANCELLED | {results[item]['error']}")
+                _cancel_dependents(item)
+
+    running = {}
+    with ProcessPoolExecutor(max_workers=max(1, int(max_workers))) as executor:
+        while True:
+            for item, depends_on in graph.items():
+                if results[item]["status"] != "PENDING":
+                    continue
+                if all(results[d]["status"] == "COMPLETE" for d in depends_on):
+                    results[item]["status"] = "RUNNING"
+                    name, item_type = item
+                    if item_type == "flow":
+                        future = executor.submit(run_cci_flow_wrapper, name, org_name, options)
+                    else:
+                        future = executor.submit(run_cci_task_wrapper, name, org_name)
+                    running[future] = item
+
+            if not running:
+                break
 
-        processes.append(process)
-        process.start()
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = running.pop(future)
+                try:
+                    ok, duration, error = future.result()
+                except Exception as e:
+                    ok, duration, error = False, 0.0, str(e)
+
+                results[item]["status"] = "COMPLETE" if ok else "ERROR"
+                results[item]["duration"] = duration
+                results[item]["error"] = error
+                if not ok:
+                    _cancel_dependents(item)
+
+    for item, depends_on in graph.items():
+        results[item]["depends_on"] = depends_on
+
+    return results
+
+
+def get_critical_path(results):
+    """
+    Finds the chain of dependent items with the longest total duration
+
+    Args:
+        results (dict): The results returned by execute_tasks_and_flows
+
+    Returns:
+        tuple: (list of (name, type) items in run order, total duration in seconds)
+    """
+
+    longest = {}
+
+    def _longest(name):
+        if name not in longest:
+            best = ([], 0.0)
+            for dependency in results[name].get("depends_on", []):
+                path = _longest(dependency)
+                if path[1] > best[1]:
+                    best = path
+            longest[name] = (best[0] + [name], best[1] + results[name]["duration"])
+        return longest[name]
+
+    critical = ([], 0.0)
+    for name in results:
+        path = _longest(name)
+        if path[1] > critical[1]:
+            critical = path
+
+    return critical
 
-    for process in processes:
-        process.join()
 
 def run_cci_flow_wrapper(flow_name, org_name, options):
+    start_time = time.time()
     try:
         print(f"{flow_name} | STARTED")
         run_cci_flow(flow_name, org_name, **options)
     except Exception as e:
         print(f"{flow_name} | ERROR | {e}")
+        return False, time.time() - start_time, str(e)
     else:
         print(f"{flow_name} | COMPLETE!")
+        return True, time.time() - start_time, None
 
 def run_cci_task_wrapper(task_name, org_name):
+    start_time = time.time()
     try:
         print(f"{task_name} | STARTED")
         run_cci_task(task_name, org_name)
     except Exception as e:
         print(f"{task_name} | ERROR | {e}")
+        return False, time.time() - start_time, str(e)
     else:
         print(f"{task_name} | COMPLETE")
+        return True, time.time() - start_time, None
 
 
 
 class RunFuryMode(BaseTask, ABC):
     task_docs = """
     Parallel Task, Flow and Script Runner for Q Brix. Use with caution.
+
+    Items run on a pool of max_workers processes. Use the dependencies option to make an item wait for others to complete, for example:
+
+    dependencies:
+        deploy_data: [deploy_metadata]
+
+    When a task and a flow share a name, refer to them as task:name or flow:name in the dependencies.
+
+    If an item fails, everything which depends on it is cancelled. A summary with the status and duration of each item and the critical path is shown at the end.
     """
 
     task_options = {
@@ -67,6 +229,14 @@ class RunFuryMode(BaseTask, ABC):
         "tasks": {
             "description": "List of Tasks to execute. These must already be defined with options in the tasks area.",
             "required": False
+        },
+        "dependencies": {
+            "description": "Dictionary of task or flow name to the list of task or flow names which must complete before it starts.",
+            "required": False
+        },
+        "max_workers": {
+            "description": "Maximum number of tasks and flows to run at the same time. Defaults to 4",
+            "required": False
         }
     }
 
@@ -74,6 +244,20 @@ class RunFuryMode(BaseTask, ABC):
         super(RunFuryMode, self)._init_options(kwargs)
         self.flows = self.options["flows"] if "flows" in self.options else None
         self.tasks = self.options["tasks"] if "tasks" in self.options else None
+        self.dependencies = self.options["dependencies"] if "dependencies" in self.options else None
+        self.max_workers = int(self.options["max_workers"]) if "max_workers" in self.options else FURY_MODE_MAX_WORKERS
+
+    def _log_summary(self, results):
+        self.logger.info("\nFury Mode Summary\n")
+        for (name, _), result in results.items():
+            line = f"{name} ({result['type']}) | {result['status']} | {str(datetime.timedelta(seconds=round(result['duration'])))}"
+            if result["error"]:
+                line += f" | {result['error']}"
+            self.logger.info(line)
+
+        path, duration = get_critical_path(results)
+        if path:
+            self.logger.info(f"\nCritical Path ({str(datetime.timedelta(seconds=round(duration)))}): {' -> '.join(name for name, _ in path)}")
 
     def _run_task(self):
 
@@ -104,10 +288,22 @@ class RunFuryMode(BaseTask, ABC):
                 process_request_list.append((task, "task"))
                 task_count += 1
 
-        self.logger.info(f"\nStarting Fury Mode\nRunning {flow_count} flow(s) and {task_count} task(s)\n")
+        self.logger.info(f"\nStarting Fury Mode\nRunning {flow_count} flow(s) and {task_count} task(s) with up to {self.max_workers} at a time\n")
         start_time = time.time()
-        execute_tasks_and_flows(tasks_and_flows=process_request_list, org_name=self.org_config.name, options=self.options)
+        results = execute_tasks_and_flows(
+            tasks_and_flows=process_request_list,
+            org_name=self.org_config.name,
+            dependencies=self.dependencies,
+            max_workers=self.max_workers,
+        )
         end_time = time.time()
         execution_time = end_time - start_time
         formatted_time = str(datetime.timedelta(seconds=execution_time))
+
+        self._log_summary(results)
+
+        failed = [name for (name, _), result in results.items() if result["status"] != "COMPLETE"]
+        if failed:
+            raise Exception(f"Fury Mode did not complete. Failed or cancelled: {', '.join(failed)}")
+
         self.logger.info(f"\n{task_count + flow_count} requests completed in {formatted_time}\nNormal Mode Restored. Tasks and Flows have completed.")
@@ -7,7 +7,6 @@ This utility allows a QBrix Developer to tap into the org pool
 import json
 import os
 import subprocess
-import requests
 import json
 import socket
 from abc import abstractmethod
@@ -16,6 +15,8 @@ from cumulusci.core.exceptions import CommandException
 from cumulusci.core.keychain import BaseProjectKeychain
 from cumulusci.tasks.command import Command
 
+from qbrix.tools.shared.qbrix_http import http_request
+
 
 class Glooop(Command):
     keychain_class = BaseProjectKeychain
@@ -100,7 +101,7 @@ class Glooop(Command):
             'Authorization': f'Bearer {self._getQlabsAccessToken()}',
             'Content-Type': 'application/json'
             }
-            response=requests.request("POST", url, headers=headers, data=payload)
+            response=http_request("POST", url, headers=headers, data=payload)
             data = json.loads(response.text)
             return data
         except Exception as ex:
@@ -118,7 +119,7 @@ class Glooop(Command):
             'Authorization': f'Bearer {self._getQlabsAccessToken()}',
             'Content-Type': 'application/json'
             }
-            response=requests.request("POST", url, headers=headers, data=payload)
+            response=http_request("POST", url, headers=headers, data=payload)
             glooopResult = json.loads(response.text)
             glooopAccessToken =glooopResult["accessToken"]
             glooopInstanceUrl =glooopResult["instanceUrl"]
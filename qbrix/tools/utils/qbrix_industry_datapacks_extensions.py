@@ -7,13 +7,14 @@ import sys
 from abc import abstractmethod
 from time import sleep
 
-import requests
 from cumulusci.core.config import ScratchOrgConfig
 from cumulusci.core.exceptions import CommandException, TaskOptionsError
 from cumulusci.core.keychain import BaseProjectKeychain
 from cumulusci.tasks.sfdx import SFDXBaseTask
 from genericpath import isfile
 
+from qbrix.tools.shared.qbrix_http import http_request
+
 LOAD_COMMAND = "sfdx force:apex:execute "
 
 #TODO: MOVE OUT OT Industries BaseConfig
@@ -128,7 +129,7 @@ class SFIDirectDatapackDeployer(SFDXBaseTask):
             }
 
             #self.logger.info(f"Payload::{payload}")
-            response = requests.request("POST", url, headers=headers, data=payload)
+            response = http_request("POST", url, headers=headers, data=payload)
             payloadresponse = json.loads(response.text)
 
             status =payloadresponse["status"]
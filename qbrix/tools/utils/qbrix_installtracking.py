@@ -14,6 +14,7 @@ from cumulusci.core.exceptions import CommandException
 from cumulusci.tasks.sfdx import SFDXBaseTask
 from cumulusci.cli.runtime import CliRuntime
 from qbrix.tools.shared.qbrix_authentication import * 
+from qbrix.tools.shared.qbrix_http import http_request
 from qbrix.tools.shared.qbrix_project_tasks import replace_file_text, run_command
 
 LOAD_COMMAND = "sfdx force:apex:execute "
@@ -270,7 +271,7 @@ class InstallRecorder(SFDXBaseTask):
             "Authorization": f"Bearer {self.accesstoken}",
             "Content-Type": "application/json",
         }
-        response = requests.request("GET", url, headers=headers)
+        response = http_request("GET", url, headers=headers)
         data = json.loads(response.text)
 
         return float(data[-1]["version"])
@@ -145,14 +145,17 @@ class MassFileOps(BaseTask, ABC):
             "TOOL HAS NOT BEEN FULLY TESTED YET. PLEASE DO NOT USE. TESTING ONLY."
         )
         target_org_alias = input("Please enter the alias of the connected org: ")
-        metadata_diff = compare_metadata(target_org_alias)
+        metadata_diff = compare_metadata(target_org_alias, stage_files=False)
         if metadata_diff:
             print("Differences found:")
             print(metadata_diff)
             if input("\nWould you like to push these changes? (y/n) ").lower() == "y":
-                push_result = push_changes(target_org_alias)
-                print("Push result:")
-                print(push_result)
+                try:
+                    push_result = push_changes(target_org_alias, metadata_diff)
+                    print("Push result:")
+                    print(push_result)
+                except Exception as e:
+                    self.logger.error(f"Push failed: {e}")
         else:
             print("No differences found")
 
@@ -1,12 +1,11 @@
 import os
 import re
-import shutil
 import subprocess
 from abc import ABC
 
-from cumulusci.cli.runtime import CliRuntime
 from cumulusci.core.tasks import BaseTask
 
+from qbrix.tools.shared.qbrix_cci_tasks import rebuild_cci_cache
 from qbrix.tools.shared.qbrix_console_utils import init_logger
 
 log = init_logger()
@@ -218,10 +217,7 @@ class MetadataChecker(BaseTask, ABC):
 
 
     def _refresh_base(self):
-        if os.path.exists(self.cci_cache_path):
-            for sub in os.listdir(self.cci_cache_path):
-                shutil.rmtree(os.path.join(self.cci_cache_path, sub), ignore_errors=True)
-        flow_coordinator = CliRuntime().get_flow(self.dependency_flow)
+        rebuild_cci_cache(self.cci_cache_path, self.dependency_flow)
 
 
 
@@ -2,7 +2,6 @@ import time
 from abc import ABC, abstractmethod
 from time import sleep
 
-import requests
 from cumulusci.core.config import ScratchOrgConfig
 from cumulusci.core.keychain import BaseProjectKeychain
 from cumulusci.core.tasks import BaseTask
@@ -10,6 +9,7 @@ from cumulusci.tasks.sfdx import SFDXBaseTask
 
 from qbrix.salesforce.qbrix_salesforce_tasks import salesforce_query
 from qbrix.tools.shared.qbrix_console_utils import init_logger
+from qbrix.tools.shared.qbrix_http import http_request
 
 log = init_logger()
 
@@ -139,7 +139,7 @@ class RunDataTool(SFDXBaseTask):
 
             self.logger.info(
                 f"NextGen Data Tool: Starting Job\n\nRequesting Data Job with the following configuration:\n\nData Collection ID: {data_key}\nUsername: {self.org_config.username}\nEmail: {email_address}\nScratch Org Mode: {IsScratchOrg}\n")
-            result = requests.post(self.url, json=data, headers=headers)
+            result = http_request("POST", self.url, json=data, headers=headers)
             jsonResponse = result.json()
 
             if jsonResponse is not None:
@@ -163,7 +163,7 @@ class RunDataTool(SFDXBaseTask):
             while True:
 
                 # Get Job Status
-                check_job = requests.get(job_status_check_url)
+                check_job = http_request("GET", job_status_check_url)
 
                 # print("\nResult\n")
                 # print(check_job.json())
@@ -3,8 +3,10 @@ import os
 import random
 import shutil
 import subprocess
+import threading
 import time
 from abc import abstractmethod
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from time import sleep
 
 import yaml
@@ -125,6 +127,11 @@ class Spin(SFDXBaseTask):
         "deployqbrix": {
             "description": "Pipe delimited string of QBrix names to deploy once the org is stood up.",
             "required": False
+        },
+        "maxparalleldeploys": {
+            "description": "Maximum number of QBrix to deploy at the same time. Default is 1, which deploys one at a time in the order given. When higher, QBrix only wait for the requested QBrix they list directly as sources. Sources which are not requested (and their own sources) are not checked, so only raise this when the requested QBrix do not share or depend on each other through other sources",
+            "required": False,
+            "default": 1
         }
     }
 
@@ -303,6 +310,11 @@ class Spin(SFDXBaseTask):
             self.githubpat = self.options["githubpat"]
 
 
+        if "maxparalleldeploys" not in self.options or not self.options["maxparalleldeploys"]:
+            self.maxparalleldeploys = 1
+        else:
+            self.maxparalleldeploys = max(1, int(self.options["maxparalleldeploys"]))
+
         if "deployqbrix" in self.options:
             if self.options["deployqbrix"] is None or self.options["deployqbrix"] == "":
                 self.deployqbrix = []
@@ -374,37 +386,139 @@ class Spin(SFDXBaseTask):
 
                 print(result.stdout)
 
-    def _deployqbrix(self):
+    def _getqbrixdependencies(self):
 
-        """ Deploy Required Q Brix"""
+        """Build the dependency graph between the requested Q Brix from the sources in each cumulusci.yml"""
+
+        graph = {x: [] for x in self.deployqbrix}
 
         for (x) in self.deployqbrix:
-            targetdir = os.path.join(".qbrix", x)
+            ymlpath = os.path.join(".qbrix", x, "cumulusci.yml")
+            if not os.path.isfile(ymlpath):
+                continue
 
-            if os.path.isdir(targetdir):
-                if self.mode == "TEMPLATE":
-                    cmd = f"cci org import {self.spinusername} {self.cciorg}"
-                else:
-                    cmd = f"cci org import {self.cciorg} {self.cciorg}"
+            try:
+                with open(ymlpath, 'r', encoding="utf-8") as f:
+                    data = yaml.safe_load(f) or {}
+            except Exception as e:
+                self.logger.error(f"Unable to read sources for {x}: {e}")
+                continue
+
+            for source in (data.get("sources") or {}).values():
+                if not isinstance(source, dict) or not source.get("github"):
+                    continue
+                reponame = source["github"].rstrip("/").split("/")[-1]
+                if reponame.endswith(".git"):
+                    reponame = reponame[:-4]
+                if reponame in graph and reponame != x and reponame not in graph[x]:
+                    graph[x].append(reponame)
 
-                result = subprocess.run([f"{cmd}"], shell=True, capture_output=True, cwd=targetdir, check=True)
-                stdoutres = result.stdout.splitlines()
-                [self.logger.info(i) for i in stdoutres]
+        return graph
 
-                cmd = f"cci flow run deploy_qbrix --org {self.cciorg}"
-                self.logger.info(f"Running qbix: {cmd} againsts {targetdir}")
+    def _deploysingleqbrix(self, x):
 
-                with subprocess.Popen(['cci', 'flow', 'run', 'deploy_qbrix', '--org', self.cciorg],
-                        stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=1,
-                        universal_newlines=True, cwd=targetdir) as p:
-                    for line in p.stdout:
-                        self.logger.info(line[20:])  # process line here
+        """Deploy a single Q Brix and return the time taken"""
+
+        targetdir = os.path.join(".qbrix", x)
+        starttime = time.time()
+
+        if self.mode == "TEMPLATE":
+            cmd = f"cci org import {self.spinusername} {self.cciorg}"
+        else:
+            cmd = f"cci org import {self.cciorg} {self.cciorg}"
+
+        # org imports update the shared keychain, so only run one at a time
+        with self._orglock:
+            result = subprocess.run([f"{cmd}"], shell=True, capture_output=True, cwd=targetdir, check=True)
+        stdoutres = result.stdout.splitlines()
+        [self.logger.info(i) for i in stdoutres]
+
+        cmd = f"cci flow run deploy_qbrix --org {self.cciorg}"
+        self.logger.info(f"Running qbix: {cmd} againsts {targetdir}")
+
+        with subprocess.Popen(['cci', 'flow', 'run', 'deploy_qbrix', '--org', self.cciorg],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=1,
+                universal_newlines=True, cwd=targetdir) as p:
+            for line in p.stdout:
+                self.logger.info(f"{x} | {line[20:]}")  # process line here
+
+        if p.returncode != 0:
+            raise subprocess.CalledProcessError(p.returncode, f"Failure running QBrix {x}")
+
+        return time.time() - starttime
+
+    def _deployqbrix(self):
 
-                if p.returncode != 0:
-                    raise subprocess.CalledProcessError(p.returncode, f"Failure running QBrix {x}")
+        """ Deploy Required Q Brix"""
 
+        qbrixlist = []
+        for (x) in self.deployqbrix:
+            if os.path.isdir(os.path.join(".qbrix", x)):
+                qbrixlist.append(x)
             else:
-                self.logger.error(f"{targetdir} is not found")
+                self.logger.error(f"{os.path.join('.qbrix', x)} is not found")
+
+        if len(qbrixlist) == 0:
+            return
+
+        graph = {x: [d for d in deps if d in qbrixlist] for x, deps in self._getqbrixdependencies().items() if x in qbrixlist}
+
+        # one at a time keeps the order given
+        if self.maxparalleldeploys == 1:
+            for i in range(1, len(qbrixlist)):
+                if qbrixlist[i - 1] not in graph[qbrixlist[i]]:
+                    graph[qbrixlist[i]].append(qbrixlist[i - 1])
+
+        self.logger.info(f"Deploying {len(qbrixlist)} QBrix with up to {self.maxparalleldeploys} at a time. Dependencies: {graph}")
+
+        self._orglock = threading.Lock()
+        results = {x: {"status": "PENDING", "duration": 0.0, "error": None} for x in qbrixlist}
+
+        def _cancel_dependents(failed):
+            for x, deps in graph.items():
+                if failed in deps and results[x]["status"] == "PENDING":
+                    results[x]["status"] = "CANCELLED"
+                    results[x]["error"] = f"{failed} did not deploy"
+                    _cancel_dependents(x)
+
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.maxparalleldeploys) as executor:
+            while True:
+                for x in qbrixlist:
+                    if results[x]["status"] == "PENDING" and all(results[d]["status"] == "COMPLETE" for d in graph[x]):
+                        results[x]["status"] = "RUNNING"
+                        running[executor.submit(self._deploysingleqbrix, x)] = x
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    x = running.pop(future)
+                    try:
+                        results[x]["duration"] = future.result()
+                        results[x]["status"] = "COMPLETE"
+                    except Exception as e:
+                        results[x]["status"] = "ERROR"
+                        results[x]["error"] = str(e)
+                        _cancel_dependents(x)
+
+        # anything left pending has a circular dependency
+        for x in qbrixlist:
+            if results[x]["status"] == "PENDING":
+                results[x]["status"] = "CANCELLED"
+                results[x]["error"] = "Circular dependency between QBrix sources"
+
+        self.logger.info("QBrix Deploy Summary")
+        for x in qbrixlist:
+            line = f"{x} | {results[x]['status']} | {results[x]['duration']:.0f}s"
+            if results[x]["error"]:
+                line = f"{line} | {results[x]['error']}"
+            self.logger.info(line)
+
+        failed = [x for x in qbrixlist if results[x]["status"] != "COMPLETE"]
+        if failed:
+            raise CommandException(f"Failure running QBrix {', '.join(failed)}")
 
     def _submittemplate(self):
 
@@ -424,7 +538,6 @@ class Spin(SFDXBaseTask):
         self.logger.info(jsonresult)
 
         self.signuprequestid = jsonresult["result"]["id"]
-        sleep(10)
         self.logger.info(f"Signup Request Id: {self.signuprequestid}")
 
     def _submitscratchorg(self, retrycount=0):
@@ -442,10 +555,11 @@ class Spin(SFDXBaseTask):
         if (jsonresult["status"] != 0
                 and jsonresult["result"]["name"] == 'REQUEST_LIMIT_EXCEEDED'
                 and retrycount < 3):
-            # REQUEST_LIMIT_EXCEEDED - pause a few seconds to give api limits a breather
-            sleep(15)
+            # REQUEST_LIMIT_EXCEEDED - back off to give api limits a breather
+            sleep(self._backoffdelay(15, retrycount, 120))
             retrycount += 1
             self._submitscratchorg(retrycount=retrycount)
+            return
 
         if (jsonresult["status"] != 0):
             raise CommandException("Scratch Org Create Failed.")
@@ -502,20 +616,54 @@ class Spin(SFDXBaseTask):
 
         return self.subdomain
 
+    def _backoffdelay(self, initialdelay, attempt, maxdelay):
+
+        """Exponential backoff delay with jitter, capped at maxdelay"""
+
+        delay = min(initialdelay * (2 ** attempt), maxdelay)
+        return random.uniform(delay / 2, delay)
+
+    def _waitforstate(self, state, probe, timeout, initialdelay=5, maxdelay=60):
+
+        """
+        Polls a readiness probe with exponential backoff until it returns a result, or raises once the timeout (in seconds) is reached.
+        Errors raised by the probe count as not ready, except CommandException which stops the wait.
+        """
+
+        starttime = time.time()
+        attempt = 0
+        while True:
+            try:
+                result = probe()
+            except CommandException:
+                raise
+            except Exception as e:
+                self.logger.info(f"{state}: not ready yet ({e})")
+                result = None
+
+            elapsed = time.time() - starttime
+            if result:
+                self.statetimings[state] = self.statetimings.get(state, 0) + elapsed
+                self.logger.info(f"{state}: ready after {elapsed:.0f}s ({attempt + 1} checks)")
+                return result
+
+            remaining = timeout - elapsed
+            if remaining <= 0:
+                self.statetimings[state] = self.statetimings.get(state, 0) + elapsed
+                raise CommandException(f"{state}: not ready within {timeout} seconds")
+
+            delay = min(self._backoffdelay(initialdelay, attempt, maxdelay), remaining)
+            self.logger.info(f"{state}: checking again in {delay:.0f}s")
+            sleep(delay)
+            attempt += 1
+
     def _monitorrequest(self):
 
         """Request Monitor"""
 
-        maxwait = self.maxwait
         if hasattr(self, "signuprequestid"):
-            while not self._checktempaltestatuscomplete():
-                sleep(60)
-                maxwait = maxwait - 1
-
-                if maxwait == 0:
-                    raise CommandException("Max Wait Time Met")
-                else:
-                    self.logger.info(f"Polling in 60 seconds...{maxwait} wait cycles remain")
+            # maxwait is in minutes
+            self._waitforstate("SIGNUP_REQUEST", self._checktempaltestatuscomplete, self.maxwait * 60, initialdelay=10, maxdelay=60)
         else:
             raise CommandException("No signup request id found.")
 
@@ -552,19 +700,11 @@ class Spin(SFDXBaseTask):
             if jsonresult["result"]["Status"] == "Success":
                 if self.devhubconsumerkey is not None and self.devhubjwtkeyfile is not None:
                     self.logger.info("Spin Successful. Waiting to verify JWT connectivity...")
-                    sleep(600)  # force pause for 10 minutes to give SF core time to do the voodoo needed
                     self.spinusername = jsonresult["result"]["Username"]
                     self._forcelogout(self.spinusername)
-                    spinjwtresult = self._connectspinviajwt(jsonresult["result"]["Username"])
-                    maxjwt = 10
-                    while spinjwtresult["status"] == 1:
-                        spinjwtresult = self._connectspinviajwt(jsonresult["result"]["Username"])
-                        maxjwt = maxjwt - 1
-                        sleep(90)
-                        self.logger.info("Waiting to connect JWT...")
-                        if (maxjwt == 0):
-                            raise CommandException(
-                                "Unable to establish JWT authentication to template spin within poll time")
+                    # SF core needs time before the new org accepts JWT logins, so poll until it does
+                    spinjwtresult = self._waitforstate("JWT_AUTH", lambda: self._probejwt(self.spinusername), 1800, initialdelay=15, maxdelay=120)
+                    self._waitforstate("API_READY", lambda: self._probeapi(self.spinusername), 600)
 
                     self.logger.info(spinjwtresult)
                     self.jwtresult = spinjwtresult
@@ -609,6 +749,20 @@ class Spin(SFDXBaseTask):
         self.logger.info(jsonresult)
         return jsonresult
 
+    def _probejwt(self, signupusername: str):
+
+        """Readiness probe: JWT login to the new org succeeds"""
+
+        result = self._connectspinviajwt(signupusername)
+        return result if result["status"] == 0 else None
+
+    def _probeapi(self, signupusername: str):
+
+        """Readiness probe: first API call against the new org succeeds"""
+
+        result = subprocess.run([f"sf data query -o {signupusername} --query \"SELECT Id FROM Organization LIMIT 1\" --json"], shell=True, capture_output=True, check=True)
+        return json.loads(result.stdout)["status"] == 0
+
     def _importspinusertocciorg(self, signupusername: str):
         if self.cciorg is None:
             raise CommandException("Target CCI Org has not been set and cannot import a spin username.")
@@ -618,6 +772,7 @@ class Spin(SFDXBaseTask):
 
     def _run_task(self):
         self._prepruntime()
+        self.statetimings = {}
 
         # we may need to pre pull qbrix down to for pre-deploy
         self._getrequestedqbrixfordeploy()
@@ -639,6 +794,7 @@ class Spin(SFDXBaseTask):
                 raise CommandException("Scratch org config not set.")
 
             self._submitscratchorg()
+            self._waitforstate("API_READY", lambda: self._probeapi(self.spinusername), 600)
 
         self.logger.info(self.cciorg)
         self.logger.info(self.mode)
@@ -646,6 +802,8 @@ class Spin(SFDXBaseTask):
 
         self._importspinusertocciorg(self.spinusername)
 
+        self.logger.info(f"Time spent waiting per state: { {k: f'{v:.0f}s' for k, v in self.statetimings.items()} }")
+
         # deploy any qbrixs prior
         self._deployqbrix()
 
@@ -1,16 +1,73 @@
+import ast
 import glob
 import json
 import os
 import subprocess
 from abc import abstractmethod
+from urllib.parse import quote_plus
 from qbrix.tools.shared.qbrix_authentication import *
 
-import requests
 from cumulusci.core.config import ScratchOrgConfig
 from cumulusci.core.exceptions import CommandException
 from cumulusci.core.keychain import BaseProjectKeychain
 from cumulusci.tasks.sfdx import SFDXBaseTask
 
+from qbrix.tools.shared.qbrix_composite_tasks import COMPOSITE_BATCH_LIMIT, SOQL_IN_CHUNK_SIZE, chunk_list, format_soql_in
+from qbrix.tools.shared.qbrix_http import http_request
+from qbrix.tools.shared.qbrix_org_index import get_org_index, get_org_max_api_version, org_index
+from qbrix.tools.shared.qbrix_persistent_cache import PERSISTENT_CACHE_TTL_SECONDS, persistent_cache
+from qbrix.tools.shared.qbrix_predicate_cache import invalidate_org_predicates, predicate_cache
+
+# org_config predicates which can be answered ahead of time by NGOrgConfigPrefetch. Only positive results are stored, since a
+# dependency install step in the flow can turn a False into True before the step guarded by the when clause runs.
+PREFETCH_PREDICATES = [
+    "is_psl_in_org",
+    "is_namespace_installed",
+    "is_package_installed",
+]
+
+
+def extract_predicate_calls(expression):
+    """
+    Finds calls to org_config predicates within a when clause, for example org_config.is_psl_in_org('OmniStudioDesigner')
+
+    Only calls where every argument is a literal value are returned, since other arguments cannot be known before the step runs.
+
+    Args:
+        expression (str): The when clause to inspect
+
+    Returns:
+        list: (predicate, args, kwargs) tuples for each call found
+    """
+
+    if not expression:
+        return []
+
+    try:
+        tree = ast.parse(str(expression), mode="eval")
+    except SyntaxError:
+        return []
+
+    calls = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call) or not isinstance(node.func, ast.Attribute):
+            continue
+        if not isinstance(node.func.value, ast.Name) or node.func.value.id != "org_config":
+            continue
+        if node.func.attr not in PREFETCH_PREDICATES:
+            continue
+        try:
+            args = [ast.literal_eval(a) for a in node.args]
+            kwargs = {k.arg: ast.literal_eval(k.value) for k in node.keywords}
+        except ValueError:
+            continue
+        if None in kwargs:
+            continue
+        calls.append((node.func.attr, args, kwargs))
+
+    return calls
+
+
 class NGTrapDoorInjector(SFDXBaseTask):
     task_options = {
         
@@ -142,7 +199,7 @@ class NGTrapDoorInjector(SFDXBaseTask):
         'Content-Type': 'application/json'
         }
 
-        response = requests.request("POST", url, headers=headers, data=payload)
+        response = http_request("POST", url, headers=headers, data=payload)
         #self.logger.info(response)
         #print(response.text)
 
@@ -302,11 +359,21 @@ class NGOrgConfig(SFDXBaseTask):
         "org": {
             "description": "Value to replace every instance of the find value in the source file.",
             "required": False
+        },
+        "persist_cache": {
+            "description": "Set to True to keep qbrix_cache values in a local SQLite file (.qbrix/qbrix_cache.db) so they are shared between cci runs against the same org. Defaults to False",
+            "required": False
+        },
+        "cache_ttl": {
+            "description": "Number of seconds persisted qbrix_cache values are kept for. Defaults to 3600",
+            "required": False
         }
     }
 
     task_docs = """
     Gathers additional information from the source org and adds/updates the org_config collection so that you can then use these throughout your flow steps to define where clauses for tasks.
+
+    When persist_cache is True, values added with qbrix_cache_set (and the qbrix_cache_add task) are also stored on disk for the org and read back by later cci runs until they expire.
     """
 
     def _init_options(self, kwargs):
@@ -370,6 +437,9 @@ class NGOrgConfig(SFDXBaseTask):
         else:
             self.instanceurl = self.options["instanceurl"]
 
+        self.persist_cache = str(self.options.get("persist_cache")).lower() in ("true", "1", "yes")
+        self.cache_ttl = int(self.options["cache_ttl"]) if "cache_ttl" in self.options and self.options["cache_ttl"] else PERSISTENT_CACHE_TTL_SECONDS
+
         self._inject_max_runtime()
         self._seed_initial_cache()
 
@@ -385,19 +455,20 @@ class NGOrgConfig(SFDXBaseTask):
             self.org_config.is_qbrix_installed = self._is_qbrix_installed
 
         if self.org_config.is_object_in_org is None:
-            self.org_config.is_object_in_org = self._is_object_present_in_org
+            self.org_config.is_object_in_org = self._memoize("is_object_in_org", self._is_object_present_in_org)
 
         if self.org_config.is_psl_in_org is None:
-            self.org_config.is_psl_in_org = self._is_psl_present_in_org
+            self.org_config.is_psl_in_org = self._memoize("is_psl_in_org", self._is_psl_present_in_org)
 
         if self.org_config.is_ps_in_org is None:
+            # Not cached, since permission sets are deployed and assigned by many tasks which do not clear the predicate cache
             self.org_config.is_ps_in_org = self._is_ps_present_in_org
 
         if self.org_config.is_namespace_installed is None:
-            self.org_config.is_namespace_installed = self._is_package_namespace_installed
+            self.org_config.is_namespace_installed = self._memoize("is_namespace_installed", self._is_package_namespace_installed)
 
         if self.org_config.is_package_installed is None:
-            self.org_config.is_package_installed = self._is_package_installed
+            self.org_config.is_package_installed = self._memoize("is_package_installed", self._is_package_installed)
 
         if self.org_config.is_org_identifier is None:
             self.org_config.is_org_identifier = self._check_id_or_guid_in_org
@@ -408,6 +479,9 @@ class NGOrgConfig(SFDXBaseTask):
         if self.org_config.is_bulk_check_psl_minimal_qty_available_in_org is None:
             self.org_config.is_bulk_check_psl_minimal_qty_available_in_org = self._is_bulk_check_psl_minimal_qty_available_in_org
 
+        if self.org_config.get_psl_availability is None:
+            self.org_config.get_psl_availability = self._get_psl_availability
+
         if self.org_config.qbrix_cache_get is None:
             self.org_config.qbrix_cache_get = self._cache_item_get
 
@@ -415,6 +489,7 @@ class NGOrgConfig(SFDXBaseTask):
             self.org_config.qbrix_cache_set = self._cache_item_set
 
         if self.org_config.is_data_present is None:
+            # Not cached, since data loads (load_dataset, snowfakery etc.) do not clear the predicate cache and a stale answer would load data twice
             self.org_config.is_data_present = self._is_data_present_in_org
 
         if self.org_config.is_file is None:
@@ -434,6 +509,31 @@ class NGOrgConfig(SFDXBaseTask):
 
 
 
+    def _cache_org_id(self):
+        return self.org_config.org_id or self.instanceurl
+
+    def _memoize(self, predicate, func):
+        """
+        Wraps an org_config predicate so that results are cached per org and arguments in the shared predicate cache, which is kept on disk between cci invocations.
+
+        Only positive results are cached. Objects, packages and PSLs are added by tasks which do not clear the cache (for example the standard update_dependencies), so a miss is checked again on the next call.
+        """
+
+        def memoized(*args, **kwargs):
+            org_id = self._cache_org_id()
+            cache_args = [list(args), kwargs]
+            found, value = predicate_cache.get(org_id, predicate, cache_args)
+            if found:
+                self.logger.info(f"{predicate}::{args}::cached::{value}")
+                return value
+
+            value = func(*args, **kwargs)
+            if value:
+                predicate_cache.set(org_id, predicate, cache_args, value)
+            return value
+
+        return memoized
+
     def _seed_initial_cache(self):
         if(self.org_config.qbrix_cache is None):
             self.org_config.qbrix_cache={}
@@ -442,15 +542,31 @@ class NGOrgConfig(SFDXBaseTask):
         if(self.org_config.qbrix_cache is None):
             self.org_config.qbrix_cache={}
 
+        if key not in self.org_config.qbrix_cache and self.persist_cache:
+            try:
+                found, val = persistent_cache.get(self._cache_org_id(), key)
+                if found:
+                    self.org_config.qbrix_cache[key]=val
+            except Exception as e:
+                self.logger.error(f'Unable to read persisted cache::{key}::{e}')
+
         return self.org_config.qbrix_cache.get(key)
 
-    def _cache_item_set(self,key,val):
+    def _cache_item_set(self,key,val,ttl=None):
         if(self.org_config.qbrix_cache is None):
             self.org_config.qbrix_cache={}
 
         self.logger.info(f'Cache::{key}::{val}')
         self.org_config.qbrix_cache[key]=val
 
+        if self.persist_cache:
+            try:
+                persistent_cache.set(self._cache_org_id(), key, val, ttl or self.cache_ttl)
+            except (TypeError, ValueError) as e:
+                self.logger.info(f'Cache::{key}::not persisted, value is not JSON serializable::{e}')
+            except Exception as e:
+                self.logger.error(f'Unable to persist cache::{key}::{e}')
+
     def _is_scratch_org(self):
         return ".scratch." in self.instanceurl
 
@@ -466,48 +582,86 @@ class NGOrgConfig(SFDXBaseTask):
 
 
 
-    def _is_qbrix_installed(self, qbrixname):
+    def _predicate_query_url(self, predicate, args):
+        """Returns the REST query url (relative to /services/data) used to answer a predicate"""
 
-        url = f"{self.instanceurl}/services/data/v56.0/query/?q=select+MasterLabel+from+xDO_Base_QBrix_Register__mdt+where+MasterLabel='{qbrixname}'"
+        if predicate == "is_psl_in_org":
+            soql = f"select Id from PermissionSetLicense where (Masterlabel='{args[0]}' or DeveloperName='{args[0]}') LIMIT 1"
+            return f"v56.0/query/?q={quote_plus(soql)}"
+
+        if predicate == "is_ps_in_org":
+            soql = f"select Id from PermissionSet where (Name='{args[0]}' or Label='{args[0]}') LIMIT 1"
+            return f"v56.0/query/?q={quote_plus(soql)}"
+
+        if predicate == "is_data_present":
+            targetobject = args[0]
+            filter = args[1] if len(args) > 1 else None
+            querytarget = "tooling/query" if len(args) > 2 and args[2] else "query"
+            soql = f"select Id from {targetobject}"
+            if(not filter is None):
+                soql += f" where ({filter})"
+            return f"v56.0/{querytarget}/?q={quote_plus(soql)}"
+
+        return None
+
+    def _predicate_query_result(self, predicate, args, data):
+        """Converts the query response for a predicate into its result"""
+
+        self.logger.info(data["totalSize"])
+
+        if predicate == "is_data_present":
+            return data["totalSize"] > 0
+
+        return data["totalSize"] == 1
+
+    def _run_predicate_query(self, predicate, args):
+        url = f"{self.instanceurl}/services/data/{self._predicate_query_url(predicate, args)}"
         headers = {
             'Authorization': f'Bearer {self.accesstoken}',
             'Content-Type': 'application/json'
         }
-        response = requests.request("GET", url, headers=headers)
-        # print(response.text)
+        response = http_request("GET", url, headers=headers)
         data = json.loads(response.text)
-        self.logger.info(data["totalSize"])
-        return data["totalSize"] == 1
+        return self._predicate_query_result(predicate, args, data)
 
-    def _is_package_namespace_installed(self, namespace):
+    def _is_qbrix_installed(self, qbrixname):
 
-        url = f"{self.instanceurl}/services/data/v56.0/query/?q=select+NamespacePrefix+from+PackageLicense+where+NamespacePrefix='{namespace}'"
+        url = f"{self.instanceurl}/services/data/v56.0/query/?q=select+MasterLabel+from+xDO_Base_QBrix_Register__mdt+where+MasterLabel='{qbrixname}'"
         headers = {
             'Authorization': f'Bearer {self.accesstoken}',
             'Content-Type': 'application/json'
         }
-        response = requests.request("GET", url, headers=headers)
+        response = http_request("GET", url, headers=headers)
         # print(response.text)
         data = json.loads(response.text)
         self.logger.info(data["totalSize"])
         return data["totalSize"] == 1
 
+    def _get_org_index(self):
+        # objects, namespaces and packages are answered from one Global Describe and one InstalledSubscriberPackage query
+        return get_org_index(self.instanceurl, self.accesstoken, self.org_config.org_id)
+
+    def _revalidate_org_index(self):
+        return org_index.revalidate(self.instanceurl, self.accesstoken, self.org_config.org_id)
+
+    def _is_package_namespace_installed(self, namespace):
+
+        if(namespace is None):
+            return False
+
+        if str(namespace).lower() in self._get_org_index()["namespaces"]:
+            return True
+
+        # The package may have been installed since the index was built by a task which does not clear it
+        return str(namespace).lower() in self._revalidate_org_index()["namespaces"]
+
     def _is_package_installed(self, packagename):
 
-        url = f"{self.instanceurl}/services/data/v56.0/tooling/query/?q=select+SubscriberPackage.Name+from+InstalledSubscriberPackage+order+by+SubscriberPackage.Name"
-        headers = {
-            'Authorization': f'Bearer {self.accesstoken}',
-            'Content-Type': 'application/json'
-        }
-        response = requests.request("GET", url, headers=headers)
-        # print(response.text)
-        data = json.loads(response.text)
-        for pkg in data['records']:
-            if(pkg['SubscriberPackage']['Name']==packagename):
-                return True
-            #self.logger.info(pkg['SubscriberPackage']['Name'])
+        if packagename in self._get_org_index()["packages"]:
+            return True
 
-        return False
+        # The package may have been installed since the index was built by a task which does not clear it
+        return packagename in self._revalidate_org_index()["packages"]
 
 
     def _is_object_present_in_org(self, targetobject):
@@ -516,74 +670,31 @@ class NGOrgConfig(SFDXBaseTask):
         if(targetobject is None):
             return False
 
-        #SELECT  QualifiedApiName FROM EntityDefinition Where QualifiedApiName=
-
-        url = f"{self.instanceurl}/services/data/v56.0/query/?q=select+QualifiedApiName+from+EntityDefinition+where+QualifiedApiName='{targetobject}' LIMIT 1"
-        headers = {
-            'Authorization': f'Bearer {self.accesstoken}',
-            'Content-Type': 'application/json'
-        }
-        response = requests.request("GET", url, headers=headers)
-        # print(response.text)
-        data = json.loads(response.text)
-        self.logger.info(data["totalSize"])
-        return data["totalSize"] == 1
+        found = str(targetobject).lower() in self._get_org_index()["objects"]
+        if not found:
+            # The object may have been deployed since the index was built by a task which does not clear it
+            found = str(targetobject).lower() in self._revalidate_org_index()["objects"]
+        self.logger.info(found)
+        return found
 
 
     def _is_data_present_in_org(self, targetobject, filter,tooling=False):
-        default = lambda o: f"<<non-serializable: {type(o).__qualname__}>>"
-        org_config_json= json.dumps(self.org_config, default=default)
-        self.logger.info(f"{os.listdir('.') }")
 
         self.logger.info(f"_is_data_present_in_org::ttargetobject::{targetobject}::filter::{filter}")
 
-        url=""
-        querytarget="query"
-        if(tooling):
-            querytarget="tooling/query"
-
-
-        if(not filter is None):
-            url = f"{self.instanceurl}/services/data/v56.0/{querytarget}/?q=select+Id+from+{targetobject}+where+({filter})"
-        else:
-            url = f"{self.instanceurl}/services/data/v56.0/{querytarget}/?q=select+Id+from+{targetobject}"
-
-        self.logger.info(f"url::{url}")
-
-        headers = {
-            'Authorization': f'Bearer {self.accesstoken}',
-            'Content-Type': 'application/json'
-        }
-        response = requests.request("GET", url, headers=headers)
-
         try:
-            data = json.loads(response.text)
-            #self.logger.info(data)
-            self.logger.info(data["totalSize"])
-            return data["totalSize"] > 0
+            return self._run_predicate_query("is_data_present", [targetobject, filter, tooling])
         except:
             #fail closed
             return False
 
-        #fail closed
-        return False
-
 
     def _is_psl_present_in_org(self, psl):
 
         #e.g.
         #SELECT  id,MasterLabel,DeveloperName from PermissionSetLicense where (Masterlabel='OmniStudioDesigner' or DeveloperName='OmniStudioDesigner')
 
-        url = f"{self.instanceurl}/services/data/v56.0/query/?q=select+Id+from+PermissionSetLicense+where+(Masterlabel='{psl}'+or+DeveloperName='{psl}')+LIMIT+1"
-        headers = {
-            'Authorization': f'Bearer {self.accesstoken}',
-            'Content-Type': 'application/json'
-        }
-        response = requests.request("GET", url, headers=headers)
-        # print(response.text)
-        data = json.loads(response.text)
-        self.logger.info(data["totalSize"])
-        return data["totalSize"] == 1
+        return self._run_predicate_query("is_psl_in_org", [psl])
 
 
 
@@ -600,7 +711,7 @@ class NGOrgConfig(SFDXBaseTask):
             'Authorization': f'Bearer {self.accesstoken}',
             'Content-Type': 'application/json'
         }
-        response = requests.request("GET", url, headers=headers)
+        response = http_request("GET", url, headers=headers)
         #self.logger.info(response.text)
         data = json.loads(response.text)
         #self.logger.info(data["totalSize"])
@@ -613,32 +724,86 @@ class NGOrgConfig(SFDXBaseTask):
         #self.logger.info((totalqty-usedqty)>= qty)
         return (totalqty-usedqty) >= qty
 
-    def _is_bulk_check_psl_minimal_qty_available_in_org(self, srcfile):
+    def _load_psl_bulk_file(self, srcfile):
+        """Reads a PSL bulk check file, a json dictionary of PermissionSetLicense name to required quantity"""
 
-        #self.logger.info(f'Source File::{srcfile}')
-        try:
+        if(os.path.exists(srcfile)==False):
+            self.logger.error(f'PSL Bulk Check Source File not found::{srcfile}')
+            return None
 
-            #fail closed
-            if(os.path.exists(srcfile)==False):
-                self.logger.error(f'PSL Bulk Check Source File not found::{srcfile}')
-                return False
+        with open(srcfile,"r") as filehandle:
+            filecontents = filehandle.read()
 
+        if(len(filecontents)==0):
+            return None
 
-            filehandle = open(srcfile,"r")
-            filecontents = filehandle.read()
+        return json.loads(filecontents)
+
+    def _get_psl_availability(self, psls):
+        """
+        Returns license availability for the given PermissionSetLicense names (Master Label or Developer Name, matched case-insensitively) using a single query.
+
+        Args:
+            psls (list|str): PermissionSetLicense names, or the path to a PSL bulk check file
+
+        Returns:
+            dict: name -> {"total": TotalLicenses, "used": UsedLicenses, "available": TotalLicenses - UsedLicenses}. Licenses not found in the org are returned with None values.
+        """
+
+        if isinstance(psls, str):
+            psls = list((self._load_psl_bulk_file(psls) or {}).keys())
+
+        names = list(dict.fromkeys(psls))
+        availability = {name: {"total": None, "used": None, "available": None} for name in names}
+        if not names:
+            return availability
+
+        # SOQL matches names case-insensitively, so match the returned records the same way
+        requested = {}
+        for name in names:
+            requested.setdefault(name.lower(), []).append(name)
+
+        headers = {
+            'Authorization': f'Bearer {self.accesstoken}',
+            'Content-Type': 'application/json'
+        }
+
+        for chunk in chunk_list(names, SOQL_IN_CHUNK_SIZE):
+            namelist = format_soql_in(chunk)
+            soql = f"select DeveloperName,MasterLabel,TotalLicenses,UsedLicenses from PermissionSetLicense where (DeveloperName in ({namelist}) or MasterLabel in ({namelist}))"
+            url = f"{self.instanceurl}/services/data/v56.0/query/?q={quote_plus(soql)}"
+            response = http_request("GET", url, headers=headers)
+            data = json.loads(response.text)
 
-            #self.logger.info(f'Source File Contents::{filecontents}')
+            for record in data["records"]:
+                for recordname in (record["DeveloperName"], record["MasterLabel"]):
+                    for name in requested.get(str(recordname).lower(), []):
+                        if availability[name]["total"] is None:
+                            availability[name] = {
+                                "total": record["TotalLicenses"],
+                                "used": record["UsedLicenses"],
+                                "available": record["TotalLicenses"] - record["UsedLicenses"]
+                            }
+
+        return availability
+
+    def _is_bulk_check_psl_minimal_qty_available_in_org(self, srcfile):
+
+        #self.logger.info(f'Source File::{srcfile}')
+        try:
+
+            psldict = self._load_psl_bulk_file(srcfile)
 
             #fail closed
-            if(len(filecontents)==0):
+            if not psldict:
                 return False
 
-            psldict = json.loads(filecontents)
+            availability = self._get_psl_availability(list(psldict.keys()))
 
             for p in psldict.keys():
                 qty = psldict[p]
-                res = self._is_psl_minimal_qty_available_in_org(p,qty)
-                if(res==False):
+                available = availability.get(p, {}).get("available")
+                if(available is None or available < qty):
                     self.logger.error(f'Minimal Qty for: {p} not met. Required:{qty}')
                     return False
             #hurray-you survived the hunger games. may the odds be in your favor
@@ -649,26 +814,12 @@ class NGOrgConfig(SFDXBaseTask):
             return False
 
 
-        #fail closed
-        self.logger.error(f'Failing closed.')
-        return False
-
-
     def _is_ps_present_in_org(self, ps):
 
         #e.g.
         #SELECT  id,MasterLabel,DeveloperName from PermissionSet where (Name='OmniStudioDesigner' or Label='OmniStudioDesigner')
 
-        url = f"{self.instanceurl}/services/data/v56.0/query/?q=select+Id+from+PermissionSet+where+(Name='{ps}'+or+Label='{ps}')+LIMIT+1"
-        headers = {
-            'Authorization': f'Bearer {self.accesstoken}',
-            'Content-Type': 'application/json'
-        }
-        response = requests.request("GET", url, headers=headers)
-        # print(response.text)
-        data = json.loads(response.text)
-        self.logger.info(data["totalSize"])
-        return data["totalSize"] == 1
+        return self._run_predicate_query("is_ps_in_org", [ps])
 
 
 
@@ -694,7 +845,7 @@ class NGOrgConfig(SFDXBaseTask):
                 'Authorization': f'Bearer {self.accesstoken}',
                 'Content-Type': 'application/json'
             }
-            response = requests.request("GET", url, headers=headers)
+            response = http_request("GET", url, headers=headers)
             # print(response.text)
             data = json.loads(response.text)
             self.logger.info(data["totalSize"])
@@ -716,7 +867,7 @@ class NGOrgConfig(SFDXBaseTask):
                 'Authorization': f'Bearer {self.accesstoken}',
                 'Content-Type': 'application/json'
             }
-            response = requests.request("GET", url, headers=headers)
+            response = http_request("GET", url, headers=headers)
             # print(response.text)
             data = json.loads(response.text)
             self.logger.info(data["totalSize"])
@@ -731,15 +882,7 @@ class NGOrgConfig(SFDXBaseTask):
 
     def _get_org_max_api_version(self):
 
-        url = f"{self.instanceurl}/services/data/"
-        headers = {
-            'Authorization': f'Bearer {self.accesstoken}',
-            'Content-Type': 'application/json'
-        }
-        response = requests.request("GET", url, headers=headers)
-        data = json.loads(response.text)
-
-        return float(data[-1]['version'])
+        return float(get_org_max_api_version(self.instanceurl, self.accesstoken))
 
     def _run_task(self):
 
@@ -763,6 +906,10 @@ class NGCacheAdd(SFDXBaseTask):
         "value": {
             "description": "Literal value or expression between ${{}} ",
             "required": False
+        },
+        "ttl": {
+            "description": "Number of seconds to keep the value for when orgconfig_hydrate is run with persist_cache. Defaults to the cache_ttl of orgconfig_hydrate",
+            "required": False
         }
     }
 
@@ -783,6 +930,14 @@ class NGCacheAdd(SFDXBaseTask):
         else:
             self.value =self.options["value"]
 
+        self.ttl = int(self.options["ttl"]) if "ttl" in self.options and self.options["ttl"] else None
+
+    def _cache_set(self, key, val):
+        if self.ttl:
+            self.org_config.qbrix_cache_set(key,val,self.ttl)
+        else:
+            self.org_config.qbrix_cache_set(key,val)
+
     def _run_task(self):
         self._prepruntime()
 
@@ -798,8 +953,161 @@ class NGCacheAdd(SFDXBaseTask):
                 #restrict scope to expression - no builtins and only locals self
                 res = eval(compliledcode,{},{"self":self})
                 #self.logger.info(f"EXPRESSION::VAL::{res}")
-                self.org_config.qbrix_cache_set(self.key,res)
+                self._cache_set(self.key,res)
             except Exception as inst:
                 self.logger.error(f"Unable to evaluate dynamic express::{inst}")
         else:
-            self.org_config.qbrix_cache_set(self.key,self.value)
\ No newline at end of file
+            self._cache_set(self.key,self.value)
+
+
+class NGOrgConfigInvalidate(NGOrgConfig):
+    task_options = {
+
+        "org": {
+            "description": "Org Alias for the target org",
+            "required": False
+        },
+        "predicates": {
+            "description": "List of org_config predicate names to clear, for example is_package_installed. Defaults to all predicates.",
+            "required": False
+        }
+    }
+
+    task_docs = """
+    Clears the cached results of org_config predicates (is_object_in_org, is_package_installed etc.) for the target org. Add this after steps which change the org in a way the predicates cannot detect from their cache, for example deploying permission sets.
+    """
+
+    def _run_task(self):
+        self._prepruntime()
+        predicates = self.options.get("predicates")
+        if isinstance(predicates, str):
+            predicates = [p.strip() for p in predicates.split(",") if p.strip()]
+
+        invalidate_org_predicates(self._cache_org_id(), predicates or None)
+        self.logger.info(f"Cleared cached org_config predicates::{predicates or 'ALL'}")
+
+
+class NGOrgConfigPrefetch(NGOrgConfig):
+    task_options = {
+
+        "org": {
+            "description": "Org Alias for the target org",
+            "required": False
+        },
+        "flow": {
+            "description": "Name of the flow to prefetch predicates for. Defaults to the flow this task is running in.",
+            "required": False
+        }
+    }
+
+    task_docs = """
+    Reads the when clauses of a flow (including sub flows) and answers the org_config predicates found up front, using the org index and Composite Batch requests. The results are stored in the predicate cache, so the steps in the flow are evaluated without further calls to the org. Add this as the first step of a flow.
+
+    Only is_psl_in_org, is_namespace_installed and is_package_installed are prefetched, and only positive results are stored. CumulusCI evaluates each when clause just before its step runs, so a package or PSL installed by an earlier step is still picked up. Predicates such as is_object_in_org, is_ps_in_org and is_data_present are always checked when the step runs.
+    """
+
+    def _collect_flow_when_clauses(self, flow_name, visited):
+        if flow_name in visited:
+            return []
+        visited.add(flow_name)
+
+        try:
+            flow_config = self.project_config.get_flow(flow_name)
+        except Exception as e:
+            self.logger.info(f"Unable to read flow {flow_name} for prefetch::{e}")
+            return []
+
+        clauses = []
+        for step in (flow_config.config.get("steps") or {}).values():
+            if not isinstance(step, dict):
+                continue
+            if step.get("when"):
+                clauses.append(step["when"])
+            if step.get("flow") and step["flow"] != "None":
+                clauses.extend(self._collect_flow_when_clauses(step["flow"], visited))
+
+        return clauses
+
+    def _collect_when_clauses(self):
+        if "flow" in self.options and self.options["flow"]:
+            return self._collect_flow_when_clauses(self.options["flow"], set())
+
+        if self.flow is None:
+            return []
+
+        return [step.when for step in self.flow.steps if getattr(step, "when", None)]
+
+    @staticmethod
+    def _query_args(predicate, args, kwargs):
+        return list(args) + list(kwargs.values())
+
+    def _run_batch(self, subrequests):
+        url = f"{self.instanceurl}/services/data/v56.0/composite/batch"
+        headers = {
+            'Authorization': f'Bearer {self.accesstoken}',
+            'Content-Type': 'application/json'
+        }
+
+        results = []
+        for chunk in chunk_list(subrequests, COMPOSITE_BATCH_LIMIT):
+            try:
+                response = http_request("POST", url, headers=headers, json={"haltOnError": False, "batchRequests": chunk})
+                results.extend(json.loads(response.text)["results"])
+            except Exception as e:
+                self.logger.error(f"Prefetch batch failed. Predicates will be checked when the step runs::{e}")
+                results.extend({"statusCode": 500, "result": None} for _ in chunk)
+
+        return results
+
+    def _run_task(self):
+        self._prepruntime()
+
+        org_id = self._cache_org_id()
+        calls = {}
+        for clause in self._collect_when_clauses():
+            for predicate, args, kwargs in extract_predicate_calls(clause):
+                cache_args = [list(args), kwargs]
+                found, _ = predicate_cache.get(org_id, predicate, cache_args)
+                if not found:
+                    calls[json.dumps([predicate, cache_args], sort_keys=True, default=str)] = (predicate, args, kwargs)
+
+        if not calls:
+            self.logger.info("No org_config predicates to prefetch")
+            return
+
+        # Packages are answered from the org index, everything else shares one set of batch requests
+        index_predicates = {
+            "is_namespace_installed": self._is_package_namespace_installed,
+            "is_package_installed": self._is_package_installed,
+        }
+        query_calls = []
+        subrequest_urls = []
+        for predicate, args, kwargs in calls.values():
+            cache_args = [list(args), kwargs]
+            if predicate in index_predicates:
+                try:
+                    if index_predicates[predicate](*args, **kwargs):
+                        predicate_cache.set(org_id, predicate, cache_args, True)
+                except Exception as e:
+                    self.logger.error(f"Unable to prefetch {predicate}::{args}::{e}")
+                continue
+
+            query_args = self._query_args(predicate, args, kwargs)
+            url = self._predicate_query_url(predicate, query_args)
+            if url not in subrequest_urls:
+                subrequest_urls.append(url)
+            query_calls.append((predicate, query_args, cache_args, subrequest_urls.index(url)))
+
+        results = self._run_batch([{"method": "GET", "url": url} for url in subrequest_urls]) if subrequest_urls else []
+
+        for predicate, query_args, cache_args, index in query_calls:
+            result = results[index]
+            if result.get("statusCode") != 200:
+                self.logger.info(f"{predicate}::{query_args}::not prefetched::{result.get('result')}")
+                continue
+
+            value = self._predicate_query_result(predicate, query_args, result["result"])
+            if value:
+                predicate_cache.set(org_id, predicate, cache_args, value)
+
+        self.logger.info(f"Prefetched {len(calls)} org_config predicate(s) using {len(chunk_list(subrequest_urls, COMPOSITE_BATCH_LIMIT))} batch request(s)")
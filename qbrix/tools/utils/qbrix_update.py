@@ -44,6 +44,8 @@ Q_BRIX_CUSTOM_TASKS = {
     "qbrix_sfdx": "cumulusci.tasks.sfdx.SFDXOrgTask",
     "deploy_dx": "cumulusci.tasks.sfdx.SFDXOrgTask",
     "qbrix_cache_add": "qbrix.tools.utils.qbrix_orgconfig_hydrate.NGCacheAdd",
+    "orgconfig_invalidate": "qbrix.tools.utils.qbrix_orgconfig_hydrate.NGOrgConfigInvalidate",
+    "orgconfig_prefetch": "qbrix.tools.utils.qbrix_orgconfig_hydrate.NGOrgConfigPrefetch",
     "abort_install": "qbrix.tools.utils.qbrix_orgconfig_hydrate.NGAbort",
     "qbrix_shell_deploy_metadeploy": "qbrix.tools.utils.qbrix_deploy.Deploy",
     "health_check": "qbrix.tools.utils.qbrix_health_check.HealthChecker",
@@ -0,0 +1,45 @@
+import pytest
+
+pytest.importorskip("cumulusci")
+
+from qbrix.tools.shared.qbrix_metadata_retrieve import chunk_manifest
+
+
+def _chunk_for(chunks, type_name, member):
+    return [i for i, chunk in enumerate(chunks) if member in chunk.get(type_name, [])]
+
+
+def test_chunk_manifest_keeps_object_and_fields_together():
+    types = {
+        "CustomObject": ["Account", "Contact"],
+        "CustomField": [f"Account.Field{i}__c" for i in range(3)] + [f"Contact.Field{i}__c" for i in range(3)],
+        "ValidationRule": ["Account.Rule1"],
+    }
+
+    chunks = chunk_manifest(types, max_members=5)
+
+    assert len(chunks) == 2
+    for object_name in ("Account", "Contact"):
+        object_chunks = set(_chunk_for(chunks, "CustomObject", object_name))
+        for field in [m for m in types["CustomField"] if m.startswith(f"{object_name}.")]:
+            assert set(_chunk_for(chunks, "CustomField", field)) == object_chunks
+    assert _chunk_for(chunks, "ValidationRule", "Account.Rule1") == _chunk_for(chunks, "CustomObject", "Account")
+
+
+def test_chunk_manifest_keeps_fields_for_one_object_together_without_parent():
+    types = {"CustomField": [f"Account.Field{i}__c" for i in range(4)] + ["Contact.Name__c"]}
+
+    chunks = chunk_manifest(types, max_members=2)
+
+    assert len(_chunk_for(chunks, "CustomField", "Account.Field0__c")) == 1
+    account_chunk = _chunk_for(chunks, "CustomField", "Account.Field0__c")[0]
+    assert all(f"Account.Field{i}__c" in chunks[account_chunk]["CustomField"] for i in range(4))
+
+
+def test_chunk_manifest_keeps_family_together_with_wildcard():
+    types = {"CustomObject": ["Account"], "CustomField": ["*"], "ApexClass": ["A", "B"]}
+
+    chunks = chunk_manifest(types, max_members=1)
+
+    family = [chunk for chunk in chunks if "CustomField" in chunk]
+    assert family == [{"CustomField": ["*"], "CustomObject": ["Account"]}]